@@ -0,0 +1,169 @@
+# IMPORTACIÓN DE MÓDULOS
+import threading
+import time
+import numpy as np
+
+
+class SemanticAnswerCache:
+    """
+    Caché semántica de respuestas del modelo de lenguaje.
+
+    Las respuestas se agrupan por ámbito (modelo, categoría, k, nivel, modo de recuperación y huella del historial
+    de la conversación) y se recuperan cuando la similitud coseno entre la nueva consulta y una consulta previa
+    supera el umbral configurado. De esta forma, preguntas casi idénticas no vuelven a generar una respuesta.
+    Como cada historial forma su propio ámbito, se conservan solo los ámbitos usados más recientemente.
+    """
+
+    def __init__(self, threshold=0.95, max_entries_per_scope=256, ttl=86400, replay_chunk_size=32, max_scopes=1024):
+        self.__threshold = threshold    # Similitud mínima para considerar un acierto.
+        self.__max_entries = max_entries_per_scope  # Respuestas máximas por ámbito.
+        self.__max_scopes = max_scopes  # Ámbitos máximos; se descartan los usados hace más tiempo.
+        self.__ttl = ttl    # Segundos de vida de cada respuesta (None = sin caducidad).
+        self.__replay_chunk_size = replay_chunk_size    # Caracteres por fragmento al reproducir.
+        # ámbito -> {"vectors": matriz, "answers": [...], "created": [...]}, del usado hace más tiempo al más
+        # reciente.
+        self.__scopes = {}
+        self.__versions = {}    # categoría -> número de invalidaciones realizadas
+        self.__lock = threading.Lock()
+        self.__hits = 0
+        self.__misses = 0
+
+    @staticmethod
+    def _normalize(vector):
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _purge_expired(self, scope):
+        """
+        Elimina las respuestas caducadas de un ámbito. Debe invocarse con el candado adquirido.
+        """
+        entry = self.__scopes.get(scope)
+
+        if entry is None or self.__ttl is None:
+            return
+
+        now = time.monotonic()
+        keep = [i for i, created in enumerate(entry["created"]) if now - created < self.__ttl]
+
+        if len(keep) == len(entry["created"]):
+            return
+
+        if not keep:
+            del self.__scopes[scope]
+            return
+
+        entry["vectors"] = entry["vectors"][keep]
+        entry["answers"] = [entry["answers"][i] for i in keep]
+        entry["created"] = [entry["created"][i] for i in keep]
+
+    def lookup(self, scope: tuple, query_vector):
+        """
+        Busca una respuesta previa para una consulta similar dentro del ámbito indicado.
+
+        :return: Respuesta almacenada o None si no hubo coincidencia.
+        """
+        query_vector = self._normalize(query_vector)
+
+        with self.__lock:
+            self._purge_expired(scope)
+            entry = self.__scopes.get(scope)
+
+            if entry is None:
+                self.__misses += 1
+                return None
+
+            # Similitud coseno contra todas las consultas del ámbito en una sola operación.
+            similarities = entry["vectors"] @ query_vector
+            best = int(np.argmax(similarities))
+
+            if similarities[best] < self.__threshold:
+                self.__misses += 1
+                return None
+
+            self.__hits += 1
+            self.__scopes[scope] = self.__scopes.pop(scope)     # Pasa a ser el ámbito usado más recientemente.
+            return entry["answers"][best]
+
+    def version(self, category):
+        """
+        Retorna la versión actual de una categoría; cambia cada vez que la categoría se invalida.
+        """
+        with self.__lock:
+            return self.__versions.get(category, 0)
+
+    def store(self, scope: tuple, query_vector, answer: str, version=None):
+        """
+        Almacena la respuesta generada para una consulta dentro del ámbito indicado.
+
+        Si se indica la versión de la categoría obtenida antes de generar la respuesta y la categoría
+        fue invalidada mientras tanto, la respuesta se descarta.
+        """
+        if not answer:
+            return
+
+        query_vector = self._normalize(query_vector)
+
+        with self.__lock:
+            if version is not None and version != self.__versions.get(scope[1], 0):
+                return
+
+            entry = self.__scopes.get(scope)
+
+            if entry is None:
+                self.__scopes[scope] = {"vectors": query_vector[np.newaxis, :],
+                                        "answers": [answer],
+                                        "created": [time.monotonic()]}
+
+                while len(self.__scopes) > self.__max_scopes:
+                    del self.__scopes[next(iter(self.__scopes))]
+
+                return
+
+            entry["vectors"] = np.vstack([entry["vectors"], query_vector])
+            entry["answers"].append(answer)
+            entry["created"].append(time.monotonic())
+
+            # Se descartan las respuestas más antiguas si se supera el límite.
+            if len(entry["answers"]) > self.__max_entries:
+                overflow = len(entry["answers"]) - self.__max_entries
+                entry["vectors"] = entry["vectors"][overflow:]
+                entry["answers"] = entry["answers"][overflow:]
+                entry["created"] = entry["created"][overflow:]
+
+    def replay(self, answer: str):
+        """
+        Reproduce una respuesta almacenada como flujo de fragmentos.
+        """
+        for start in range(0, len(answer), self.__replay_chunk_size):
+            yield answer[start:start + self.__replay_chunk_size]
+
+    def invalidate(self, category):
+        """
+        Elimina las respuestas de todos los ámbitos asociados a una categoría.
+        """
+        with self.__lock:
+            self.__versions[category] = self.__versions.get(category, 0) + 1
+
+            for scope in [scope for scope in self.__scopes if scope[1] == category]:
+                del self.__scopes[scope]
+
+    def clear(self):
+        """
+        Elimina todas las respuestas almacenadas.
+        """
+        with self.__lock:
+            self.__scopes.clear()
+
+    def stats(self):
+        """
+        Retorna las estadísticas de uso de la caché.
+        """
+        with self.__lock:
+            total = self.__hits + self.__misses
+            return {"scopes": len(self.__scopes),
+                    "entries": sum(len(entry["answers"]) for entry in self.__scopes.values()),
+                    "threshold": self.__threshold,
+                    "hits": self.__hits,
+                    "misses": self.__misses,
+                    "hit_rate": self.__hits / total if total else 0.0}
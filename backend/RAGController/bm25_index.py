@@ -0,0 +1,292 @@
+# IMPORTACIÓN DE MÓDULOS
+import json
+import math
+import os
+import re
+import threading
+import unicodedata
+from collections import Counter
+import numpy as np
+
+# Palabras vacías frecuentes que no aportan a la búsqueda léxica y alargan las listas de apariciones.
+STOPWORDS = frozenset("""
+a al algo como con de del el en es esta este ha la las lo los mas me mi no o para pero por que se si sin
+su sus un una uno y ya the of and to in is for on that with as by an be or are at
+""".split())
+
+
+def tokenize(text: str):
+    """
+    Convierte un texto en términos: minúsculas, sin acentos y sin palabras vacías.
+    Se conservan números y siglas (artículos, claves de pizarra, acrónimos).
+    """
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return [term for term in re.findall(r"\w+", text) if term not in STOPWORDS]
+
+
+class BM25Index:
+    """
+    Índice invertido con puntuación BM25 para los pedazos de un entrenamiento.
+
+    Solo se almacenan las listas de apariciones y la longitud de cada pedazo; el texto se
+    recupera de la base de datos vectorial a partir de los identificadores.
+
+    Para buscar, cada pedazo tiene un renglón y la normalización por longitud de todos los renglones se calcula
+    una sola vez (se recalcula solo después de modificar el índice); las listas de apariciones de cada término
+    se convierten a arreglos de numpy en su primera búsqueda, de modo que la puntuación se acumula por término
+    en una sola operación en lugar de pedazo por pedazo.
+    """
+
+    def __init__(self, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings = {}  # término -> {identificador: frecuencia}
+        self.doc_lengths = {}   # identificador -> número de términos
+        self.total_length = 0
+        self._lock = threading.Lock()   # Evita buscar mientras el índice se modifica.
+        self._ids = []  # renglón -> identificador (None si el pedazo se eliminó)
+        self._rows = {}     # identificador -> renglón
+        self._lengths = []  # renglón -> número de términos (0 si el pedazo se eliminó)
+        self._norms = None  # Normalización por longitud de cada renglón; None si debe recalcularse.
+        self._term_arrays = {}  # término -> (renglones, frecuencias) de su lista de apariciones
+
+    def __len__(self):
+        return len(self.doc_lengths)
+
+    def to_dict(self):
+        """
+        Retorna el contenido del índice en un formato serializable como JSON.
+        """
+        with self._lock:
+            return {"k1": self.k1, "b": self.b,
+                    "postings": {term: dict(documents) for term, documents in self.postings.items()},
+                    "doc_lengths": dict(self.doc_lengths), "total_length": self.total_length}
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Crea un índice a partir del contenido retornado por to_dict.
+        """
+        index = cls(k1=float(data["k1"]), b=float(data["b"]))
+        index.postings = {str(term): {str(doc_id): int(frequency) for doc_id, frequency in documents.items()}
+                          for term, documents in data["postings"].items()}
+        index.doc_lengths = {str(doc_id): int(length) for doc_id, length in data["doc_lengths"].items()}
+        index.total_length = int(data["total_length"])
+
+        for doc_id, length in index.doc_lengths.items():
+            index._add_row(doc_id, length)
+
+        return index
+
+    def _add_row(self, doc_id, length):
+        # Se llama con el candado adquirido (o antes de publicar el índice).
+        self._rows[doc_id] = len(self._ids)
+        self._ids.append(doc_id)
+        self._lengths.append(length)
+        self._norms = None
+
+    def _compact_rows(self):
+        # Vuelve a numerar los renglones sin los de pedazos eliminados. Se llama con el candado adquirido.
+        self._ids, self._rows, self._lengths = [], {}, []
+        self._term_arrays.clear()
+
+        for doc_id, length in self.doc_lengths.items():
+            self._add_row(doc_id, length)
+
+    def add(self, doc_id, text):
+        """
+        Agrega un pedazo al índice; si el identificador ya existe no se modifica.
+        """
+        terms = tokenize(text)
+
+        with self._lock:
+            if doc_id in self.doc_lengths:
+                return
+
+            for term, frequency in Counter(terms).items():
+                self.postings.setdefault(term, {})[doc_id] = frequency
+                self._term_arrays.pop(term, None)
+
+            self.doc_lengths[doc_id] = len(terms)
+            self.total_length += len(terms)
+            self._add_row(doc_id, len(terms))
+
+    def remove(self, doc_id, text):
+        """
+        Elimina un pedazo del índice; se requiere su texto para ubicar sus términos.
+        """
+        terms = set(tokenize(text))
+
+        with self._lock:
+            length = self.doc_lengths.pop(doc_id, None)
+
+            if length is None:
+                return
+
+            self.total_length -= length
+            # El renglón queda sin uso: ya no aparece en ninguna lista de apariciones.
+            row = self._rows.pop(doc_id)
+            self._ids[row] = None
+            self._lengths[row] = 0
+            self._norms = None
+
+            for term in terms:
+                self._term_arrays.pop(term, None)
+                documents = self.postings.get(term)
+
+                if documents is not None:
+                    documents.pop(doc_id, None)
+
+                    if not documents:
+                        del self.postings[term]
+
+            # Si la mayoría de los renglones quedaron sin uso (por ejemplo, tras actualizar un documento), se
+            # vuelven a numerar para que el arreglo de puntuaciones no crezca sin límite.
+            if len(self._ids) > 2 * len(self.doc_lengths) + 1024:
+                self._compact_rows()
+
+    def search(self, query, k):
+        """
+        Busca los pedazos con mayor puntuación BM25 para la consulta.
+
+        :return: Lista de tuplas (identificador, puntuación) ordenada de mayor a menor.
+        """
+        terms = set(tokenize(query))
+
+        with self._lock:
+            total_docs = len(self.doc_lengths)
+
+            if not total_docs or k <= 0:
+                return []
+
+            if self._norms is None:
+                average_length = self.total_length / total_docs
+                self._norms = self.k1 * (1 - self.b + self.b * np.asarray(self._lengths, dtype=np.float64)
+                                         / average_length)
+
+            scores = np.zeros(len(self._ids), dtype=np.float64)
+
+            for term in terms:
+                documents = self.postings.get(term)
+
+                if not documents:
+                    continue
+
+                arrays = self._term_arrays.get(term)
+
+                if arrays is None:
+                    arrays = self._term_arrays[term] = (
+                        np.fromiter((self._rows[doc_id] for doc_id in documents), dtype=np.int64,
+                                    count=len(documents)),
+                        np.fromiter(documents.values(), dtype=np.float64, count=len(documents)))
+
+                rows, frequencies = arrays
+                idf = math.log(1 + (total_docs - len(documents) + 0.5) / (len(documents) + 0.5))
+                # Cada renglón aparece una sola vez en la lista de un término.
+                scores[rows] += idf * frequencies * (self.k1 + 1) / (frequencies + self._norms[rows])
+
+            matches = np.flatnonzero(scores)
+
+            if len(matches) > k:
+                matches = matches[np.argpartition(-scores[matches], k - 1)[:k]]
+
+            matches = matches[np.argsort(-scores[matches], kind="stable")]
+            return [(self._ids[row], float(scores[row])) for row in matches]
+
+
+class BM25IndexStore:
+    """
+    Conjunto de índices BM25 por entrenamiento, persistidos en disco junto a la base de datos.
+    """
+
+    def __init__(self, directory):
+        self.__directory = directory
+        os.makedirs(self.__directory, exist_ok=True)
+        self.__indexes = {}     # nombre de archivo -> BM25Index
+        self.__build_locks = {}     # nombre de archivo -> candado de su construcción
+        self.__lock = threading.Lock()
+
+    def _path(self, name):
+        # Los índices se guardan como JSON; los archivos .bm25 de versiones anteriores (pickle) no se leen, ya que
+        # cargarlos podría ejecutar código, y el proceso escritor reconstruye el índice a partir de la colección.
+        return os.path.join(self.__directory, f"{name}.bm25.json")
+
+    def _load(self, name):
+        # Retorna el índice en memoria o guardado en disco, o None. Debe invocarse con el candado adquirido.
+        index = self.__indexes.get(name)
+
+        if index is None and os.path.isfile(self._path(name)):
+            with open(self._path(name), "r", encoding="utf-8") as file:
+                index = self.__indexes[name] = BM25Index.from_dict(json.load(file))
+
+        return index
+
+    def load(self, name):
+        """
+        Retorna el índice indicado si ya está en memoria o guardado en disco, o None si aún no se construye.
+        """
+        with self.__lock:
+            return self._load(name)
+
+    def get(self, name):
+        """
+        Retorna el índice indicado, cargándolo de disco si es necesario (o vacío si no existe).
+        """
+        with self.__lock:
+            index = self._load(name)
+
+            if index is None:
+                index = self.__indexes[name] = BM25Index()
+
+            return index
+
+    def build_lock(self, name):
+        """
+        Retorna el candado que evita construir el mismo índice en varios hilos a la vez.
+        """
+        with self.__lock:
+            return self.__build_locks.setdefault(name, threading.Lock())
+
+    def publish(self, name, index):
+        """
+        Pone en uso un índice construido por completo fuera del conjunto.
+        """
+        with self.__lock:
+            self.__indexes[name] = index
+
+    def save(self, name):
+        """
+        Guarda el índice en disco de forma atómica.
+        """
+        with self.__lock:
+            index = self.__indexes.get(name)
+
+            if index is None:
+                return
+
+            temp_path = f"{self._path(name)}.tmp"
+
+            with open(temp_path, "w", encoding="utf-8") as file:
+                json.dump(index.to_dict(), file, ensure_ascii=False, separators=(",", ":"))
+
+            os.replace(temp_path, self._path(name))
+
+    def invalidate(self, name):
+        """
+        Descarta la copia en memoria de un índice; la siguiente consulta lo vuelve a leer de disco (después de
+        que otro proceso lo modificó).
+        """
+        with self.__lock:
+            self.__indexes.pop(name, None)
+
+    def drop(self, name):
+        """
+        Elimina el índice de memoria y de disco.
+        """
+        with self.__lock:
+            self.__indexes.pop(name, None)
+
+            for path in (self._path(name), os.path.join(self.__directory, f"{name}.bm25")):
+                if os.path.isfile(path):
+                    os.remove(path)
@@ -0,0 +1,285 @@
+# IMPORTACIÓN DE MÓDULOS
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from RAGController import bulk_ingestion_worker
+from RAGController.metrics import INGESTION_RATE
+
+
+class BulkIngester:
+    """
+    Ingesta masiva fuera de línea de un árbol de carpetas.
+
+    La extracción y división de los archivos se reparte entre un grupo de procesos, mientras que este proceso
+    incrusta los pedazos de varios archivos en lotes grandes y los almacena en la colección de cada categoría.
+    La categoría de un archivo es el nombre de la carpeta de primer nivel que lo contiene (o la indicada), y su
+    documento de origen es la ruta relativa a la raíz.
+
+    El avance se guarda en una bitácora JSONL: un archivo se marca como terminado solo después de que sus
+    pedazos, el índice léxico y el manifiesto quedan guardados, por lo que al reanudar una ingesta interrumpida
+    se omiten los archivos terminados y los pedazos ya almacenados de los demás no se vuelven a incrustar.
+
+    Debe ejecutarse con el servicio detenido: la base de datos de Chroma y el manifiesto no admiten escrituras
+    de varios procesos.
+    """
+
+    def __init__(self, manager, root, category=None, default_category="general", workers=None,
+                 embed_batch_size=512, checkpoint_path=None, checkpoint_interval=30.0):
+        self.__manager = manager    # ChromaDBManager donde se almacenan los pedazos.
+        self.__root = os.path.abspath(root)
+        self.__category = category  # Categoría de todos los archivos (None = carpeta de primer nivel).
+        self.__default_category = default_category  # Categoría de los archivos ubicados en la raíz.
+        self.__workers = max(1, workers or os.cpu_count() or 1)
+        self.__embed_batch_size = embed_batch_size  # Pedazos incrustados por lote.
+        self.__checkpoint_path = checkpoint_path    # Bitácora JSONL del avance.
+        self.__checkpoint_interval = checkpoint_interval    # Segundos entre guardados del avance.
+        self.__checkpoint = self._load_checkpoint()     # ruta -> último registro de la bitácora
+        self.__buffer = []  # [(archivo, pedazo)] en espera de ser incrustados.
+        self.__files = {}   # ruta -> estado de los archivos con pedazos pendientes de almacenar.
+        self.__stored = []  # Archivos con todos sus pedazos almacenados, pendientes de registrar.
+        self.__records = []     # Registros pendientes de escribir en la bitácora.
+        self.__categories = set()   # Categorías modificadas.
+        self.__stats = {"files_done": 0, "files_unchanged": 0, "files_failed": 0, "files_skipped": 0,
+                        "pages": 0, "chunks_embedded": 0, "chunks_reused": 0, "chunks_removed": 0,
+                        "embed_seconds": 0.0, "store_seconds": 0.0}
+        self.__failures = []    # [{"path", "error"}]
+
+    def _load_checkpoint(self):
+        """
+        Lee la bitácora de una ingesta anterior; el último registro de cada archivo es el vigente.
+        """
+        records = {}
+
+        if not self.__checkpoint_path or not os.path.isfile(self.__checkpoint_path):
+            return records
+
+        with open(self.__checkpoint_path, "r", encoding="utf-8") as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:    # Última línea incompleta de una ingesta interrumpida.
+                    continue
+
+                records[record["path"]] = record
+
+        return records
+
+    def discover(self):
+        """
+        Recorre el árbol de carpetas en orden y retorna los archivos con formato compatible.
+
+        :return: Generador de diccionarios con la ruta, la categoría, el documento de origen, el tamaño y la
+        fecha de modificación de cada archivo.
+        """
+        for directory, subdirectories, filenames in os.walk(self.__root):
+            subdirectories.sort()
+
+            for filename in sorted(filenames):
+                if filename.rsplit(".", 1)[-1].lower() not in bulk_ingestion_worker.PAGE_READERS:
+                    continue
+
+                path = os.path.join(directory, filename)
+                source = os.path.relpath(path, self.__root).replace(os.sep, "/")
+                parts = source.split("/")
+                category = self.__category or (parts[0] if len(parts) > 1 else self.__default_category)
+                stat = os.stat(path)
+
+                yield {"path": path, "category": category, "source": source, "size": stat.st_size,
+                       "mtime": stat.st_mtime_ns}
+
+    def _is_done(self, file):
+        record = self.__checkpoint.get(file["path"])
+
+        return record is not None and record["status"] == "done" \
+            and record["size"] == file["size"] and record["mtime"] == file["mtime"]
+
+    def _record(self, file, status, file_hash=None, error=None):
+        self.__records.append({"path": file["path"], "status": status, "size": file["size"],
+                               "mtime": file["mtime"], "hash": file_hash, "error": error})
+
+    def _fail(self, file, error):
+        self.__stats["files_failed"] += 1
+        self.__failures.append({"path": file["source"], "error": error})
+        self._record(file, "failed", error=error)
+
+    def _collect(self, file, future):
+        """
+        Recibe el resultado de la extracción de un archivo y pone sus pedazos en espera de ser incrustados.
+        """
+        try:
+            result = future.result()
+        except Exception as error:
+            self._fail(file, f"{type(error).__name__}: {error}")
+            return
+
+        if result["unchanged"]:     # Ya registrado en el manifiesto con el mismo contenido.
+            self.__stats["files_unchanged"] += 1
+            self._record(file, "done", file_hash=result["hash"])
+            return
+
+        if not result["chunks"]:
+            self._fail(file, "No se obtuvieron pedazos del documento.")
+            return
+
+        self.__stats["pages"] += result["pages"]
+        self.__files[file["path"]] = {"file": file, "hash": result["hash"], "remaining": len(result["chunks"]),
+                                      "ids": {chunk[0] for chunk in result["chunks"]}}
+        self.__buffer.extend((file["path"], chunk) for chunk in result["chunks"])
+
+    def _flush(self, force=False):
+        """
+        Incrusta y almacena los pedazos en espera por lotes de embed_batch_size; con force también el último
+        lote incompleto.
+        """
+        while len(self.__buffer) >= self.__embed_batch_size or (force and self.__buffer):
+            batch = self.__buffer[:self.__embed_batch_size]
+            del self.__buffer[:self.__embed_batch_size]
+            by_category = {}
+
+            for path, chunk in batch:
+                by_category.setdefault(self.__files[path]["file"]["category"], []).append(chunk)
+
+            # Solo se incrustan los pedazos que no están almacenados (por ejemplo, de una ingesta interrumpida).
+            new_chunks = {}
+
+            for category, chunks in by_category.items():
+                missing = self.__manager.missing_chunk_ids(category, [chunk[0] for chunk in chunks])
+                new_chunks[category] = [chunk for chunk in chunks if chunk[0] in missing]
+                reused = [chunk for chunk in chunks if chunk[0] not in missing]
+
+                if reused:
+                    self.__manager.index_chunks(category, reused)
+                    self.__stats["chunks_reused"] += len(reused)
+
+            texts = [text for chunks in new_chunks.values() for _, text, _ in chunks]
+            started_at = time.perf_counter()
+            embeddings = self.__manager.embed_documents(texts) if texts else []
+            self.__stats["embed_seconds"] += time.perf_counter() - started_at
+            started_at = time.perf_counter()
+            position = 0
+
+            for category, chunks in new_chunks.items():
+                if chunks:
+                    self.__manager.store_chunks(category, chunks, embeddings[position:position + len(chunks)])
+                    position += len(chunks)
+
+                self.__categories.add(category)
+
+            self.__stats["store_seconds"] += time.perf_counter() - started_at
+            self.__stats["chunks_embedded"] += len(texts)
+
+            for path, _ in batch:
+                state = self.__files[path]
+                state["remaining"] -= 1
+
+                if not state["remaining"]:
+                    self.__stored.append(self.__files.pop(path))
+
+    def _save_checkpoint(self):
+        """
+        Registra en el manifiesto los archivos con todos sus pedazos almacenados y escribe la bitácora.
+        """
+        by_category = {}
+
+        for state in self.__stored:
+            by_category.setdefault(state["file"]["category"], []).append(state)
+
+        for category, states in by_category.items():
+            sources = {state["file"]["source"]: (state["hash"], state["ids"]) for state in states}
+            self.__stats["chunks_removed"] += self.__manager.complete_sources(category, sources)
+
+            for state in states:
+                self.__stats["files_done"] += 1
+                self._record(state["file"], "done", file_hash=state["hash"])
+
+        self.__stored = []
+
+        if self.__checkpoint_path and self.__records:
+            with open(self.__checkpoint_path, "a", encoding="utf-8") as file:
+                for record in self.__records:
+                    file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+                file.flush()
+                os.fsync(file.fileno())
+
+        self.__records = []
+
+    def run(self):
+        """
+        Ejecuta la ingesta completa (o reanuda una interrumpida).
+
+        :return: Diccionario con el reporte: archivos terminados, sin cambios, fallidos y omitidos, páginas,
+        pedazos incrustados y reutilizados, duración, velocidad y la lista de archivos fallidos.
+        """
+        started_at = time.perf_counter()
+        last_checkpoint = started_at
+        interrupted = False
+        files = self.discover()
+        settings = self.__manager.get_splitter_settings()
+        pending = {}    # futuro -> archivo
+
+        with ProcessPoolExecutor(max_workers=self.__workers, initializer=bulk_ingestion_worker.init_worker,
+                                 initargs=(settings["chunk_size"], settings["chunk_overlap"])) as executor:
+
+            def submit_next():
+                for file in files:
+                    if self._is_done(file):
+                        self.__stats["files_skipped"] += 1
+                        continue
+
+                    known_hash = self.__manager.get_source_hash(file["category"], file["source"])
+                    future = executor.submit(bulk_ingestion_worker.extract_file, file["path"], file["category"],
+                                             file["source"], known_hash)
+                    pending[future] = file
+                    return True
+
+                return False
+
+            try:
+                # Se limita el número de archivos en curso para acotar la memoria.
+                while len(pending) < self.__workers * 2 and submit_next():
+                    pass
+
+                while pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+
+                    for future in done:
+                        self._collect(pending.pop(future), future)
+                        submit_next()
+
+                    self._flush()
+
+                    if time.perf_counter() - last_checkpoint >= self.__checkpoint_interval:
+                        self._save_checkpoint()
+                        last_checkpoint = time.perf_counter()
+
+                self._flush(force=True)
+            except KeyboardInterrupt:
+                # Se conserva el avance de los archivos terminados; el resto se reanuda en la siguiente ejecución.
+                interrupted = True
+
+                for future in pending:
+                    future.cancel()
+            finally:
+                self._save_checkpoint()
+
+        if not interrupted:
+            self.__manager.refresh_exact_indexes(sorted(self.__categories))
+
+        elapsed = time.perf_counter() - started_at
+        stats = self.__stats
+        processed = stats["files_done"] + stats["files_unchanged"]
+
+        if stats["chunks_embedded"]:
+            INGESTION_RATE.observe(stats["chunks_embedded"] / elapsed)
+
+        return {**stats,
+                "interrupted": interrupted,
+                "categories": sorted(self.__categories),
+                "seconds": round(elapsed, 3),
+                "embed_seconds": round(stats["embed_seconds"], 3),
+                "store_seconds": round(stats["store_seconds"], 3),
+                "files_per_second": round(processed / elapsed, 3) if elapsed else 0.0,
+                "chunks_per_second": round(stats["chunks_embedded"] / elapsed, 3) if elapsed else 0.0,
+                "failures": list(self.__failures)}
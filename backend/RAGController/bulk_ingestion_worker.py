@@ -0,0 +1,56 @@
+# IMPORTACIÓN DE MÓDULOS
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from RAGController.embeddings_model import EmbeddingsModel
+
+# Funciones de los procesos trabajadores de la ingesta masiva. Solo se usan los métodos estáticos de
+# EmbeddingsModel (lectura de páginas, división e identificadores), por lo que el modelo de incrustaciones
+# nunca se carga en los trabajadores; el grupo de procesos vive toda la ingesta, así que el costo de importar
+# el módulo se paga una sola vez por proceso.
+
+# Lectores de páginas en serie: cada archivo ya ocupa un proceso completo.
+PAGE_READERS = {"pdf": EmbeddingsModel.iter_pdf_pages,
+                "txt": EmbeddingsModel.iter_txt_pages,
+                "docx": EmbeddingsModel.iter_docx_pages}
+
+_text_splitter = None   # Divisor de texto de cada proceso trabajador.
+
+
+def init_worker(chunk_size: int, chunk_overlap: int):
+    """
+    Crea el divisor de texto una sola vez por proceso trabajador, con la misma configuración que el servicio.
+    """
+    global _text_splitter
+    _text_splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+
+
+def extract_file(path: str, category: str, source: str, known_hash=None):
+    """
+    Lee, extrae y divide un archivo.
+
+    Si el hash del contenido es igual a known_hash (el registrado en el manifiesto), no se extrae el texto.
+
+    :return: Diccionario con el hash del archivo, si no cambió, el número de páginas y la lista de pedazos
+    (identificador, texto, metadatos) sin repetidos.
+    """
+    with open(path, "rb") as file:
+        file_content = file.read()
+
+    file_hash = EmbeddingsModel.hash_file(file_content)
+
+    if file_hash == known_hash:
+        return {"hash": file_hash, "unchanged": True, "pages": 0, "chunks": []}
+
+    extension = path.rsplit(".", 1)[-1].lower()
+    pages = list(PAGE_READERS[extension](file_content))
+    chunks, seen_ids = [], set()
+
+    for document in EmbeddingsModel.split_pages(_text_splitter, pages, category, source):
+        chunk_id = EmbeddingsModel.chunk_id(category, source, document.metadata["chunk_hash"])
+
+        if chunk_id in seen_ids:    # Pedazo repetido dentro del mismo documento.
+            continue
+
+        seen_ids.add(chunk_id)
+        chunks.append((chunk_id, document.page_content, document.metadata))
+
+    return {"hash": file_hash, "unchanged": False, "pages": len(pages), "chunks": chunks}
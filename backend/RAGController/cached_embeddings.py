@@ -0,0 +1,87 @@
+# IMPORTACIÓN DE MÓDULOS
+import re
+import unicodedata
+from langchain_core.embeddings import Embeddings
+from RAGController.ttl_lru_cache import TTLLRUCache
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Envoltura del modelo de incrustaciones que almacena en caché los vectores de las consultas.
+
+    Chroma invoca `embed_query` en cada `similarity_search`; cuando los usuarios repiten
+    preguntas, el vector se recupera de la caché y se evita volver a ejecutar el modelo.
+    Las incrustaciones de documentos (`embed_documents`) no se almacenan.
+    """
+
+    def __init__(self, embeddings: Embeddings, model_name: str, max_size=2048, ttl=3600):
+        self.__embeddings = embeddings  # Modelo de incrustaciones real.
+        self.__model_name = model_name  # Nombre del modelo, forma parte de la clave de la caché.
+        self.__cache = TTLLRUCache(max_size=max_size, ttl=ttl)
+
+    @staticmethod
+    def normalize_query(text: str):
+        """
+        Normaliza el texto de la consulta para que variaciones triviales compartan entrada.
+
+        El modelo MiniLM utiliza un tokenizador sin distinción de mayúsculas, por lo que
+        convertir a minúsculas no altera el vector resultante.
+        """
+        text = unicodedata.normalize("NFC", text)
+        return re.sub(r"\s+", " ", text).strip().lower()
+
+    def embed_documents(self, texts):
+        return self.__embeddings.embed_documents(texts)
+
+    def embed_query(self, text):
+        key = (self.__model_name, self.normalize_query(text))
+
+        vector = self.__cache.get(key)
+
+        if vector is None:
+            # Se almacena como tupla para que nadie modifique el vector compartido.
+            vector = tuple(self.__embeddings.embed_query(text))
+            self.__cache.put(key, vector)
+
+        return list(vector)
+
+    def embed_queries(self, texts):
+        """
+        Obtiene las incrustaciones de varias consultas, ejecutando el modelo una sola vez para todas las
+        que no estén en caché. El modelo de incrustaciones no distingue entre consultas y documentos,
+        por lo que las consultas faltantes se procesan en lote con embed_documents.
+        """
+        keys = [(self.__model_name, self.normalize_query(text)) for text in texts]
+        vectors = [self.__cache.get(key) for key in keys]
+
+        # Se agrupan las consultas faltantes (sin repetir) para incrustarlas en un solo lote.
+        missing = {}
+
+        for index, vector in enumerate(vectors):
+            if vector is None:
+                missing.setdefault(keys[index], []).append(index)
+
+        if missing:
+            pending = list(missing)
+            embedded = self.__embeddings.embed_documents([texts[missing[key][0]] for key in pending])
+
+            for key, vector in zip(pending, embedded):
+                vector = tuple(vector)
+                self.__cache.put(key, vector)
+
+                for index in missing[key]:
+                    vectors[index] = vector
+
+        return [list(vector) for vector in vectors]
+
+    def get_cache_stats(self):
+        """
+        Retorna los contadores de aciertos y fallos de la caché de consultas.
+        """
+        return self.__cache.stats()
+
+    def clear_cache(self):
+        """
+        Vacía la caché de consultas.
+        """
+        self.__cache.clear()
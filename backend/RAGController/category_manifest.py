@@ -0,0 +1,140 @@
+# IMPORTACIÓN DE MÓDULOS
+import json
+import os
+import threading
+from datetime import datetime, timezone
+
+
+class CategoryManifest:
+    """
+    Manifiesto persistente con la información de cada entrenamiento (categoría).
+
+    Guarda, por categoría, el número de pedazos almacenados, los documentos de origen con el hash
+    de su contenido y las fechas de creación y actualización. Se lee al iniciar para no recorrer
+    los metadatos de todos los pedazos de la base de datos.
+    """
+
+    VERSION = 1
+
+    def __init__(self, path):
+        self.__path = path  # Ruta del archivo JSON del manifiesto.
+        self.__lock = threading.Lock()
+        self.__categories = {}  # categoría -> información del entrenamiento
+
+        if self.exists():
+            self.load()
+
+    @staticmethod
+    def timestamp():
+        return datetime.now(timezone.utc).isoformat()
+
+    def exists(self):
+        """
+        Indica si el manifiesto ya fue guardado en disco.
+        """
+        return os.path.isfile(self.__path)
+
+    def load(self):
+        """
+        Carga el manifiesto desde disco.
+        """
+        with open(self.__path, "r", encoding="utf-8") as file:
+            data = json.load(file)
+
+        with self.__lock:
+            self.__categories = data.get("categories", {})
+
+    def _save(self):
+        """
+        Guarda el manifiesto de forma atómica. Debe invocarse con el candado adquirido.
+        """
+        temp_path = f"{self.__path}.tmp"
+
+        with open(temp_path, "w", encoding="utf-8") as file:
+            json.dump({"version": self.VERSION, "categories": self.__categories}, file, ensure_ascii=False, indent=2)
+
+        os.replace(temp_path, self.__path)
+
+    def categories(self):
+        """
+        Retorna la lista de categorías registradas.
+        """
+        with self.__lock:
+            return list(self.__categories)
+
+    def get(self, category):
+        """
+        Retorna una copia de la información de una categoría, o None si no está registrada.
+        """
+        with self.__lock:
+            entry = self.__categories.get(category)
+            return json.loads(json.dumps(entry)) if entry is not None else None
+
+    def source_hash(self, category, source):
+        """
+        Retorna el hash del contenido registrado para un documento de una categoría.
+        """
+        with self.__lock:
+            entry = self.__categories.get(category, {})
+            return entry.get("sources", {}).get(source, {}).get("hash")
+
+    def register(self, category):
+        """
+        Registra una categoría nueva sin pedazos.
+        """
+        with self.__lock:
+            now = self.timestamp()
+            self.__categories.setdefault(category, {"chunks": 0, "sources": {}, "created_at": now, "updated_at": now})
+            self._save()
+
+    def record_source(self, category, source, file_hash, chunks_added=0, chunks_removed=0):
+        """
+        Registra la ingesta de un documento y actualiza el número de pedazos de la categoría.
+        """
+        with self.__lock:
+            now = self.timestamp()
+            entry = self.__categories.setdefault(category, {"chunks": 0, "sources": {}, "created_at": now})
+            entry["chunks"] = max(entry.get("chunks", 0) + chunks_added - chunks_removed, 0)
+            entry.setdefault("sources", {})[source] = {"hash": file_hash, "updated_at": now}
+            entry["updated_at"] = now
+            self._save()
+
+    def record_sources(self, category, sources: dict, chunks: int):
+        """
+        Registra varios documentos de una categoría con un solo guardado (ingesta masiva) y fija su número de
+        pedazos.
+
+        :param sources: Diccionario documento -> hash del contenido.
+        """
+        with self.__lock:
+            now = self.timestamp()
+            entry = self.__categories.setdefault(category, {"chunks": 0, "sources": {}, "created_at": now})
+            entry["chunks"] = chunks
+            entry.setdefault("sources", {}).update({source: {"hash": file_hash, "updated_at": now}
+                                                    for source, file_hash in sources.items()})
+            entry["updated_at"] = now
+            self._save()
+
+    def put(self, category, entry: dict):
+        """
+        Reemplaza la información de una categoría (utilizado al importar una instantánea).
+        """
+        with self.__lock:
+            self.__categories[category] = entry
+            self._save()
+
+    def remove(self, category):
+        """
+        Elimina una categoría del manifiesto.
+        """
+        with self.__lock:
+            if self.__categories.pop(category, None) is not None:
+                self._save()
+
+    def replace(self, categories: dict):
+        """
+        Reemplaza por completo el contenido del manifiesto (utilizado al reconstruirlo).
+        """
+        with self.__lock:
+            self.__categories = categories
+            self._save()
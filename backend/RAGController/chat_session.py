@@ -1,13 +1,123 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from RAGController.model_manager import ModelManager
-from RAGController.chroma_db_manager import ChromaDBManager
+from RAGController.answer_cache import SemanticAnswerCache
+from RAGController.ingestion_jobs import IngestionJobManager, SharedIngestionQueue
+from RAGController.lazy_component import LazyComponent
+from RAGController.request_coalescer import RequestCoalescer
+from RAGController.shared_state import SharedState
+from RAGController.generation_scheduler import GenerationScheduler, QueueFullError
+from RAGController.context_assembler import ContextAssembler, estimate_tokens, parse_budgets
+from RAGController.metrics import (REGISTRY, CACHE_ENTRIES, CACHE_HIT_RATE, CHAT_REQUESTS, CONTEXT_TOKENS,
+                                   LLM_ACTIVE_GENERATIONS, LLM_QUEUE_LENGTH, PROMPT_TOKENS, PROMPT_TOKENS_SAVED,
+                                   STAGE_SECONDS, STREAMS_IN_FLIGHT, TIME_TO_FIRST_TOKEN, TOKENS_PER_SECOND,
+                                   log_timings, observe_stage)
 
 
 class ChatSession:
     """Maneja la interacción con el modelo seleccionado."""
 
-    def __init__(self):
-        self._model_manager = ModelManager()
-        self.db_manager = ChromaDBManager()
+    # Indicaciones para cada nivel de respuesta del modelo.
+    LEVELS = ["Responde de manera breve y directa.",
+              "Responde de manera normal y sin detallar demasiado.",
+              "Responde de manera profunda y extensa."]
+
+    # Segundos máximos que una petición espera su turno de generación.
+    QUEUE_TIMEOUT = float(os.getenv("OLLAMA_QUEUE_TIMEOUT", "120"))
+
+    # Segundos máximos que se espera a que el escritor elimine un entrenamiento (con estado compartido).
+    DELETE_TIMEOUT = 60.0
+
+    def __init__(self, shared_state_path=os.getenv("SHARED_STATE_PATH", "")):
+        # Con varios procesos trabajadores, la configuración de las sesiones, el registro de entrenamientos y la
+        # cola de ingesta se comparten en SQLite y solo el proceso con el turno de escritor modifica los índices.
+        self._shared_state = SharedState(shared_state_path) if shared_state_path else None
+        self._model_manager = ModelManager(shared_state=self._shared_state)
+        # La base de datos y el modelo de incrustaciones se cargan hasta que se necesitan o durante el calentamiento.
+        self._db_component = LazyComponent("vector_db", self._create_db_manager)
+        self._warmup_status = {"state": LazyComponent.PENDING, "error": None, "load_seconds": None}
+        # Caché de respuestas del llm para consultas semánticamente similares.
+        self._answer_cache = SemanticAnswerCache()
+        # Generaciones en curso compartidas por las peticiones con la misma pregunta.
+        self._coalescer = RequestCoalescer()
+        # Cola de trabajos de ingesta procesados en segundo plano (compartida y atendida por el escritor si hay
+        # estado compartido).
+        if self._shared_state is not None:
+            self._ingestion_jobs = SharedIngestionQueue(self._shared_state, self._run_ingestion)
+            self._shared_state.start_writer_election(on_acquired=self._ingestion_jobs.recover)
+            self._ingestion_jobs.start()
+        else:
+            self._ingestion_jobs = IngestionJobManager()
+        # Hilos para la recuperación (incrustación y búsqueda) del camino asíncrono del chat.
+        self._retrieval_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="retrieval")
+        # Armado del contexto con presupuesto de tokens por modelo ("modelo=tokens,..." en CONTEXT_TOKEN_BUDGETS).
+        self._context_assembler = ContextAssembler(
+            default_budget=int(os.getenv("CONTEXT_TOKEN_BUDGET", "1500")),
+            budgets=parse_budgets(os.getenv("CONTEXT_TOKEN_BUDGETS", "")),
+            min_similarity=float(os.getenv("CONTEXT_MIN_SIMILARITY", "0.3")))
+        REGISTRY.add_collector(self._collect_metrics)
+
+    def _create_db_manager(self):
+        # Importación diferida: este módulo carga torch, langchain, PyMuPDF y Chroma.
+        from RAGController.chroma_db_manager import ChromaDBManager
+        db_manager = ChromaDBManager(shared_state=self._shared_state)
+        # Las respuestas en caché de los entrenamientos modificados por el escritor dejan de ser válidas.
+        db_manager.add_registry_listener(lambda categories: [self._answer_cache.invalidate(category)
+                                                             for category in categories])
+        return db_manager
+
+    @property
+    def db_manager(self):
+        """
+        Gestor de la base de datos vectorial; se construye en el primer uso.
+        """
+        return self._db_component.get()
+
+    # Calentamiento en segundo plano
+    def start_warmup(self):
+        """
+        Método que inicia en segundo plano la carga del modelo de incrustaciones y de los índices, para que el
+        servidor pueda atender peticiones mientras tanto.
+        """
+        threading.Thread(target=self._warm_up, name="warmup", daemon=True).start()
+
+    def _warm_up(self):
+        started_at = time.perf_counter()
+        self._warmup_status["state"] = LazyComponent.LOADING
+
+        try:
+            self.db_manager.warm_up()
+            self._warmup_status.update(state=LazyComponent.READY, error=None)
+        except Exception as error:
+            print(f">>> Error durante el calentamiento: {error}.")
+            self._warmup_status.update(state=LazyComponent.FAILED, error=str(error))
+        finally:
+            self._warmup_status["load_seconds"] = time.perf_counter() - started_at
+
+    # Disponibilidad de los componentes
+    def get_readiness(self):
+        """
+        Método que retorna si el servicio está listo y el estado de cada componente.
+        """
+        components = {"vector_db": self._db_component.status(),
+                      "warmup": dict(self._warmup_status),
+                      "ollama": self._model_manager.get_ollama_status()}
+
+        ready = all(component["state"] == LazyComponent.READY for component in components.values())
+
+        return ready, components
+
+    # Métricas
+    @staticmethod
+    def get_metrics():
+        """
+        Método que retorna las métricas del servicio en el formato de texto de Prometheus.
+        """
+        return REGISTRY.render()
 
     # Obtener lista de modelos disponibles.
     def get_available_models(self):
@@ -28,6 +138,27 @@ class ChatSession:
 
         return True, model
 
+    def get_model_load_status(self, model):
+        """
+        Método que retorna el estado de carga del modelo en Ollama (no cargado, cargando, cargado o fallido).
+        """
+        return self._model_manager.get_model_load_status(model)
+
+    # Historial de la conversación
+    def get_conversation(self):
+        """
+        Método que retorna el historial de la conversación de la sesión: los turnos conservados y el resumen de
+        las preguntas de los turnos descartados.
+        """
+        return True, self._model_manager.get_conversation().to_dict()
+
+    def clear_conversation(self):
+        """
+        Método que elimina el historial de la conversación; la siguiente pregunta inicia una conversación nueva.
+        """
+        self._model_manager.get_conversation().clear()
+        return True, "Se eliminó el historial de la conversación."
+
     # Cambiar Modelo
     def change_model(self, index: int):
         """
@@ -77,37 +208,169 @@ class ChatSession:
         self._model_manager.set_level(level)
         return True, f"Se cambió el nivel de respuesta del modelo."
 
+    # Obtener el modo de recuperación del RAG.
+    def get_retrieval_mode(self):
+        return True, self._model_manager.get_retrieval_mode()
+
+    # Cambiar el modo de recuperación del RAG.
+    def change_retrieval_mode(self, mode: str):
+        if mode not in self.db_manager.RETRIEVAL_MODES:
+            return False, f"El modo de recuperación {mode} no es válido."
+
+        self._model_manager.set_retrieval_mode(mode)
+        return True, f"Se cambió el modo de recuperación del RAG a {mode}."
+
     # Crear colección
-    def create_collection(self, file_content: bytes, file_extension: str, category):
+    def create_collection(self, file_content: bytes, file_extension: str, category, source="", progress=None):
         """
         Método que permite la creación de una nueva colección (entrenamiento) en la base de datos.
         """
-        return self.db_manager.create_collection(file_content=file_content,
-                                                 file_extension=file_extension,
-                                                 category=category)
+        status, response = self.db_manager.create_collection(file_content=file_content,
+                                                             file_extension=file_extension,
+                                                             category=category,
+                                                             source=source,
+                                                             progress=progress)
+        if status:
+            self._answer_cache.invalidate(category)
+
+        return status, response
 
     # Borrar Colección
     def delete_collection(self, category):
         """
-        Método que permite eliminar una colección (entrenamiento) de la base de datos.
+        Método que permite eliminar una colección (entrenamiento) de la base de datos. Con estado compartido, la
+        eliminación se delega al proceso escritor y se espera su resultado.
         """
-        return self.db_manager.delete_collection(category=category)
+        if self._shared_state is None:
+            return self._delete_collection(category)
+
+        status, job = self._ingestion_jobs.submit("delete", category, "")
+
+        if not status:
+            return False, job
+
+        job = self._ingestion_jobs.wait(job.id, timeout=self.DELETE_TIMEOUT)
+
+        if job is None:
+            return False, "La eliminación del entrenamiento sigue en proceso, consulta la lista de trabajos."
+
+        return job.state == job.COMPLETED, job.message or job.error
+
+    def _delete_collection(self, category):
+        status, response = self.db_manager.delete_collection(category=category)
+
+        if status:
+            self._answer_cache.invalidate(category)
+
+        return status, response
 
     # Actualizar Colección
-    def update_collection(self, file_content: bytes, file_extension: str, category):
+    def update_collection(self, file_content: bytes, file_extension: str, category, source="", progress=None):
         """
         Método que permite actualizar una colección (entrenamiento) de la base de datos.
         """
-        return self.db_manager.update_collection(file_content=file_content,
-                                                 file_extension=file_extension,
-                                                 category=category)
+        status, response = self.db_manager.update_collection(file_content=file_content,
+                                                             file_extension=file_extension,
+                                                             category=category,
+                                                             source=source,
+                                                             progress=progress)
+        if status:
+            self._answer_cache.invalidate(category)
+
+        return status, response
+
+    # Crear colección en segundo plano
+    def submit_create_collection(self, file_content: bytes, file_extension: str, category, source=""):
+        """
+        Método que registra un trabajo de ingesta para crear una colección y retorna de inmediato.
+        """
+        if category in self.db_manager.get_collections():
+            return False, f"El nombre del entrenamiento {category} ya está registrado."
+
+        return self._submit_ingestion("create", category, source, file_extension, file_content)
+
+    # Actualizar colección en segundo plano
+    def submit_update_collection(self, file_content: bytes, file_extension: str, category, source=""):
+        """
+        Método que registra un trabajo de ingesta para actualizar una colección y retorna de inmediato.
+        """
+        if category not in self.db_manager.get_collections():
+            return False, f"El entrenamiento no está registrado."
+
+        return self._submit_ingestion("update", category, source, file_extension, file_content)
+
+    def _run_ingestion(self, kind, category, source, file_extension, file_content, progress=None):
+        """
+        Ejecuta un trabajo de ingesta (en este proceso, o en el escritor si hay estado compartido).
+        """
+        if kind == "create":
+            return self.create_collection(file_content, file_extension, category, source=source, progress=progress)
+
+        if kind == "update":
+            return self.update_collection(file_content, file_extension, category, source=source, progress=progress)
+
+        return self._delete_collection(category)
+
+    def _submit_ingestion(self, kind, category, source, file_extension, file_content):
+        if self._shared_state is not None:
+            status, job = self._ingestion_jobs.submit(kind, category, source, file_extension, file_content)
+        else:
+            status, job = self._ingestion_jobs.submit(kind, category, source, partial(
+                self._run_ingestion, kind, category, source, file_extension, file_content))
+
+        if not status:
+            return False, job
+
+        return True, job.to_dict()
+
+    # Consultar trabajos de ingesta
+    def get_ingestion_jobs(self):
+        """
+        Método que retorna el estado de los trabajos de ingesta conocidos.
+        """
+        return [job.to_dict() for job in self._ingestion_jobs.list()]
+
+    def get_ingestion_job(self, job_id):
+        """
+        Método que retorna el estado de un trabajo de ingesta.
+        """
+        job = self._ingestion_jobs.get(job_id)
+
+        if job is None:
+            return False, "El trabajo no existe."
+
+        return True, job.to_dict()
+
+    # Cancelar trabajo de ingesta
+    def cancel_ingestion_job(self, job_id):
+        """
+        Método que solicita la cancelación de un trabajo de ingesta.
+        """
+        return self._ingestion_jobs.cancel(job_id)
 
     # Consultar Colección
-    def query_collection(self, query, category):
+    def query_collection(self, query, category, mode=None):
         """
         Método para consultar una colección (entrenamiento) de la base de datos.
+
+        En los modos léxico e híbrido se retornan también la posición de cada pedazo y los tiempos por etapa.
         """
-        return self.db_manager.db_query(query=query, category=category, k=self._model_manager.get_k())
+        mode = mode or self._model_manager.get_retrieval_mode()
+
+        if mode == "vector":
+            return self.db_manager.db_query(query=query, category=category, k=self._model_manager.get_k())
+
+        return self.db_manager.db_query_hybrid(query=query, category=category, k=self._model_manager.get_k(),
+                                               mode=mode)
+
+    # Consultar colecciones por lote
+    def query_collection_batch(self, queries, k=None):
+        """
+        Método para consultar varias preguntas, de uno o varios entrenamientos, en una sola operación.
+
+        :param queries: Lista de tuplas (pregunta, entrenamiento).
+        """
+        return self.db_manager.db_query_batch(queries=queries, k=k or self._model_manager.get_k())
 
     # Validar configuración del chat
     def validate_model_settings(self):
@@ -127,40 +390,513 @@ class ChatSession:
 
         return True, "Todo está listo para consultar el llm."
 
+    # Control de admisión
+    def check_admission(self, query, priority=None):
+        """
+        Método que indica si una pregunta puede atenderse o si debe rechazarse porque la cola de generación
+        del modelo está llena. Las preguntas que se unirán a una generación en curso siempre se admiten.
+
+        :return: Tupla (True, None) o (False, QueueFullError con los segundos para reintentar).
+        """
+        scope = (self._model_manager.get_selected_model(), self._model_manager.get_selected_category(),
+                 self._model_manager.get_k(), self._model_manager.get_level(),
+                 self._model_manager.get_retrieval_mode())
+
+        history = self._model_manager.get_conversation().digest()
+
+        if self._coalescer.is_inflight(RequestCoalescer.make_key(*scope, history, query)):
+            return True, None
+
+        retry_after = self._model_manager.scheduler.admission(scope[0])
+
+        if retry_after is None:
+            return True, None
+
+        CHAT_REQUESTS.inc(outcome="rejected")
+        return False, QueueFullError(retry_after)
+
+    def get_shared_state_status(self):
+        """
+        Método que retorna el estado compartido entre procesos trabajadores: base de datos, proceso escritor y
+        versiones de los temas.
+        """
+        if self._shared_state is None:
+            return False, "El estado compartido no está habilitado (SHARED_STATE_PATH)."
+
+        return True, self._shared_state.stats()
+
+    def get_scheduler_status(self):
+        """
+        Método que retorna el estado de la cola de generación: turnos en uso por servidor y peticiones en espera.
+        """
+        return True, self._model_manager.scheduler.stats()
+
+    def _acquire_lease(self, model, priority, timings):
+        """
+        Espera un turno de generación para el modelo (bloquea el hilo).
+
+        :raises QueueFullError: Si la cola está llena o no se obtuvo el turno a tiempo.
+        """
+        scheduler = self._model_manager.scheduler
+        ticket = scheduler.submit(model, priority)
+
+        with observe_stage("llm_queue", timings):
+            granted = ticket.wait(self.QUEUE_TIMEOUT)
+
+        if not granted:
+            ticket.cancel()
+            scheduler.record_timeout()
+            raise QueueFullError(scheduler.retry_after(model))
+
+        timings["ollama_endpoint"] = ticket.lease.endpoint.name
+        return ticket.lease
+
+    # Mensajes enviados al modelo de Ollama
+    def _build_messages(self, query, rag_response, level, conversation=None):
+        """
+        Método que construye la lista de mensajes para el modelo a partir de la consulta, la información del RAG
+        y el historial de la conversación.
+
+        El orden de los mensajes mantiene un prefijo estable entre turnos para que Ollama reutilice su caché:
+        primero las instrucciones, luego los turnos anteriores (guardados sin su información del RAG) y al
+        final la pregunta seguida de la información recuperada para ella.
+        """
+        system = f"""Eres un asistente virtual de Grupo Fórmula. {self.LEVELS[level]}
+Con base a un sistema de generación aumentada de recuperación obtendrás información relevante para responder a la pregunta,
+sin embargo, debes tomar en cuenta que no toda la información proporcionada es relevante."""
+        summary, history = conversation.snapshot() if conversation is not None else ("", [])
+
+        if summary:
+            system += f"\n\nPreguntas anteriores de la conversación: {summary}"
+
+        return [
+            {'role': 'system', 'content': system},
+            *history,
+            {'role': 'user', 'content': f"{query}\n\nInformación recuperada:\n{rag_response}"}
+        ]
+
+    @staticmethod
+    def _retrieval_query(conversation, query):
+        """
+        Método que retorna el texto con el que se buscan los pedazos: en una pregunta de seguimiento se agrega
+        la pregunta anterior, ya que por sí sola suele no tener contexto ("¿y cuánto cuesta?").
+        """
+        last_question = conversation.last_question()
+        return f"{last_question} {query}" if last_question else query
+
     # Chat con el modelo de Ollama activo en stream
-    def query_ollama_model(self, query):
+    def query_ollama_model(self, query, priority=GenerationScheduler.INTERACTIVE):
         """
         Método para consultar el modelo de ollama.
+
+        Si una consulta similar ya fue respondida con la misma configuración (modelo, entrenamiento, k y nivel),
+        se reproduce la respuesta almacenada en lugar de generar una nueva; si una pregunta idéntica se está
+        respondiendo, la petición se une a esa generación. Cada generación espera su turno en el planificador
+        (con la prioridad indicada).
         """
+        started_at = time.perf_counter()
+        timings = {}
+        outcome = "cancelled"   # Si el cliente cierra la conexión antes de terminar.
+        scope = (self._model_manager.get_selected_model(), self._model_manager.get_selected_category(),
+                 self._model_manager.get_k(), self._model_manager.get_level(),
+                 self._model_manager.get_retrieval_mode())
+        model, category, k, level, mode = scope
+        conversation = self._model_manager.get_conversation()
+        # Las respuestas solo se comparten entre peticiones con el mismo historial: una pregunta de seguimiento
+        # depende de los turnos anteriores.
+        cache_scope = (*scope, conversation.digest())
+        flight_key = RequestCoalescer.make_key(*cache_scope, query)
+        flight = lease = None
+        STREAMS_IN_FLIGHT.inc()
+
+        try:
+            query_vector = cached_answer = cache_version = None
+            flight = self._coalescer.join(flight_key)
 
-        rag_response = "\n".join(self.db_manager.db_query(query, self._model_manager.get_selected_category(),
-                                                            self._model_manager.get_k())[1])
+            if flight is None:
+                with observe_stage("query_embedding", timings):
+                    query_vector = self.db_manager.embed_query(query)
 
-        print(rag_response)
-        print(self._model_manager.get_level())
+                with observe_stage("answer_cache_lookup", timings):
+                    cache_version = self._answer_cache.version(category)
+                    cached_answer = self._answer_cache.lookup(cache_scope, query_vector)
 
-        try:
+            if cached_answer is not None:
+                for position, piece in enumerate(self._answer_cache.replay(cached_answer)):
+                    if not position:
+                        self._record_first_token(started_at, timings)
 
-            levels = ["Responde de manera breve y directa.",
-                      "Responde de manera normal y sin detallar demasiado.",
-                      "Responde de manera profunda y extensa."]
+                    yield piece
 
-            response = self._model_manager.ollama_instance.client.chat(
-                model=self._model_manager.get_selected_model(),
-                messages=[
-                    {'role': 'system',
-                     'content': f'Eres un asistente virtual de Grupo Fórmula. {levels[self._model_manager.get_level()]}'},
-                    {'role': 'user', 'content': f"""
-Con base a un sistema de generación aumentada de recuperación obtendrás información relevante para responder a la pregunta,
-sin embargo, debes tomar en cuenta que no toda la información proporcionada es relevante:
+                conversation.add_turn(query, cached_answer)
+                outcome = "cached"
+                return
+
+            try:
+                started = flight is None
+
+                if started:
+                    with observe_stage("retrieval", timings):
+                        status, documents = self.db_manager.db_query_scored(
+                            self._retrieval_query(conversation, query), category, k, mode=mode)
+
+                    with observe_stage("prompt_build", timings):
+                        context = self._pack_context(documents if status else [], model, timings)
+                        messages = self._build_messages(query, context.text, level, conversation)
+
+                    lease = self._acquire_lease(model, priority, timings)
+                    generate = partial(self._generate, lease, messages, cache_scope, query_vector, cache_version)
+
+                    if query_vector is not None:
+                        flight, started = self._coalescer.join_or_start(flight_key, generate)
+                        # La generación compartida libera el turno al terminar.
+                        lease = lease if not started else None
+
+                requested_at = time.perf_counter()
+                response = flight.stream() if flight is not None else generate()
+                answer = []
+                first_token_at = None
+                last_chunk = None
+
+                for chunk in response:
+                    content = chunk['message']['content']
+
+                    if content and first_token_at is None:
+                        first_token_at = self._record_first_token(started_at, timings, requested_at)
 
-{rag_response}"""},
-                    {'role': 'user', 'content': query}
+                    answer.append(content)
+                    last_chunk = chunk
+                    yield content
+
+                timings["history_turns_dropped"] = conversation.add_turn(query, "".join(answer))
+                self._record_generation(first_token_at, last_chunk, len(answer), timings)
+
+                # Los tokens del prompt se registran una sola vez por generación.
+                if started:
+                    self._record_prompt_reuse(messages, last_chunk, timings)
+
+                outcome = "generated" if started else "coalesced"
+            except QueueFullError as e:
+                outcome = "rejected"
+                print(f">>> Pregunta rechazada: {e}")
+            except Exception as e:
+                outcome = "error"
+                print(f"❌ Error al consultar el modelo: {e}")
+        finally:
+            if flight is not None:
+                self._coalescer.leave(flight)
+
+            if lease is not None:
+                lease.release()
+
+            self._finish_chat(started_at, outcome, scope, timings)
+
+    def _generate(self, lease, messages, scope, query_vector, cache_version):
+        """
+        Generador con los fragmentos de Ollama, en el servidor del turno concedido; si la respuesta se genera
+        por completo, se almacena en la caché. El turno se libera al terminar.
+        """
+        try:
+            response = lease.endpoint.client.chat(model=lease.model, messages=messages, stream=True,
+                                                  keep_alive=self._model_manager.get_keep_alive(lease.model))
+            answer = []
 
-                ],
-                stream=True
-            )
             for chunk in response:
-                yield chunk['message']['content']
-        except Exception as e:
-            print(f"❌ Error al consultar el modelo: {e}")
+                answer.append(chunk['message']['content'])
+                yield chunk
+
+            if query_vector is not None:
+                self._answer_cache.store(scope, query_vector, "".join(answer), version=cache_version)
+        finally:
+            lease.release()
+
+    async def _agenerate(self, lease, messages, scope, query_vector, cache_version):
+        """
+        Generador asíncrono con los fragmentos de Ollama, en el servidor del turno concedido; si la respuesta se
+        genera por completo, se almacena en la caché. El turno se libera al terminar.
+        """
+        try:
+            response = await lease.endpoint.async_client.chat(
+                model=lease.model, messages=messages, stream=True,
+                keep_alive=self._model_manager.get_keep_alive(lease.model))
+            answer = []
+
+            async for chunk in response:
+                answer.append(chunk['message']['content'])
+                yield chunk
+
+            if query_vector is not None:
+                self._answer_cache.store(scope, query_vector, "".join(answer), version=cache_version)
+        finally:
+            lease.release()
+
+    # Chat asíncrono con el modelo de Ollama activo en stream
+    async def astream_ollama_model(self, query, priority=GenerationScheduler.INTERACTIVE):
+        """
+        Método asíncrono para consultar el modelo de ollama.
+
+        La recuperación (incrustación y búsqueda) se ejecuta en un grupo de hilos y la generación utiliza
+        el cliente asíncrono de Ollama, por lo que cada flujo abierto no ocupa un hilo. Si una pregunta idéntica
+        se está respondiendo, la petición se une a esa generación. Mientras espera su turno de generación se
+        envía su posición en la cola.
+
+        :return: Generador asíncrono de tuplas (evento, datos), donde el evento es "start", "queued", "token",
+        "done" o "error".
+        """
+        loop = asyncio.get_running_loop()
+        started_at = time.perf_counter()
+        timings = {}
+        outcome = "cancelled"   # Si el cliente cierra la conexión antes de terminar.
+
+        model, category, k, level, mode = scope = (self._model_manager.get_selected_model(),
+                                                   self._model_manager.get_selected_category(),
+                                                   self._model_manager.get_k(),
+                                                   self._model_manager.get_level(),
+                                                   self._model_manager.get_retrieval_mode())
+        conversation = self._model_manager.get_conversation()
+        # Las respuestas solo se comparten entre peticiones con el mismo historial: una pregunta de seguimiento
+        # depende de los turnos anteriores.
+        cache_scope = (*scope, conversation.digest())
+        flight_key = RequestCoalescer.make_key(*cache_scope, query)
+        flight = ticket = None
+        STREAMS_IN_FLIGHT.inc()
+
+        try:
+            query_vector = cached_answer = cache_version = None
+            flight = self._coalescer.join(flight_key)
+
+            if flight is None:
+                with observe_stage("query_embedding", timings):
+                    query_vector = await loop.run_in_executor(self._retrieval_executor,
+                                                              self.db_manager.embed_query, query)
+
+                with observe_stage("answer_cache_lookup", timings):
+                    cache_version = self._answer_cache.version(category)
+                    cached_answer = self._answer_cache.lookup(cache_scope, query_vector)
+
+            if cached_answer is not None:
+                yield "start", {"cached": True, "retrieval_ms": self._elapsed_ms(started_at)}
+
+                for position, piece in enumerate(self._answer_cache.replay(cached_answer)):
+                    if not position:
+                        self._record_first_token(started_at, timings)
+
+                    yield "token", {"content": piece}
+
+                conversation.add_turn(query, cached_answer)
+                outcome = "cached"
+                yield "done", {"cached": True, "total_ms": self._elapsed_ms(started_at)}
+                return
+
+            started = flight is None
+            context = None
+
+            if started:
+                with observe_stage("retrieval", timings):
+                    status, documents = await loop.run_in_executor(self._retrieval_executor,
+                                                                   self.db_manager.db_query_scored,
+                                                                   self._retrieval_query(conversation, query),
+                                                                   category, k, mode)
+
+                with observe_stage("prompt_build", timings):
+                    context = self._pack_context(documents if status else [], model, timings)
+                    messages = self._build_messages(query, context.text, level, conversation)
+
+            retrieval_ms = self._elapsed_ms(started_at)
+
+            yield "start", {"cached": False, "coalesced": not started, "retrieval_ms": retrieval_ms}
+
+            try:
+                if started:
+                    scheduler = self._model_manager.scheduler
+                    ticket = scheduler.submit(model, priority)
+
+                    with observe_stage("llm_queue", timings):
+                        deadline = time.monotonic() + self.QUEUE_TIMEOUT
+                        position = ticket.position()
+
+                        if position:
+                            yield "queued", {"position": position}
+
+                        while not await ticket.await_grant(timeout=1):
+                            if time.monotonic() > deadline:
+                                scheduler.record_timeout()
+                                raise QueueFullError(scheduler.retry_after(model))
+
+                            if ticket.position() != position:
+                                position = ticket.position()
+                                yield "queued", {"position": position}
+
+                    timings["ollama_endpoint"] = ticket.lease.endpoint.name
+                    generate = partial(self._agenerate, ticket.lease, messages, cache_scope, query_vector,
+                                       cache_version)
+
+                    if query_vector is not None:
+                        flight, started = self._coalescer.ajoin_or_start(flight_key, generate)
+                        # La generación compartida libera el turno al terminar.
+                        ticket = ticket if not started else None
+
+                requested_at = time.perf_counter()
+                response = flight.astream() if flight is not None else generate()
+
+                answer = []
+                first_token_at = None
+                last_chunk = None
+
+                async for chunk in response:
+                    content = chunk['message']['content']
+
+                    if content and first_token_at is None:
+                        first_token_at = self._record_first_token(started_at, timings, requested_at)
+
+                    answer.append(content)
+                    last_chunk = chunk
+                    yield "token", {"content": content}
+
+                timings["history_turns_dropped"] = conversation.add_turn(query, "".join(answer))
+                tokens_per_second = self._record_generation(first_token_at, last_chunk, len(answer), timings)
+
+                # Los tokens del prompt se registran una sola vez por generación.
+                if started:
+                    self._record_prompt_reuse(messages, last_chunk, timings)
+
+                outcome = "generated" if started else "coalesced"
+
+                yield "done", {"cached": False,
+                               "coalesced": not started,
+                               "retrieval_ms": retrieval_ms,
+                               "context": context.to_dict() if context is not None else None,
+                               "time_to_first_token_ms": timings.get("time_to_first_token_ms"),
+                               "total_ms": self._elapsed_ms(started_at),
+                               "prompt_eval_count": last_chunk.get('prompt_eval_count') if last_chunk else None,
+                               "prompt_eval_tokens_saved": timings.get("prompt_eval_tokens_saved"),
+                               "eval_count": last_chunk.get('eval_count') if last_chunk else None,
+                               "tokens_per_second": tokens_per_second}
+
+            except QueueFullError as e:
+                outcome = "rejected"
+                yield "error", {"message": str(e), "retry_after": e.retry_after}
+            except Exception as e:
+                outcome = "error"
+                print(f"❌ Error al consultar el modelo: {e}")
+                yield "error", {"message": "Ocurrió un error inesperado al consultar el modelo."}
+        finally:
+            if flight is not None:
+                self._coalescer.leave(flight)
+
+            # Retira el lugar de la cola o libera el turno si no se entregó a una generación.
+            if ticket is not None:
+                ticket.cancel()
+
+            self._finish_chat(started_at, outcome, scope, timings)
+
+    def _pack_context(self, documents, model, timings):
+        """
+        Arma el contexto del RAG dentro del presupuesto de tokens del modelo y registra cuántos se usaron.
+        """
+        context = self._context_assembler.assemble(documents, model)
+        CONTEXT_TOKENS.observe(context.tokens)
+        timings["context"] = context.to_dict()
+        return context
+
+    @staticmethod
+    def _record_first_token(started_at, timings, requested_at=None):
+        """
+        Registra el tiempo al primer fragmento de la respuesta y, si se generó, la latencia de Ollama.
+        """
+        first_token_at = time.perf_counter()
+        TIME_TO_FIRST_TOKEN.observe(first_token_at - started_at)
+        timings["time_to_first_token_ms"] = round((first_token_at - started_at) * 1000, 3)
+
+        if requested_at is not None:
+            STAGE_SECONDS.observe(first_token_at - requested_at, stage="llm_first_token")
+            timings["llm_first_token_ms"] = round((first_token_at - requested_at) * 1000, 3)
+
+        return first_token_at
+
+    @staticmethod
+    def _record_generation(first_token_at, last_chunk, chunks, timings):
+        """
+        Registra la duración de la generación y su velocidad. Se usan los contadores que Ollama reporta en su
+        último fragmento y, si no están, el número de fragmentos recibidos.
+
+        :return: Tokens por segundo, o None si no se generó texto.
+        """
+        if first_token_at is None:
+            return None
+
+        generation_seconds = time.perf_counter() - first_token_at
+        STAGE_SECONDS.observe(generation_seconds, stage="llm_generation")
+        timings["llm_generation_ms"] = round(generation_seconds * 1000, 3)
+
+        eval_count = last_chunk.get('eval_count') if last_chunk else None
+        eval_duration = last_chunk.get('eval_duration') if last_chunk else None
+
+        if eval_count and eval_duration:
+            tokens_per_second = eval_count / (eval_duration / 1e9)
+        elif chunks > 1 and generation_seconds:
+            tokens_per_second = (chunks - 1) / generation_seconds
+        else:
+            return None
+
+        TOKENS_PER_SECOND.observe(tokens_per_second)
+        timings["tokens_per_second"] = round(tokens_per_second, 3)
+        return tokens_per_second
+
+    @staticmethod
+    def _record_prompt_reuse(messages, last_chunk, timings):
+        """
+        Registra cuántos tokens del prompt no tuvo que evaluar Ollama por reutilizar el prefijo en su caché.
+
+        Ollama reporta en prompt_eval_count solo los tokens que evaluó; la diferencia con el tamaño estimado
+        del prompt es lo que se ahorró.
+        """
+        prompt_tokens = sum(estimate_tokens(message['content']) for message in messages)
+        timings["prompt_tokens_estimated"] = prompt_tokens
+        timings["prompt_prefix_tokens_estimated"] = prompt_tokens - estimate_tokens(messages[-1]['content'])
+        evaluated = last_chunk.get('prompt_eval_count') if last_chunk else None
+
+        if evaluated is None:
+            return
+
+        saved = max(0, prompt_tokens - evaluated)
+        PROMPT_TOKENS.inc(evaluated, kind="evaluated")
+        PROMPT_TOKENS.inc(saved, kind="saved")
+        PROMPT_TOKENS_SAVED.observe(saved)
+        timings["prompt_eval_count"] = evaluated
+        timings["prompt_eval_tokens_saved"] = saved
+
+    @staticmethod
+    def _finish_chat(started_at, outcome, scope, timings):
+        STREAMS_IN_FLIGHT.dec()
+        CHAT_REQUESTS.inc(outcome=outcome)
+        STAGE_SECONDS.observe(time.perf_counter() - started_at, stage="chat_total")
+        model, category, k, level, mode = scope
+        log_timings("chat", outcome=outcome, model=model, category=category, k=k, level=level, mode=mode,
+                    total_ms=round((time.perf_counter() - started_at) * 1000, 3), **timings)
+
+    def _collect_metrics(self):
+        """
+        Actualiza las métricas de las cachés antes de exportarlas.
+        """
+        scheduler_stats = self._model_manager.scheduler.stats()
+
+        for priority, queued in scheduler_stats["queue"].items():
+            LLM_QUEUE_LENGTH.set(queued, priority=priority)
+
+        for endpoint in self._model_manager.scheduler.get_endpoints():
+            LLM_ACTIVE_GENERATIONS.set(sum(scheduler_stats["endpoints"].get(endpoint, {}).values()),
+                                       endpoint=endpoint)
+
+        answer_stats = self._answer_cache.stats()
+        CACHE_HIT_RATE.set(answer_stats["hit_rate"], cache="answer")
+        CACHE_ENTRIES.set(answer_stats["entries"], cache="answer")
+
+        if self._db_component.is_ready():
+            query_stats = self.db_manager.get_query_cache_stats()
+            CACHE_HIT_RATE.set(query_stats["hit_rate"], cache="query_embedding")
+            CACHE_ENTRIES.set(query_stats["size"], cache="query_embedding")
+
+    @staticmethod
+    def _elapsed_ms(started_at):
+        return (time.perf_counter() - started_at) * 1000
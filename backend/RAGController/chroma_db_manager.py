@@ -1,62 +1,506 @@
 # IMPORTACIÓN DE MÓDULOS
+import hashlib
+import json
 import os
+import threading
+import time
+import chromadb
 from langchain_chroma import Chroma
-from langchain.chains import ConversationalRetrievalChain
 from RAGController.embeddings_model import EmbeddingsModel
+from RAGController.embedding_backends import REFERENCE_BACKEND
+from RAGController.category_manifest import CategoryManifest
+from RAGController.collection_snapshot import CollectionSnapshot, SnapshotError
+from RAGController.ingestion_jobs import IngestionCancelled
+from RAGController.bm25_index import BM25Index, BM25IndexStore
+from RAGController.exact_index import ExactIndexStore
+from RAGController.read_write_lock import ReadWriteLock
+from RAGController.metrics import CHUNKS_INGESTED, INGESTION_RATE, STAGE_SECONDS, observe_stage
 
 
 class ChromaDBManager(EmbeddingsModel):
+    """
+    Gestiona la base de datos vectorial manteniendo una colección física de Chroma por cada
+    entrenamiento (categoría), de modo que las búsquedas no requieren filtrar por metadatos
+    y eliminar un entrenamiento equivale a eliminar su colección.
+    """
 
-    def __init__(self, db_name="db", db_dir=r".\knowledge-base"):
+    # Nombre de la colección compartida utilizada por versiones anteriores (valor por defecto de langchain).
+    LEGACY_COLLECTION_NAME = "langchain"
+
+    # Modos de recuperación: búsqueda vectorial, léxica (BM25) o híbrida (fusión de ambas).
+    RETRIEVAL_MODES = ("vector", "lexical", "hybrid")
+
+    # Constante de la fusión por rango recíproco (RRF).
+    RRF_K = 60
+
+    # Motores de búsqueda vectorial: HNSW de Chroma, búsqueda exacta sobre la matriz mapeada en memoria, o
+    # automático (exacta para los entrenamientos con hasta exact_max_chunks pedazos).
+    VECTOR_ENGINES = ("auto", "chroma", "exact")
+
+    def __init__(self, db_name="db", db_dir=r".\knowledge-base", batch_size=64,
+                 vector_engine=os.getenv("VECTOR_ENGINE", "auto"),
+                 exact_max_chunks=int(os.getenv("EXACT_SEARCH_MAX_CHUNKS", "20000")),
+                 exact_dtype=os.getenv("EXACT_SEARCH_DTYPE", "float16"),
+                 exact_retain_seconds=int(os.getenv("EXACT_INDEX_RETAIN_SECONDS", "300")), shared_state=None):
         super().__init__()
         self.__db_name = db_name    # Nombre de la base de datos
         self.__db_dir = db_dir  # Ubicación de la base de datos
+        self.__batch_size = batch_size  # Cantidad de pedazos que se incrustan y almacenan por lote
         # Se asegura la existencia de la carpeta que contiene a la bd
         os.makedirs(self.__db_dir, exist_ok=True)
         # Se obtiene la ruta a la base de datos
         self.__db_path = os.path.join(self.__db_dir, self.__db_name)
         # Se inicializa la conexión a la base de datos
-        self.__db = Chroma(persist_directory=self.__db_path, embedding_function=self._embeddings)
+        self.__client = chromadb.PersistentClient(path=self.__db_path)
+        # Las consultas usan el cliente con el candado de lectura; al recargar el registro, el cliente se
+        # reemplaza con el de escritura, de modo que ninguna consulta lo usa mientras se cierra.
+        self.__client_lock = ReadWriteLock()
+        self.__handles = {}     # Caché de conexiones a las colecciones: categoría -> Chroma
+        self.__handles_lock = threading.Lock()
+        self.__busy_categories = set()  # Entrenamientos con una escritura en curso
+        self.__busy_lock = threading.Lock()
+        # Índices léxicos (BM25) por entrenamiento, guardados junto a la base de datos.
+        self.__lexical = BM25IndexStore(os.path.join(self.__db_dir, f"{self.__db_name}_bm25"))
+        # Índices de búsqueda exacta por entrenamiento, derivados de su colección de Chroma tras cada escritura.
+        self.__exact = ExactIndexStore(os.path.join(self.__db_dir, f"{self.__db_name}_exact"), dtype=exact_dtype,
+                                       retain_seconds=exact_retain_seconds)
+        self.__vector_engine = vector_engine if vector_engine in self.VECTOR_ENGINES else "auto"
+        self.__exact_max_chunks = exact_max_chunks
+        # Estado compartido entre procesos trabajadores: solo el proceso con el turno de escritor modifica los
+        # índices y los demás recargan el registro de entrenamientos cuando este cambia.
+        self.__shared_state = shared_state
+        self.__registry_listeners = []  # Funciones llamadas con los entrenamientos modificados por otro proceso.
+        # Se migra la colección compartida de versiones anteriores, en caso de existir.
+        if self.LEGACY_COLLECTION_NAME in self._collection_names() and self.may_write():
+            self.migrate_shared_collection()
+        # Se carga el manifiesto de entrenamientos; si no existe, se reconstruye a partir de las colecciones.
+        self.__manifest = CategoryManifest(os.path.join(self.__db_dir, f"{self.__db_name}_manifest.json"))
+        if not self.__manifest.exists() and self.may_write():
+            self.rebuild_manifest()
+        # Antes de usar un motor de incrustaciones alternativo sobre un índice existente, se verifica su paridad.
+        if self.__manifest.categories():
+            self._verify_backend_for_index()
         self.__collections = self.load_categories()  # Lista con el nombre de las colecciones disponibles.
+        if shared_state is not None:
+            shared_state.subscribe("registry", self._reload_registry)
+
+    @staticmethod
+    def collection_name(category):
+        """
+        Obtiene el nombre de la colección física de una categoría.
+
+        Chroma solo admite nombres cortos y alfanuméricos, por lo que se usa un hash de la categoría;
+        el nombre original se guarda en los metadatos de la colección.
+        """
+        return f"category-{hashlib.sha256(category.encode('utf-8')).hexdigest()[:32]}"
+
+    def _collection_names(self):
+        """
+        Retorna los nombres de las colecciones físicas existentes en la base de datos.
+        """
+        # Dependiendo de la versión, Chroma retorna nombres u objetos de colección.
+        return [c if isinstance(c, str) else c.name for c in self.__client.list_collections()]
+
+    def _get_collection(self, category):
+        """
+        Retorna la conexión (reutilizada) a la colección de una categoría, creándola si no existe.
+        """
+        with self.__handles_lock:
+            handle = self.__handles.get(category)
+
+            if handle is None:
+                handle = Chroma(client=self.__client,
+                                collection_name=self.collection_name(category),
+                                embedding_function=self._embeddings,
+                                collection_metadata={"category": category})
+                self.__handles[category] = handle
+
+            return handle
+
+    def _drop_collection(self, category):
+        """
+        Elimina la colección física de una categoría, su conexión en caché y su índice léxico.
+        """
+        with self.__handles_lock:
+            self.__handles.pop(category, None)
+
+        self.__lexical.drop(self.collection_name(category))
+        self.__exact.drop(self.collection_name(category))
+
+        if self.collection_name(category) in self._collection_names():
+            self.__client.delete_collection(self.collection_name(category))
+
+    def may_write(self):
+        """
+        Indica si este proceso puede modificar los índices (siempre, salvo con estado compartido sin el turno de
+        escritor).
+        """
+        return self.__shared_state is None or self.__shared_state.is_writer()
+
+    def add_registry_listener(self, listener):
+        """
+        Registra una función que recibe la lista de entrenamientos modificados por otro proceso.
+        """
+        self.__registry_listeners.append(listener)
+
+    def _announce_registry_change(self):
+        """
+        Avisa a los demás procesos que el registro de entrenamientos cambió. Se llama al terminar cada escritura,
+        después de actualizar el manifiesto y el índice exacto, para que al recargar ya encuentren los índices
+        nuevos.
+        """
+        if self.__shared_state is None:
+            return
 
-    def create_collection(self, file_content: bytes, file_extension: str, category):
+        try:
+            self.__shared_state.notify("registry")
+        except Exception as error:
+            print(f">>> Error al avisar el cambio de los entrenamientos: {error}.")
+
+    def _reload_registry(self):
+        """
+        Vuelve a leer el manifiesto después de que otro proceso lo modificó y descarta las copias en memoria de
+        los entrenamientos que cambiaron (conexiones, índices léxicos y, si alguno usa el índice HNSW, el
+        cliente de Chroma, que conserva sus segmentos en memoria).
+        """
+        if not self.__manifest.exists():
+            return
+
+        previous = {category: (self.__manifest.get(category) or {}).get("updated_at")
+                    for category in self.__manifest.categories()}
+        self.__manifest.load()
+        current = {category: (self.__manifest.get(category) or {}).get("updated_at")
+                   for category in self.__manifest.categories()}
+        changed = sorted(category for category in previous.keys() | current.keys()
+                         if previous.get(category) != current.get(category))
+
+        if not changed:
+            return
+
+        self.__collections = list(current)
+        reset_client = any(self.get_vector_engine(category) == "chroma" for category in changed)
+
+        if reset_client:
+            with self.__client_lock.write(), self.__handles_lock:
+                self.__client.clear_system_cache()
+                self.__client = chromadb.PersistentClient(path=self.__db_path)
+                self.__handles.clear()
+
+        with self.__handles_lock:
+            for category in changed:
+                self.__handles.pop(category, None)
+
+        for category in changed:
+            self.__lexical.invalidate(self.collection_name(category))
+
+        for listener in self.__registry_listeners:
+            listener(changed)
+
+    def _verify_backend_for_index(self):
+        """
+        Verifica (una sola vez por motor) que el motor de incrustaciones sea compatible con los vectores ya
+        almacenados. El resultado se guarda junto a la base de datos para no repetir la comparación.
+        """
+        path = os.path.join(self.__db_dir, f"{self.__db_name}_embedding_parity.json")
+        key = {"model": self.get_embeddings_model_name(), "backend": self.get_embedding_backend()}
+
+        if os.path.isfile(path):
+            with open(path, "r", encoding="utf-8") as file:
+                verified = json.load(file)
+
+            if key in verified:
+                return
+
+        else:
+            verified = []
+
+        try:
+            accepted, min_similarity = self.verify_embedding_backend()
+        except Exception as error:
+            # Sin verificación no se usa el motor sobre el índice existente, igual que si no coincidiera.
+            print(f">>> Error al verificar el motor de incrustaciones: {error}. Se usará {REFERENCE_BACKEND}.")
+            self.use_reference_backend()
+            return
+
+        print(f">>> Paridad del motor {key['backend']}: similitud mínima {min_similarity:.4f}.")
+
+        if accepted:
+            verified.append(key)
+
+            with open(path, "w", encoding="utf-8") as file:
+                json.dump(verified, file, indent=2)
+
+    def _get_lexical_index(self, category, batch_size=1000):
+        """
+        Retorna el índice léxico de una categoría. Si no existe (por ejemplo, en entrenamientos creados
+        antes de contar con él), el proceso escritor lo construye a partir de los pedazos almacenados y lo
+        guarda; mientras tanto, los demás procesos obtienen un índice vacío.
+        """
+        name = self.collection_name(category)
+        index = self.__lexical.load(name)
+
+        if index is not None:
+            return index
+
+        if not self.may_write():
+            return BM25Index()
+
+        # Se construye en un índice local que solo se publica completo, para que las consultas simultáneas
+        # no obtengan resultados parciales; el candado evita construirlo dos veces.
+        with self.__lexical.build_lock(name):
+            index = self.__lexical.load(name)
+
+            if index is not None:
+                return index
+
+            index = BM25Index()
+            offset = 0
+
+            with self.__client_lock.read():
+                collection = self.__client.get_collection(name)
+
+                while True:
+                    rows = collection.get(limit=batch_size, offset=offset, include=["documents"])
+
+                    if not rows["ids"]:
+                        break
+
+                    for chunk_id, document in zip(rows["ids"], rows["documents"]):
+                        index.add(chunk_id, document)
+
+                    offset += len(rows["ids"])
+
+            self.__lexical.publish(name, index)
+            self.__lexical.save(name)
+
+        return index
+
+    def get_vector_engine(self, category):
+        """
+        Retorna el motor de búsqueda vectorial de un entrenamiento: "exact" o "chroma".
+        """
+        if self.__vector_engine != "auto":
+            return self.__vector_engine
+
+        entry = self.__manifest.get(category) or {}
+        return "exact" if entry.get("chunks", 0) <= self.__exact_max_chunks else "chroma"
+
+    def _exact_index_is_current(self, category, header=None):
+        """
+        Indica si el índice exacto de un entrenamiento corresponde a su última escritura y al modelo de
+        incrustaciones actual.
+
+        :param header: Encabezado del índice ya cargado (se lee del disco si no se proporciona).
+        """
+        header = header if header is not None else self.__exact.info(self.collection_name(category))
+        entry = self.__manifest.get(category) or {}
+
+        return header is not None and header["model"] == self.get_embeddings_model_name() \
+            and header["source_version"] == entry.get("updated_at")
+
+    def _refresh_exact_index(self, category, batch_size=1000):
+        """
+        Reconstruye el índice exacto de un entrenamiento a partir de su colección de Chroma, o lo elimina si el
+        entrenamiento usa el índice HNSW de Chroma.
+
+        Un error al reconstruirlo no afecta a la escritura que lo originó (los pedazos ya están en Chroma): se
+        registra y el índice anterior deja de usarse por no corresponder a la última escritura.
+
+        :return: Número de pedazos del índice.
+        """
+        name = self.collection_name(category)
+
+        try:
+            if self.get_vector_engine(category) != "exact":
+                self.__exact.drop(name)
+                return 0
+
+            with observe_stage("exact_index_build"):
+                count = self.__exact.write(name, self._iter_chunk_batches(category, batch_size),
+                                           self.get_embeddings_model_name(),
+                                           source_version=(self.__manifest.get(category) or {}).get("updated_at"))
+
+            if not count:
+                self.__exact.drop(name)
+
+            return count
+
+        except Exception as error:
+            print(f">>> Error al reconstruir el índice exacto de {category}: {error}.")
+            return 0
+
+    def _iter_chunk_batches(self, category, batch_size=1000):
+        """
+        Recorre por lotes los pedazos almacenados de un entrenamiento.
+
+        :return: Generador de tuplas (identificadores, incrustaciones, textos, metadatos).
+        """
+        collection = self.__client.get_collection(self.collection_name(category))
+        offset = 0
+
+        while True:
+            rows = collection.get(limit=batch_size, offset=offset, include=["embeddings", "documents", "metadatas"])
+
+            if not len(rows["ids"]):
+                break
+
+            yield rows["ids"], rows["embeddings"], rows["documents"], rows["metadatas"]
+            offset += len(rows["ids"])
+
+    def _vector_search(self, category, query_vectors, k):
+        """
+        Busca los k pedazos más cercanos a cada vector, con el índice exacto del entrenamiento si lo tiene o con
+        el índice HNSW de Chroma.
+
+        :return: Resultado en el formato de la consulta de Chroma (ids, documentos, metadatos y distancias por
+        consulta).
+        """
+        index = None
+
+        if self.get_vector_engine(category) == "exact":
+            index = self.__exact.get(self.collection_name(category))
+
+        # Sin índice vigente (aún no se construye, falló su reconstrucción o cambió el modelo) se consulta Chroma.
+        if index is None or not self._exact_index_is_current(category, index.header):
+            with self.__client_lock.read():
+                return self.__client.get_collection(self.collection_name(category)).query(
+                    query_embeddings=query_vectors, n_results=k, include=["documents", "metadatas", "distances"])
+
+        return index.query(query_vectors, k)
+
+    def migrate_shared_collection(self, batch_size=1000):
+        """
+        Separa la colección compartida de versiones anteriores en una colección por categoría,
+        con base en el metadato "category". Se reutilizan las incrustaciones almacenadas, por lo que
+        no se vuelve a ejecutar el modelo. Al finalizar se elimina la colección compartida.
+
+        :return: Número de pedazos migrados.
+        """
+        legacy = self.__client.get_collection(self.LEGACY_COLLECTION_NAME)
+        migrated = 0
+        offset = 0
+
+        while True:
+            rows = legacy.get(limit=batch_size, offset=offset, include=["documents", "metadatas", "embeddings"])
+
+            if not rows["ids"]:
+                break
+
+            # Se agrupan los pedazos del lote por categoría.
+            groups = {}
+
+            for index, metadata in enumerate(rows["metadatas"]):
+                if metadata and "category" in metadata:
+                    groups.setdefault(metadata["category"], []).append(index)
+
+            for category, indexes in groups.items():
+                target = self.__client.get_or_create_collection(self.collection_name(category),
+                                                                 metadata={"category": category})
+                # Se usa upsert para que la migración pueda repetirse si se interrumpe.
+                target.upsert(ids=[rows["ids"][i] for i in indexes],
+                              embeddings=[rows["embeddings"][i] for i in indexes],
+                              documents=[rows["documents"][i] for i in indexes],
+                              metadatas=[rows["metadatas"][i] for i in indexes])
+                migrated += len(indexes)
+
+            offset += len(rows["ids"])
+
+        self.__client.delete_collection(self.LEGACY_COLLECTION_NAME)
+        print(f">>> Se migraron {migrated} pedazos a colecciones por entrenamiento.")
+
+        return migrated
+
+    def _acquire_category(self, category):
+        """
+        Marca un entrenamiento como ocupado para evitar escrituras simultáneas sobre él.
+
+        :return: False si el entrenamiento ya tiene una escritura en curso.
+        """
+        with self.__busy_lock:
+            if category in self.__busy_categories:
+                return False
+
+            self.__busy_categories.add(category)
+            return True
+
+    def _release_category(self, category):
+        with self.__busy_lock:
+            self.__busy_categories.discard(category)
+
+    def create_collection(self, file_content: bytes, file_extension: str, category, source="", progress=None):
+        if not self._acquire_category(category):
+            return False, f"El entrenamiento {category} se está procesando, intenta más tarde."
+
+        try:
+            return self._create_collection(file_content, file_extension, category, source, progress)
+        finally:
+            self._release_category(category)
+            self._announce_registry_change()
+
+    def _create_collection(self, file_content: bytes, file_extension: str, category, source, progress):
         try:
             # Si el nombre de la colección ya existe
             if category in self.__collections:
                 return False, f"El nombre del entrenamiento {category} ya está registrado."
 
-            # Se procesa el documento.
-            text = self.process_document(file_content, file_extension)
-            print(text)
-            if not text:    # Si no se obtuvo el texto del documento.
+            # Se obtiene el generador de páginas del documento.
+            pages = self.iter_document_pages(file_content, file_extension)
+
+            if pages is None:   # Si el formato del documento no es compatible.
                 return False, f"No se logró procesar el documento proporcionado."
 
-            # Se obtienen pedazos del texto procesado con los metadatos asignados.
-            documents = self.create_embedding(text=text, category=category)
+            def register_category():
+                self.__manifest.register(category)
+                self.__collections.append(category)
 
-            if not documents:   # Si no se obtuvieron los pedazos con metadatos.
-                return False, f"No se lograron asignar los datos al entrenamiento correspondiente."
+            # Se incrustan y almacenan los pedazos por lotes; la categoría se registra con el primer lote.
+            stored, _, _ = self._ingest_pages(self._get_collection(category), pages, category, source,
+                                              on_first_batch=register_category, progress=progress)
 
-            # Se agrega el texto dividido como incrustaciones a la base de datos.
-            self.__db.add_documents(documents)
-            # Se agrega el nombre a las colecciones existentes.
-            self.__collections.append(category)
+            if not stored:  # Si no se obtuvieron pedazos del documento.
+                self._drop_collection(category)
+                return False, f"No se logró procesar el documento proporcionado."
+
+            self.__lexical.save(self.collection_name(category))
+            self.__manifest.record_source(category, source, self.hash_file(file_content), chunks_added=stored)
+            self._refresh_exact_index(category)
 
             return True, f"Se ha creado el entrenamiento {category}."
 
+        except IngestionCancelled:
+            # Se descarta lo almacenado hasta el momento.
+            self._drop_collection(category)
+
+            if category in self.__collections:
+                self.__collections.remove(category)
+
+            self.__manifest.remove(category)
+            return False, f"Se canceló la creación del entrenamiento {category}."
+
         except Exception as error:
             print(f">>> Error al crear una colección: {error}.")
             return False, "Ocurrió un error inesperado al crear el entrenamiento."
 
     def delete_collection(self, category):
+        if not self._acquire_category(category):
+            return False, f"El entrenamiento {category} se está procesando, intenta más tarde."
+
+        try:
+            return self._delete_collection(category)
+        finally:
+            self._release_category(category)
+            self._announce_registry_change()
+
+    def _delete_collection(self, category):
         try:
             if not category in self.__collections:  # Si la colección no existe.
                 return False, f"El entrenamiento no está registrado."
 
-            # Se eliminan los documentos con los metadatos correspondientes.
-            self.__db.delete(where={"category": category})
-            # Se elimina el nombre del colección de la lista de colecciones.
+            # Se elimina la colección física del entrenamiento.
+            self._drop_collection(category)
+            # Se elimina el nombre del colección de la lista de colecciones y del manifiesto.
             self.__collections.remove(category)
+            self.__manifest.remove(category)
 
             return True, f"Se eliminó el entrenamiento {category}."
 
@@ -64,67 +508,703 @@ class ChromaDBManager(EmbeddingsModel):
             print(f"Error al eliminar la colección: {error}.")
             return False, f"Ocurrió un error inesperado al borrar el entrenamiento."
 
-    def update_collection(self, file_content: bytes, file_extension: str, category):
+    def update_collection(self, file_content: bytes, file_extension: str, category, source="", progress=None):
+        """
+        Actualiza de forma incremental los pedazos de un documento dentro de un entrenamiento.
+
+        Solo se incrustan los pedazos cuyo contenido no estaba almacenado y se eliminan los pedazos
+        del mismo documento que ya no aparecen en la nueva versión.
+        """
+        if not self._acquire_category(category):
+            return False, f"El entrenamiento {category} se está procesando, intenta más tarde."
+
+        try:
+            return self._update_collection(file_content, file_extension, category, source, progress)
+        finally:
+            self._release_category(category)
+            self._announce_registry_change()
+
+    def _update_collection(self, file_content: bytes, file_extension: str, category, source, progress):
         try:
             if not category in self.__collections:  # Si la colección no existe.
                 return False, f"El entrenamiento no está registrado."
 
-            # Se procesa el documento.
-            text = self.process_document(file_content, file_extension)
+            # Si el documento es idéntico al registrado, no hay nada que actualizar.
+            file_hash = self.hash_file(file_content)
 
-            if not text:  # Si no se obtuvo el texto del documento.
+            if self.__manifest.source_hash(category, source) == file_hash:
+                return True, f"El entrenamiento {category} ya contiene esta versión del documento."
+
+            # Se obtiene el generador de páginas del documento.
+            pages = self.iter_document_pages(file_content, file_extension)
+
+            if pages is None:  # Si el formato del documento no es compatible.
                 return False, f"No se logró procesar el documento proporcionado."
 
-            # Se obtienen pedazos del texto procesado con los metadatos asignados.
-            documents = self.create_embedding(text=text, category=category)
+            db = self._get_collection(category)
+            # Se asegura que el índice léxico contenga los pedazos existentes antes de modificarlo.
+            lexical_index = self._get_lexical_index(category)
+
+            # Se obtienen los identificadores de los pedazos almacenados del mismo documento.
+            existing_ids = set(db.get(where={"source": source}, include=[])["ids"])
+
+            # Se incrustan y almacenan por lotes únicamente los pedazos nuevos.
+            added, unchanged, seen_ids = self._ingest_pages(db, pages, category, source, existing_ids=existing_ids,
+                                                            progress=progress)
+
+            if not added and not unchanged:  # Si no se obtuvieron pedazos del documento.
+                return False, f"No se logró procesar el documento proporcionado."
+
+            # Se eliminan los pedazos que desaparecieron del documento.
+            removed_ids = list(existing_ids - seen_ids)
+
+            for batch in self.iter_batches(removed_ids, self.__batch_size):
+                removed = db.get(ids=batch, include=["documents"])
+
+                for chunk_id, document in zip(removed["ids"], removed["documents"]):
+                    lexical_index.remove(chunk_id, document)
+
+                db.delete(ids=batch)
+
+            self.__lexical.save(self.collection_name(category))
 
-            if not documents:  # Si no se obtuvieron los pedazos con metadatos.
-                return False, f"No se lograron asignar los datos al entrenamiento correspondiente."
+            self.__manifest.record_source(category, source, file_hash,
+                                          chunks_added=added, chunks_removed=len(removed_ids))
+            self._refresh_exact_index(category)
 
-            # Se agrega el texto dividido como incrustaciones a la base de datos.
-            self.__db.add_documents(documents)
+            return True, (f"Se ha actualizado el entrenamiento {category}: {added} pedazos nuevos, "
+                          f"{len(removed_ids)} eliminados y {unchanged} sin cambios.")
 
-            return True, f"Se ha actualizado el entrenamiento {category}."
+        except IngestionCancelled:
+            # Los pedazos agregados se conservan; al no registrar el hash, la siguiente actualización los reutiliza.
+            self.__lexical.save(self.collection_name(category))
+            return False, f"Se canceló la actualización del entrenamiento {category}."
 
         except Exception as error:
             print(f"Error al actualizar la colección: {error}.")
             return False, f"Ocurrió un error inesperado al actualizar el entrenamiento."
 
-    def load_categories(self):
+    def _ingest_pages(self, db, pages, category, source, existing_ids=frozenset(), on_first_batch=None, progress=None):
+        """
+        Divide, incrusta y almacena un documento por lotes de tamaño fijo, de modo que la memoria
+        utilizada no depende del tamaño del archivo y el progreso parcial queda guardado en la base de datos.
+
+        Los pedazos cuyo identificador ya existe o que se repiten dentro del documento no se vuelven a incrustar.
+        Si se proporciona un IngestionProgress, se reporta el avance y se verifica la cancelación entre lotes.
+
+        :return: Tupla (pedazos agregados, pedazos sin cambios, identificadores vistos en el documento).
+        """
+        seen_ids = set()
+        unchanged = 0
+
+        def counted_pages():
+            for page in pages:
+                yield page
+
+                if progress:
+                    progress.add_pages()
+
+        def new_chunks():
+            nonlocal unchanged
+
+            for document in self.iter_chunks(counted_pages(), category, source):
+                chunk_id = self.chunk_id(category, source, document.metadata["chunk_hash"])
+
+                if chunk_id in seen_ids:    # Pedazo repetido dentro del mismo documento.
+                    continue
+
+                seen_ids.add(chunk_id)
+
+                if chunk_id in existing_ids:    # Pedazo ya almacenado.
+                    unchanged += 1
+                    continue
+
+                yield chunk_id, document
+
+        lexical_index = self.__lexical.get(self.collection_name(category))
+        added = 0
+        started_at = time.perf_counter()
+
+        for batch in self.iter_batches(new_chunks(), self.__batch_size):
+            if progress:
+                progress.check_cancelled()
+
+            with observe_stage("ingest_embed_store"):
+                db.add_documents([document for _, document in batch], ids=[chunk_id for chunk_id, _ in batch])
+
+            for chunk_id, document in batch:
+                lexical_index.add(chunk_id, document.page_content)
+
+            if not added and on_first_batch:
+                on_first_batch()
+
+            added += len(batch)
+            CHUNKS_INGESTED.inc(len(batch))
+
+            if progress:
+                progress.add_chunks(len(batch))
+
+        if added:
+            INGESTION_RATE.observe(added / (time.perf_counter() - started_at))
+
+        return added, unchanged, seen_ids
+
+    def get_source_hash(self, category, source):
+        """
+        Retorna el hash registrado de un documento de un entrenamiento, o None si no se ha ingerido.
+        """
+        return self.__manifest.source_hash(category, source)
+
+    def _get_raw_collection(self, category):
+        """
+        Retorna la colección de Chroma de una categoría (sin la envoltura de langchain), creándola y
+        registrando la categoría si no existe.
+        """
+        collection = self.__client.get_or_create_collection(self.collection_name(category),
+                                                            metadata={"category": category})
+
+        if category not in self.__collections:
+            self.__manifest.register(category)
+            self.__collections.append(category)
+
+        return collection
+
+    def missing_chunk_ids(self, category, chunk_ids):
+        """
+        Retorna los identificadores que aún no están almacenados en la colección de una categoría.
+        """
+        if not chunk_ids or category not in self.__collections:
+            return set(chunk_ids)
+
+        stored = self._get_raw_collection(category).get(ids=list(chunk_ids), include=[])["ids"]
+        return set(chunk_ids) - set(stored)
+
+    def store_chunks(self, category, chunks, embeddings):
+        """
+        Almacena pedazos ya divididos e incrustados fuera de este objeto (ingesta masiva) y los agrega al
+        índice léxico.
+
+        :param chunks: Lista de tuplas (identificador, texto, metadatos).
+        :param embeddings: Incrustaciones de los pedazos, en el mismo orden.
+        """
+        collection = self._get_raw_collection(category)
+
+        with observe_stage("ingest_embed_store"):
+            for start in range(0, len(chunks), self.__batch_size):
+                batch = chunks[start:start + self.__batch_size]
+                collection.upsert(ids=[chunk_id for chunk_id, _, _ in batch],
+                                  embeddings=embeddings[start:start + self.__batch_size],
+                                  documents=[text for _, text, _ in batch],
+                                  metadatas=[metadata for _, _, metadata in batch])
+
+        self.index_chunks(category, chunks)
+        CHUNKS_INGESTED.inc(len(chunks))
+
+    def index_chunks(self, category, chunks):
+        """
+        Agrega al índice léxico pedazos que ya están en la colección (por ejemplo, almacenados por una ingesta
+        interrumpida antes de guardar el índice). Los identificadores ya indexados se ignoran.
+        """
+        lexical_index = self._get_lexical_index(category)
+
+        for chunk_id, text, _ in chunks:
+            lexical_index.add(chunk_id, text)
+
+    def complete_sources(self, category, sources: dict):
+        """
+        Cierra la ingesta masiva de varios documentos de una categoría: elimina los pedazos de cada documento
+        que ya no aparecen en su versión nueva, guarda el índice léxico y registra los documentos en el
+        manifiesto con un solo guardado.
+
+        :param sources: Diccionario documento -> (hash del contenido, identificadores de sus pedazos).
+        :return: Número de pedazos eliminados.
+        """
+        collection = self._get_raw_collection(category)
+        lexical_index = self._get_lexical_index(category)
+        removed_count = 0
+
+        for source, (_, seen_ids) in sources.items():
+            removed_ids = [chunk_id for chunk_id in collection.get(where={"source": source}, include=[])["ids"]
+                           if chunk_id not in seen_ids]
+
+            for batch in self.iter_batches(removed_ids, self.__batch_size):
+                removed = collection.get(ids=batch, include=["documents"])
+
+                for chunk_id, document in zip(removed["ids"], removed["documents"]):
+                    lexical_index.remove(chunk_id, document)
+
+                collection.delete(ids=batch)
+
+            removed_count += len(removed_ids)
+
+        self.__lexical.save(self.collection_name(category))
+        self.__manifest.record_sources(category, {source: file_hash for source, (file_hash, _) in sources.items()},
+                                       chunks=collection.count())
+        return removed_count
+
+    def refresh_exact_indexes(self, categories):
+        """
+        Reconstruye los índices exactos de los entrenamientos indicados (al terminar una ingesta masiva).
+        """
+        for category in categories:
+            self._refresh_exact_index(category)
+
+        self._announce_registry_change()
+
+    def export_snapshot(self, path, categories=None, batch_size=1000):
+        """
+        Exporta entrenamientos (todos por defecto) a una instantánea compacta: vectores float16, textos,
+        metadatos y un manifiesto con el modelo, el motor y la dimensión de las incrustaciones y el hash de cada
+        archivo.
+
+        :return: Tupla (estado, mensaje).
+        """
+        categories = list(categories or self.__collections)
+        unknown = [category for category in categories if category not in self.__collections]
+
+        if unknown:
+            return False, f"Los entrenamientos {', '.join(unknown)} no están registrados."
+
+        acquired = []
+
         try:
-            # Se obtienen todos los documentos de la base de datos.
-            all_docs = self.__db.get(include=['metadatas'])
+            # Se evita que los entrenamientos se modifiquen mientras se exportan.
+            for category in categories:
+                if not self._acquire_category(category):
+                    return False, f"El entrenamiento {category} se está procesando, intenta más tarde."
 
-            categories = set()
+                acquired.append(category)
 
-            # Se filtran los resultados con base a sus metadatos.
-            for metadata in all_docs['metadatas']:
-                if metadata and "category" in metadata:
-                    categories.add(metadata["category"])
+            started_at = time.perf_counter()
+            counts = CollectionSnapshot(path).write(
+                self.get_embeddings_model_name(), self.get_embedding_backend(), self.get_embedding_dim(),
+                ((category, self.__manifest.get(category), self._iter_chunk_batches(category, batch_size))
+                 for category in categories))
+            STAGE_SECONDS.observe(time.perf_counter() - started_at, stage="snapshot_export")
 
-            return list(categories)
+            return True, (f"Se exportaron {len(counts)} entrenamientos ({sum(counts.values())} pedazos) en "
+                          f"{time.perf_counter() - started_at:.1f} s.")
+
+        except Exception as error:
+            print(f">>> Error al exportar la instantánea: {error}.")
+            return False, "Ocurrió un error inesperado al exportar los entrenamientos."
+
+        finally:
+            for category in acquired:
+                self._release_category(category)
+
+    def import_snapshot(self, path, categories=None, overwrite=False):
+        """
+        Importa los entrenamientos de una instantánea sin ejecutar el modelo de incrustaciones.
+
+        Se rechazan las instantáneas creadas con otro modelo, motor o dimensión de incrustaciones, o cuyo contenido
+        no coincide con su manifiesto. Los entrenamientos ya registrados solo se reemplazan con overwrite; un
+        entrenamiento que falla al importarse conserva su contenido anterior y no impide importar los demás.
+
+        :return: Tupla (estado, mensaje); el estado es falso si algún entrenamiento no se pudo importar.
+        """
+        snapshot = CollectionSnapshot(path)
+
+        try:
+            manifest = snapshot.read_manifest()
+            categories = list(categories or manifest["categories"])
+            unknown = [category for category in categories if category not in manifest["categories"]]
+
+            if unknown:
+                return False, f"La instantánea no contiene los entrenamientos {', '.join(unknown)}."
+
+            if manifest["model"] != self.get_embeddings_model_name():
+                return False, (f"La instantánea se creó con el modelo {manifest['model']} y este nodo usa "
+                               f"{self.get_embeddings_model_name()}; es necesario volver a incrustar.")
+
+            if manifest["backend"] != self.get_embedding_backend():
+                return False, (f"La instantánea se creó con el motor de incrustaciones {manifest['backend']} y este "
+                               f"nodo usa {self.get_embedding_backend()}; es necesario volver a incrustar.")
+
+            dims = {manifest["dim"]} | {manifest["categories"][category]["dim"] for category in categories
+                                        if manifest["categories"][category]["count"]}
+
+            if dims != {self.get_embedding_dim()}:
+                return False, (f"Las incrustaciones de la instantánea tienen dimensión {manifest['dim']} y las de "
+                               f"este nodo {self.get_embedding_dim()}.")
+
+            snapshot.verify(manifest, categories)
+        except SnapshotError as error:
+            return False, str(error)
+
+        started_at = time.perf_counter()
+        imported, skipped, failed = [], [], []
+
+        for category in categories:
+            if (category in self.__collections and not overwrite) or not self._acquire_category(category):
+                skipped.append(category)
+                continue
+
+            try:
+                self._import_category(snapshot, manifest, category)
+                imported.append(category)
+
+            except Exception as error:
+                print(f">>> Error al importar el entrenamiento {category}: {error}.")
+                failed.append(category)
+
+            finally:
+                self._release_category(category)
+                self._announce_registry_change()
+
+        STAGE_SECONDS.observe(time.perf_counter() - started_at, stage="snapshot_import")
+        message = f"Se importaron {len(imported)} entrenamientos en {time.perf_counter() - started_at:.1f} s."
+
+        if skipped:
+            message += f" Se omitieron los ya registrados o en proceso: {', '.join(skipped)}."
+
+        if failed:
+            message += f" No se pudieron importar (conservan su contenido anterior): {', '.join(failed)}."
+
+        return not failed, message
+
+    def _import_category(self, snapshot, manifest, category):
+        """
+        Reemplaza un entrenamiento con su contenido en la instantánea: colección, índice léxico, manifiesto e
+        índice exacto.
+
+        Los pedazos se escriben en una colección temporal y un índice léxico local; el entrenamiento anterior solo
+        se reemplaza cuando la instantánea se leyó por completo, de modo que un error no lo deja vacío ni a medias.
+        """
+        name = self.collection_name(category)
+        staging_name = f"{name}-import"
+
+        # Se descarta la colección temporal de una importación anterior interrumpida.
+        if staging_name in self._collection_names():
+            self.__client.delete_collection(staging_name)
+
+        staging = self.__client.create_collection(staging_name, metadata={"category": category})
+        lexical_index = BM25Index()
+
+        try:
+            for ids, embeddings, documents, metadatas in snapshot.iter_batches(manifest, category):
+                for start in range(0, len(ids), self.__batch_size):
+                    end = start + self.__batch_size
+                    staging.upsert(ids=ids[start:end], embeddings=embeddings[start:end],
+                                   documents=documents[start:end], metadatas=metadatas[start:end])
+
+                for chunk_id, document in zip(ids, documents):
+                    lexical_index.add(chunk_id, document)
+        except Exception:
+            self.__client.delete_collection(staging_name)
+            raise
+
+        # La colección temporal toma el lugar del entrenamiento anterior.
+        self._drop_collection(category)
+        staging.modify(name=name)
+        collection = self.__client.get_collection(name)
+        self.__lexical.publish(name, lexical_index)
+        self.__lexical.save(name)
+        # Se conservan los hashes de los documentos para que las actualizaciones posteriores sean incrementales.
+        entry = manifest["categories"][category]["entry"] or {"sources": {}}
+        now = CategoryManifest.timestamp()
+        self.__manifest.put(category, {**entry, "chunks": collection.count(),
+                                       "created_at": entry.get("created_at", now), "updated_at": now})
+
+        if category not in self.__collections:
+            self.__collections.append(category)
+
+        self._refresh_exact_index(category)
+
+    def warm_up(self):
+        """
+        Ejecuta una incrustación de prueba y carga en memoria el índice vectorial (HNSW o exacto) y el índice
+        léxico de cada entrenamiento, para que la primera consulta real no pague ese costo. Los índices exactos
+        que no correspondan a la última escritura del entrenamiento se reconstruyen.
+        """
+        # Se usa embed_documents para no guardar la consulta de prueba en la caché.
+        vector = self._embeddings.embed_documents(["calentamiento"])[0]
+
+        for category in list(self.__collections):
+            if self.get_vector_engine(category) == "exact" and not self._exact_index_is_current(category) \
+                    and self.may_write():
+                self._refresh_exact_index(category)
+
+            self._vector_search(category, [vector], 1)
+            self._get_lexical_index(category)
+
+    def rebuild_manifest(self, batch_size=1000):
+        """
+        Reconstruye el manifiesto de entrenamientos recorriendo las colecciones de la base de datos.
+
+        Se utiliza para recuperación; los hashes de los documentos no pueden recuperarse, por lo que
+        la siguiente actualización de cada documento se procesa por completo.
+
+        :return: Número de entrenamientos encontrados.
+        """
+        now = CategoryManifest.timestamp()
+        categories = {}
+
+        for name in self._collection_names():
+            collection = self.__client.get_collection(name)
+
+            if not collection.metadata or "category" not in collection.metadata:
+                continue
+
+            # Se recorren los metadatos por páginas para conocer los documentos de origen.
+            sources = {}
+            offset = 0
+
+            while True:
+                rows = collection.get(limit=batch_size, offset=offset, include=["metadatas"])
+
+                if not rows["ids"]:
+                    break
+
+                for metadata in rows["metadatas"]:
+                    if metadata and "source" in metadata:
+                        sources[metadata["source"]] = {"hash": None, "updated_at": now}
+
+                offset += len(rows["ids"])
+
+            categories[collection.metadata["category"]] = {"chunks": collection.count(),
+                                                           "sources": sources,
+                                                           "created_at": now,
+                                                           "updated_at": now}
+
+        self.__manifest.replace(categories)
+        self.__collections = list(categories)
+        self._announce_registry_change()
+
+        return len(categories)
+
+    def load_categories(self):
+        try:
+            # Se obtienen los entrenamientos registrados en el manifiesto.
+            return self.__manifest.categories()
 
         except Exception as error:
             print(f"Error al obtener los entrenamientos: {error}.")
             return []
 
-    def db_query(self, query, category, k):
+    def db_query(self, query, category, k, mode="vector"):
+        if mode != "vector":
+            status, response = self.db_query_hybrid(query, category, k, mode=mode)
+            return status, [document["content"] for document in response["documents"]] if status else response
+
         try:
             if not category in self.__collections:  # Si el entrenamiento no existe
                 return False, f"El entrenamiento {category} no está registrado."
 
             # Se obtiene el resultado de la consulta a la base de datos.
-            results = self.__db.similarity_search(query, k=k, filter={"category": category})
+            with observe_stage("query_embedding"):
+                query_vector = self.embed_query(query)
+
+            with observe_stage("vector_search"):
+                results = self._vector_search(category, [query_vector], k)["documents"][0]
 
             if not results: # Si no se encontraron coincidencias.
                 return False, "No se encontraron resultados para la consulta en la base de datos."
 
-            return True, [res.page_content for res in results]
+            return True, results
+
+        except Exception as error:
+            print(f">>> Error al consultar la base de datos: {error}.")
+            return False, "Ocurrió un error inesperado al consultar la base de datos."
+
+    def db_query_hybrid(self, query, category, k, mode="hybrid"):
+        """
+        Consulta un entrenamiento con búsqueda léxica (BM25), vectorial o ambas fusionadas por rango recíproco.
+
+        En modo "lexical" no se incrusta la consulta ni se realiza la búsqueda vectorial.
+
+        :return: Tupla (status, {"documents": [...], "timings": {...}}) donde cada documento contiene el texto,
+        su identificador, su posición en cada búsqueda y la puntuación final; los tiempos se reportan por etapa
+        en milisegundos.
+        """
+        try:
+            if not category in self.__collections:  # Si el entrenamiento no existe
+                return False, f"El entrenamiento {category} no está registrado."
+
+            if mode not in self.RETRIEVAL_MODES:
+                return False, f"El modo de recuperación {mode} no es válido."
+
+            started_at = time.perf_counter()
+            timings = {}
+            candidates = k if mode != "hybrid" else max(k * 4, 20)
+
+            lexical_ranking = []
+            vector_ranking = []
+            texts = {}
+            metadatas = {}
+            similarities = {}
+
+            if mode in ("lexical", "hybrid"):
+                stage_at = time.perf_counter()
+                lexical_ranking = [chunk_id for chunk_id, _ in
+                                   self._get_lexical_index(category).search(query, candidates)]
+                timings["lexical_ms"] = (time.perf_counter() - stage_at) * 1000
+
+            if mode in ("vector", "hybrid"):
+                stage_at = time.perf_counter()
+                query_vector = self.embed_query(query)
+                timings["embedding_ms"] = (time.perf_counter() - stage_at) * 1000
+
+                stage_at = time.perf_counter()
+                results = self._vector_search(category, [query_vector], candidates)
+                vector_ranking = results["ids"][0]
+                texts.update(zip(results["ids"][0], results["documents"][0]))
+                metadatas.update(zip(results["ids"][0], results["metadatas"][0]))
+                similarities.update((chunk_id, self.similarity(distance))
+                                    for chunk_id, distance in zip(results["ids"][0], results["distances"][0]))
+                timings["vector_ms"] = (time.perf_counter() - stage_at) * 1000
+
+            # Fusión por rango recíproco: cada búsqueda aporta 1 / (RRF_K + posición).
+            stage_at = time.perf_counter()
+            scores = {}
+            lexical_ranks = {chunk_id: rank for rank, chunk_id in enumerate(lexical_ranking, start=1)}
+            vector_ranks = {chunk_id: rank for rank, chunk_id in enumerate(vector_ranking, start=1)}
+
+            for ranks in (lexical_ranks, vector_ranks):
+                for chunk_id, rank in ranks.items():
+                    scores[chunk_id] = scores.get(chunk_id, 0.0) + 1 / (self.RRF_K + rank)
+
+            selected = sorted(scores, key=scores.get, reverse=True)[:k]
+
+            # Se recupera el texto de los pedazos que solo aparecieron en la búsqueda léxica.
+            missing = [chunk_id for chunk_id in selected if chunk_id not in texts]
+
+            if missing:
+                with self.__client_lock.read():
+                    rows = self.__client.get_collection(self.collection_name(category)).get(
+                        ids=missing, include=["documents", "metadatas"])
+                texts.update(zip(rows["ids"], rows["documents"]))
+                metadatas.update(zip(rows["ids"], rows["metadatas"]))
+
+            documents = [{"id": chunk_id,
+                          "content": texts.get(chunk_id, ""),
+                          "metadata": metadatas.get(chunk_id) or {},
+                          "similarity": similarities.get(chunk_id),
+                          "lexical_rank": lexical_ranks.get(chunk_id),
+                          "vector_rank": vector_ranks.get(chunk_id),
+                          "score": scores[chunk_id]} for chunk_id in selected]
+            timings["fusion_ms"] = (time.perf_counter() - stage_at) * 1000
+            timings["total_ms"] = (time.perf_counter() - started_at) * 1000
+
+            for stage in ("lexical", "embedding", "vector", "fusion"):
+                if f"{stage}_ms" in timings:
+                    STAGE_SECONDS.observe(timings[f"{stage}_ms"] / 1000, stage=f"{mode}_{stage}")
+
+            if not documents:  # Si no se encontraron coincidencias.
+                return False, "No se encontraron resultados para la consulta en la base de datos."
+
+            return True, {"documents": documents, "timings": timings}
+
+        except Exception as error:
+            print(f">>> Error al consultar la base de datos: {error}.")
+            return False, "Ocurrió un error inesperado al consultar la base de datos."
+
+    @staticmethod
+    def similarity(distance):
+        """
+        Convierte la distancia de Chroma (L2 al cuadrado, la métrica por defecto de las colecciones) en
+        similitud coseno; el modelo de incrustaciones produce vectores normalizados.
+        """
+        return 1 - distance / 2
+
+    def db_query_scored(self, query, category, k, mode="vector"):
+        """
+        Consulta un entrenamiento y retorna cada pedazo con sus metadatos y su similitud con la consulta, para
+        armar el contexto del modelo con un límite de relevancia.
+
+        :return: Tupla (status, [{"id", "content", "metadata", "similarity", ...}]) ordenada por relevancia;
+        la similitud es None para los pedazos que solo aparecieron en la búsqueda léxica.
+        """
+        if mode != "vector":
+            status, response = self.db_query_hybrid(query, category, k, mode=mode)
+            return status, response["documents"] if status else response
+
+        try:
+            if not category in self.__collections:  # Si el entrenamiento no existe
+                return False, f"El entrenamiento {category} no está registrado."
+
+            with observe_stage("query_embedding"):
+                query_vector = self.embed_query(query)
+
+            with observe_stage("vector_search"):
+                results = self._vector_search(category, [query_vector], k)
+
+            documents = [{"id": chunk_id, "content": document, "metadata": metadata or {},
+                          "similarity": self.similarity(distance)}
+                         for chunk_id, document, metadata, distance in zip(results["ids"][0],
+                                                                           results["documents"][0],
+                                                                           results["metadatas"][0],
+                                                                           results["distances"][0])]
+
+            if not documents:  # Si no se encontraron coincidencias.
+                return False, "No se encontraron resultados para la consulta en la base de datos."
+
+            return True, documents
 
         except Exception as error:
             print(f">>> Error al consultar la base de datos: {error}.")
             return False, "Ocurrió un error inesperado al consultar la base de datos."
 
+    def db_query_batch(self, queries, k):
+        """
+        Consulta varias preguntas, posiblemente de distintos entrenamientos, en una sola operación.
+
+        Todas las preguntas se incrustan en un solo lote y, por cada entrenamiento, se realiza una única
+        búsqueda de vecinos con todos sus vectores.
+
+        :param queries: Lista de tuplas (pregunta, entrenamiento).
+        :return: Lista de tuplas (status, resultados) en el mismo orden que las preguntas; cada resultado
+        contiene el texto, la distancia y los metadatos del pedazo.
+        """
+        try:
+            responses = [None] * len(queries)
+            groups = {}     # entrenamiento -> índices de las preguntas
+
+            for index, (query, category) in enumerate(queries):
+                if category in self.__collections:
+                    groups.setdefault(category, []).append(index)
+                else:
+                    responses[index] = (False, f"El entrenamiento {category} no está registrado.")
+
+            if not groups:
+                return responses
+
+            # Se incrustan todas las preguntas válidas en un solo lote.
+            valid = [index for indexes in groups.values() for index in indexes]
+            vectors = dict(zip(valid, self.embed_queries([queries[index][0] for index in valid])))
+
+            for category, indexes in groups.items():
+                results = self._vector_search(category, [vectors[index] for index in indexes], k)
+
+                for position, index in enumerate(indexes):
+                    matches = [{"content": document, "distance": distance, "metadata": metadata}
+                               for document, distance, metadata in zip(results["documents"][position],
+                                                                       results["distances"][position],
+                                                                       results["metadatas"][position])]
+
+                    if matches:
+                        responses[index] = (True, matches)
+                    else:
+                        responses[index] = (False, "No se encontraron resultados para la consulta en la base de datos.")
+
+            return responses
+
+        except Exception as error:
+            print(f">>> Error al consultar la base de datos por lote: {error}.")
+            return [(False, "Ocurrió un error inesperado al consultar la base de datos.")] * len(queries)
+
+    def get_collection_info(self, category):
+        """
+        Retorna la información registrada en el manifiesto para un entrenamiento y su motor de búsqueda vectorial.
+        """
+        info = self.__manifest.get(category)
+
+        if info is not None:
+            info["vector_engine"] = self.get_vector_engine(category)
+            info["exact_index"] = self.__exact.info(self.collection_name(category))
+
+        return info
+
     def get_collections(self):
         """
         Método encargado de retornar la lista de colecciones disponibles en la base de datos.
@@ -0,0 +1,138 @@
+# IMPORTACIÓN DE MÓDULOS
+import hashlib
+import json
+import time
+import zipfile
+import numpy as np
+
+
+class SnapshotError(Exception):
+    """
+    La instantánea no existe, está dañada o no corresponde al formato esperado.
+    """
+
+
+class CollectionSnapshot:
+    """
+    Instantánea compacta de uno o varios entrenamientos, utilizada para poblar otro nodo sin volver a incrustar.
+
+    Es un archivo ZIP con una carpeta por entrenamiento y, dentro de ella, dos archivos por lote de pedazos:
+        NNNNN.f16   -> incrustaciones float16 contiguas (pedazos x dimensión), sin comprimir.
+        NNNNN.jsonl -> identificador, texto y metadatos de cada pedazo, en el mismo orden (comprimido).
+    El manifest.json guarda el modelo, el motor y la dimensión de las incrustaciones, la información del manifiesto
+    de cada entrenamiento y el hash SHA-256 de cada archivo. Se escribe y se lee lote por lote, sin cargar el
+    entrenamiento en memoria.
+    """
+
+    VERSION = 2
+    MANIFEST = "manifest.json"
+    DTYPE = np.dtype("<f2")
+
+    def __init__(self, path):
+        self.__path = path  # Ruta del archivo de la instantánea.
+
+    def write(self, model, backend, dim, categories):
+        """
+        Escribe la instantánea.
+
+        :param model: Nombre del modelo de incrustaciones con el que se generaron los vectores.
+        :param backend: Motor de incrustaciones con el que se generaron los vectores.
+        :param dim: Dimensión de las incrustaciones.
+        :param categories: Iterable de tuplas (categoría, información del manifiesto, lotes), donde cada lote es
+        una tupla (identificadores, incrustaciones, textos, metadatos).
+        :return: Diccionario categoría -> número de pedazos exportados.
+        """
+        manifest = {"version": self.VERSION, "model": model, "backend": backend, "dim": dim, "dtype": "float16",
+                    "created_at": time.time(), "categories": {}, "checksums": {}}
+
+        with zipfile.ZipFile(self.__path, "w", compression=zipfile.ZIP_DEFLATED, allowZip64=True) as archive:
+            def add(name, data, compress_type):
+                archive.writestr(name, data, compress_type=compress_type)
+                manifest["checksums"][name] = hashlib.sha256(data).hexdigest()
+
+            for position, (category, entry, batches) in enumerate(categories):
+                prefix = f"{position:04d}"
+                count, parts = 0, 0
+
+                for ids, embeddings, documents, metadatas in batches:
+                    if not len(ids):
+                        continue
+
+                    vectors = np.asarray(embeddings, dtype=np.float32)
+
+                    if vectors.shape[1] != dim:
+                        raise SnapshotError(f"Los vectores de {category} tienen dimensión {vectors.shape[1]} "
+                                            f"y no {dim}")
+                    records = "".join(json.dumps({"id": chunk_id, "text": document or "", "metadata": metadata or {}},
+                                                 ensure_ascii=False) + "\n"
+                                      for chunk_id, document, metadata in zip(ids, documents, metadatas))
+                    add(f"{prefix}/{parts:05d}.f16", vectors.astype(self.DTYPE).tobytes(), zipfile.ZIP_STORED)
+                    add(f"{prefix}/{parts:05d}.jsonl", records.encode("utf-8"), zipfile.ZIP_DEFLATED)
+                    count, parts = count + len(ids), parts + 1
+
+                manifest["categories"][category] = {"prefix": prefix, "count": count, "dim": dim if count else 0,
+                                                    "parts": parts, "entry": entry}
+
+            archive.writestr(self.MANIFEST, json.dumps(manifest, ensure_ascii=False, indent=2))
+
+        return {category: info["count"] for category, info in manifest["categories"].items()}
+
+    def read_manifest(self):
+        """
+        Retorna el manifiesto de la instantánea.
+
+        :raises SnapshotError: Si el archivo no es una instantánea válida.
+        """
+        try:
+            with zipfile.ZipFile(self.__path) as archive:
+                manifest = json.loads(archive.read(self.MANIFEST))
+        except (OSError, KeyError, ValueError, zipfile.BadZipFile) as error:
+            raise SnapshotError(f"No se pudo leer la instantánea: {error}.")
+
+        if manifest.get("version") != self.VERSION:
+            raise SnapshotError(f"Versión de instantánea no compatible: {manifest.get('version')}.")
+
+        return manifest
+
+    def verify(self, manifest, categories=None):
+        """
+        Verifica el hash de los archivos de los entrenamientos indicados (todos por defecto).
+
+        :raises SnapshotError: Si falta un archivo o su contenido no coincide con el manifiesto.
+        """
+        prefixes = {info["prefix"] for category, info in manifest["categories"].items()
+                    if categories is None or category in categories}
+
+        with zipfile.ZipFile(self.__path) as archive:
+            for name, checksum in manifest["checksums"].items():
+                if name.split("/", 1)[0] not in prefixes:
+                    continue
+
+                digest = hashlib.sha256()
+
+                try:
+                    with archive.open(name) as member:
+                        while block := member.read(1 << 20):
+                            digest.update(block)
+                except (KeyError, zipfile.BadZipFile) as error:
+                    raise SnapshotError(f"La instantánea está incompleta o dañada ({name}): {error}.")
+
+                if digest.hexdigest() != checksum:
+                    raise SnapshotError(f"El hash de {name} no coincide con el manifiesto.")
+
+    def iter_batches(self, manifest, category):
+        """
+        Recorre los pedazos de un entrenamiento de la instantánea.
+
+        :return: Generador de tuplas (identificadores, incrustaciones float32, textos, metadatos) por lote.
+        """
+        info = manifest["categories"][category]
+
+        with zipfile.ZipFile(self.__path) as archive:
+            for part in range(info["parts"]):
+                name = f"{info['prefix']}/{part:05d}"
+                vectors = np.frombuffer(archive.read(f"{name}.f16"), dtype=self.DTYPE).reshape(-1, info["dim"])
+                records = [json.loads(line) for line in archive.read(f"{name}.jsonl").decode("utf-8").splitlines()]
+
+                yield ([record["id"] for record in records], vectors.astype(np.float32),
+                       [record["text"] for record in records], [record["metadata"] for record in records])
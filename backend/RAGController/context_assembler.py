@@ -0,0 +1,201 @@
+# IMPORTACIÓN DE MÓDULOS
+import math
+from RAGController.bm25_index import tokenize
+
+# Caracteres por token aproximados para los modelos de Ollama (español e inglés); no se cuenta con el
+# tokenizador de cada modelo, por lo que el conteo es una estimación conservadora.
+CHARS_PER_TOKEN = 3.5
+
+
+def estimate_tokens(text):
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def parse_budgets(value):
+    """
+    Convierte una lista "modelo=tokens,modelo=tokens" en un diccionario.
+    """
+    budgets = {}
+
+    for item in value.split(","):
+        if "=" in item:
+            model, tokens = item.rsplit("=", 1)
+            budgets[model.strip()] = int(tokens)
+
+    return budgets
+
+
+class PackedContext:
+    """
+    Resultado del armado del contexto: el texto enviado al modelo y cómo se obtuvo.
+    """
+
+    def __init__(self, budget):
+        self.text = ""
+        self.budget = budget
+        self.tokens = 0     # Tokens estimados del texto.
+        self.chunks_in = 0  # Pedazos recuperados.
+        self.chunks_used = 0    # Pedazos incluidos en el contexto (unidos o no).
+        self.merged = 0     # Pedazos unidos a un pedazo vecino por su texto traslapado.
+        self.duplicates = 0     # Pedazos descartados por repetir el contenido de otro.
+        self.below_cutoff = 0   # Pedazos descartados por baja relevancia.
+        self.over_budget = 0    # Pedazos que no cupieron en el presupuesto de tokens.
+
+    def to_dict(self):
+        return {"tokens": self.tokens, "budget": self.budget, "chunks_in": self.chunks_in,
+                "chunks_used": self.chunks_used, "merged": self.merged, "duplicates": self.duplicates,
+                "below_cutoff": self.below_cutoff, "over_budget": self.over_budget}
+
+
+class ContextAssembler:
+    """
+    Arma el contexto del RAG con un presupuesto de tokens por modelo.
+
+    Los pedazos se recorren por relevancia: se descartan los que están por debajo de la similitud mínima y
+    los casi duplicados; los pedazos contiguos o traslapados de la misma página (por el chunk_overlap con el
+    que se dividió el documento) se unen sin repetir el texto común, y no se incluye lo que exceda el
+    presupuesto.
+    """
+
+    def __init__(self, default_budget=1500, budgets=None, min_similarity=0.3, duplicate_threshold=0.9,
+                 min_overlap=20, max_overlap=200, max_gap=3):
+        self.__default_budget = default_budget  # Tokens de contexto para los modelos sin presupuesto propio.
+        self.__budgets = budgets or {}  # modelo -> tokens de contexto
+        self.__min_similarity = min_similarity  # Similitud coseno mínima de un pedazo para incluirlo.
+        self.__duplicate_threshold = duplicate_threshold    # Similitud de Jaccard a partir de la cual se descarta.
+        self.__min_overlap = min_overlap    # Caracteres mínimos en común para unir pedazos sin posición.
+        self.__max_overlap = max_overlap    # Caracteres máximos de traslape que se buscan.
+        self.__max_gap = max_gap    # Espacios en blanco máximos entre dos pedazos contiguos.
+
+    def get_budget(self, model):
+        return self.__budgets.get(model, self.__default_budget)
+
+    def _overlap(self, left, right):
+        """
+        Retorna el número de caracteres con que termina left y comienza right, o 0 si no se traslapan.
+        """
+        for size in range(min(len(left), len(right), self.__max_overlap), self.__min_overlap - 1, -1):
+            if left.endswith(right[:size]):
+                return size
+
+        return 0
+
+    def _merge(self, block, chunk):
+        """
+        Une dos fragmentos de la misma página. Si ambos tienen su posición en la página (start_index), se unen
+        cuando se traslapan o son contiguos; si no, cuando el final de uno coincide con el inicio del otro.
+
+        :return: Tupla (texto unido, posición) o None si no pueden unirse.
+        """
+        (left, left_start), (right, right_start) = block, chunk
+
+        if left_start is not None and right_start is not None:
+            if right_start < left_start:
+                (left, left_start), (right, right_start) = chunk, block
+
+            cut = left_start + len(left) - right_start
+
+            if cut < -self.__max_gap:   # Hay texto entre ambos fragmentos.
+                return None
+
+            if cut >= len(right):   # El segundo fragmento ya está contenido en el primero.
+                return left, left_start
+
+            return (left + right[cut:] if cut >= 0 else f"{left} {right}"), left_start
+
+        if right in left:
+            return left, left_start
+
+        overlap = self._overlap(left, right)
+
+        if overlap:
+            return left + right[overlap:], left_start
+
+        overlap = self._overlap(right, left)
+
+        if overlap:
+            return right[:-overlap] + left, None
+
+        return None
+
+    def _place(self, blocks, chunk):
+        """
+        Retorna una copia de los bloques con el pedazo agregado: unido al bloque de su misma página con el que
+        se traslapa (y este, a su vez, a otros bloques con los que ahora se traslape) o como un bloque nuevo.
+        """
+        blocks = [dict(block, terms=list(block["terms"])) for block in blocks]
+        insert_at = len(blocks)
+        position = 0
+
+        while position < len(blocks):
+            block = blocks[position]
+            merged = None
+
+            if block["page_key"] == chunk["page_key"]:
+                merged = self._merge((block["text"], block["start"]), (chunk["text"], chunk["start"]))
+
+            if merged is None:
+                position += 1
+                continue
+
+            # El bloque unido ocupa el lugar del más relevante y se vuelve a comparar con los demás.
+            chunk = dict(chunk, text=merged[0], start=merged[1], terms=block["terms"] + chunk["terms"])
+            del blocks[position]
+            insert_at = min(insert_at, position)
+            position = 0
+
+        blocks.insert(insert_at, chunk)
+        return blocks
+
+    @staticmethod
+    def _jaccard(left, right):
+        if not left or not right:
+            return 0.0
+
+        return len(left & right) / len(left | right)
+
+    def assemble(self, documents, model):
+        """
+        Arma el contexto para un modelo a partir de los pedazos recuperados (ordenados por relevancia).
+
+        :param documents: Lista de diccionarios con "content" y, opcionalmente, "similarity" y "metadata".
+        :return: PackedContext con el texto y el conteo de tokens y pedazos.
+        """
+        packed = PackedContext(self.get_budget(model))
+        packed.chunks_in = len(documents)
+        blocks = []
+
+        for document in documents:
+            text = document["content"].strip()
+            similarity = document.get("similarity")
+
+            # El pedazo más relevante se conserva aunque no alcance la similitud mínima.
+            if blocks and similarity is not None and similarity < self.__min_similarity:
+                packed.below_cutoff += 1
+                continue
+
+            terms = set(tokenize(text))
+
+            if any(self._jaccard(terms, other) >= self.__duplicate_threshold
+                   for block in blocks for other in block["terms"]):
+                packed.duplicates += 1
+                continue
+
+            metadata = document.get("metadata") or {}
+            start = metadata.get("start_index")
+            candidate = self._place(blocks, {"text": text,
+                                             "page_key": (metadata.get("source"), metadata.get("page")),
+                                             "start": start if start is not None and start >= 0 else None,
+                                             "terms": [terms]})
+
+            if sum(estimate_tokens(block["text"]) for block in candidate) > packed.budget:
+                packed.over_budget += 1
+                continue
+
+            packed.chunks_used += 1
+            packed.merged += len(blocks) + 1 - len(candidate)
+            blocks = candidate
+
+        packed.text = "\n\n".join(block["text"] for block in blocks)
+        packed.tokens = estimate_tokens(packed.text) if packed.text else 0
+        return packed
@@ -0,0 +1,114 @@
+# IMPORTACIÓN DE MÓDULOS
+import hashlib
+import threading
+from RAGController.context_assembler import CHARS_PER_TOKEN, estimate_tokens
+
+
+class Conversation:
+    """
+    Historial de la conversación de una sesión, acotado a un presupuesto de tokens.
+
+    El historial forma parte del prefijo del prompt, por lo que no se recorta en cada turno (lo que
+    cambiaría el prefijo y obligaría a Ollama a evaluarlo completo): al superar el presupuesto se descartan
+    los turnos más antiguos hasta quedar en la mitad, y sus preguntas se conservan en un resumen breve.
+    """
+
+    def __init__(self, token_budget=1024, max_question_chars=160):
+        self.__token_budget = token_budget  # Tokens máximos del historial (turnos y resumen).
+        self.__max_question_chars = max_question_chars  # Longitud de cada pregunta dentro del resumen.
+        self.__turns = []   # [(pregunta, respuesta)]
+        self.__summarized_questions = []    # Preguntas de los turnos descartados, de la más antigua a la más nueva.
+        self.__lock = threading.Lock()
+
+    def _turn_tokens(self, turn):
+        return estimate_tokens(turn[0]) + estimate_tokens(turn[1])
+
+    def _tokens(self):
+        return sum(self._turn_tokens(turn) for turn in self.__turns) + estimate_tokens(self._summary())
+
+    def _summary(self):
+        return "; ".join(self.__summarized_questions)
+
+    def snapshot(self):
+        """
+        Retorna el resumen y los mensajes de los turnos anteriores, en el orden en que se envían al modelo.
+
+        :return: Tupla (resumen, mensajes).
+        """
+        with self.__lock:
+            messages = []
+
+            for question, answer in self.__turns:
+                messages.append({'role': 'user', 'content': question})
+                messages.append({'role': 'assistant', 'content': answer})
+
+            return self._summary(), messages
+
+    def last_question(self):
+        with self.__lock:
+            return self.__turns[-1][0] if self.__turns else None
+
+    def is_empty(self):
+        with self.__lock:
+            return not self.__turns and not self.__summarized_questions
+
+    def digest(self):
+        """
+        Retorna una huella del historial (resumen y turnos), vacía si no hay historial. Dos conversaciones con la
+        misma huella producen el mismo prompt para la misma pregunta, por lo que pueden compartir respuestas.
+        """
+        with self.__lock:
+            if not self.__turns and not self.__summarized_questions:
+                return ""
+
+            content = hashlib.sha256(self._summary().encode("utf-8"))
+
+            for question, answer in self.__turns:
+                content.update(b"\0" + question.encode("utf-8") + b"\0" + answer.encode("utf-8"))
+
+            return content.hexdigest()
+
+    def add_turn(self, question, answer):
+        """
+        Agrega un turno y, si el historial excede su presupuesto, lo compacta.
+
+        :return: Número de turnos descartados (0 si el prefijo del siguiente prompt se conserva).
+        """
+        # Una respuesta muy larga se recorta para que el turno más reciente y el resumen (a lo sumo una cuarta
+        # parte del presupuesto) quepan en la mitad del presupuesto que queda después de compactar.
+        max_answer_chars = int(self.__token_budget / 4 * CHARS_PER_TOKEN)
+
+        if len(answer) > max_answer_chars:
+            answer = answer[:max_answer_chars].rstrip() + "…"
+
+        with self.__lock:
+            self.__turns.append((question, answer))
+
+            if self._tokens() <= self.__token_budget:
+                return 0
+
+            dropped = 0
+
+            # El turno recién agregado nunca se descarta: es el que da contexto a la siguiente pregunta.
+            while len(self.__turns) > 1 and self._tokens() > self.__token_budget // 2:
+                question, _ = self.__turns.pop(0)
+                self.__summarized_questions.append(question[:self.__max_question_chars])
+                dropped += 1
+
+                # El resumen tampoco puede crecer sin límite: se conservan las preguntas más recientes.
+                while estimate_tokens(self._summary()) > self.__token_budget // 4 and self.__summarized_questions:
+                    self.__summarized_questions.pop(0)
+
+            return dropped
+
+    def clear(self):
+        with self.__lock:
+            self.__turns.clear()
+            self.__summarized_questions.clear()
+
+    def to_dict(self):
+        with self.__lock:
+            return {"summary": self._summary(),
+                    "turns": [{"question": question, "answer": answer} for question, answer in self.__turns],
+                    "tokens": self._tokens(),
+                    "token_budget": self.__token_budget}
@@ -0,0 +1,94 @@
+# IMPORTACIÓN DE MÓDULOS
+import os
+import numpy as np
+from langchain_huggingface import HuggingFaceEmbeddings
+
+# Motores de incrustación disponibles:
+#   huggingface -> modelo de referencia en PyTorch.
+#   onnx        -> el mismo modelo ejecutado con ONNX Runtime.
+#   onnx-int8   -> versión cuantizada a int8 del modelo en ONNX Runtime.
+EMBEDDING_BACKENDS = ("huggingface", "onnx", "onnx-int8")
+
+REFERENCE_BACKEND = "huggingface"
+
+# Textos utilizados para comparar un motor contra el modelo de referencia.
+PARITY_SAMPLES = [
+    "¿Qué es bitcoin?",
+    "El Banco de México regula los sistemas de pagos del país.",
+    "La tasa de interés interbancaria de equilibrio se publica diariamente.",
+    "Las criptomonedas utilizan una cadena de bloques para registrar transacciones.",
+    "Artículo 27 BIS de las disposiciones de carácter general.",
+    "Proof of work secures the network against double spending.",
+]
+
+
+# Archivo del modelo cuantizado a int8 dentro del repositorio del modelo (exportación de sentence-transformers
+# para CPU con AVX2; en otros procesadores puede indicarse la exportación correspondiente).
+QUANTIZED_FILE = os.getenv("EMBEDDING_ONNX_INT8_FILE", "onnx/model_quint8_avx2.onnx")
+
+
+def create_embedding_backend(backend, model_name, threads=None, quantized_file=QUANTIZED_FILE):
+    """
+    Crea el modelo de incrustaciones con el motor indicado.
+
+    Los motores ONNX se apoyan en sentence-transformers (backend="onnx"), que a su vez requiere
+    optimum[onnxruntime], por lo que solo se importan cuando se seleccionan.
+
+    :param threads: Hilos de cómputo del motor (None = valor por defecto del motor).
+    :raises ValueError: Si el motor no es compatible.
+    :raises ImportError: Si no están instaladas las dependencias de los motores ONNX.
+    """
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"El motor de incrustaciones {backend} no es compatible.")
+
+    if backend == "huggingface":
+        if threads:
+            import torch
+            torch.set_num_threads(threads)
+
+        return HuggingFaceEmbeddings(model_name=model_name)
+
+    try:
+        import onnxruntime
+        import optimum.onnxruntime  # noqa: F401 (requerido por sentence-transformers para backend="onnx")
+    except ImportError as error:
+        raise ImportError(f"El motor {backend} requiere optimum[onnxruntime]: {error}")
+
+    session_options = onnxruntime.SessionOptions()
+
+    if threads:
+        session_options.intra_op_num_threads = threads
+        session_options.inter_op_num_threads = 1
+
+    onnx_kwargs = {"provider": "CPUExecutionProvider", "session_options": session_options}
+
+    if backend == "onnx-int8":
+        onnx_kwargs["file_name"] = quantized_file
+
+    try:
+        return HuggingFaceEmbeddings(model_name=model_name,
+                                     model_kwargs={"backend": "onnx", "model_kwargs": onnx_kwargs})
+    except Exception as error:
+        model_file = onnx_kwargs.get("file_name", "onnx/model.onnx")
+        raise RuntimeError(f"No se pudo cargar {model_file} de {model_name} con el motor {backend}: {error}")
+
+
+def check_embedding_parity(candidate, reference, tolerance=0.01, samples=None):
+    """
+    Verifica que las incrustaciones de un motor coincidan con las del modelo de referencia.
+
+    Se compara la similitud coseno entre los vectores de ambos motores para cada texto de muestra;
+    el motor es aceptado si ninguna similitud es menor a 1 - tolerance.
+
+    :return: Tupla (aceptado, similitud mínima).
+    """
+    samples = samples or PARITY_SAMPLES
+    candidate_vectors = np.asarray(candidate.embed_documents(samples), dtype=np.float32)
+    reference_vectors = np.asarray(reference.embed_documents(samples), dtype=np.float32)
+
+    candidate_vectors /= np.linalg.norm(candidate_vectors, axis=1, keepdims=True)
+    reference_vectors /= np.linalg.norm(reference_vectors, axis=1, keepdims=True)
+
+    min_similarity = float(np.min(np.sum(candidate_vectors * reference_vectors, axis=1)))
+
+    return min_similarity >= 1 - tolerance, min_similarity
@@ -1,21 +1,155 @@
 # IMPORTACIÓN DE MÓDULOS
 import fitz  # PyMuPDF para PDF
 import docx
+import atexit
+import hashlib
 import io
+import multiprocessing
+import os
+import tempfile
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_huggingface import HuggingFaceEmbeddings
 from langchain.schema import Document
-from langchain.chains import ConversationalRetrievalChain
+from RAGController.cached_embeddings import CachedEmbeddings
+from RAGController import pdf_extraction_worker
+from RAGController.metrics import timed_pages
+from RAGController.embedding_backends import REFERENCE_BACKEND, check_embedding_parity, create_embedding_backend
 
 
 class EmbeddingsModel:
 
-    def __init__(self, model_name="sentence-transformers/multi-qa-MiniLM-L6-cos-v1", chunk_size=256, chunk_overlap=51):
+    def __init__(self, model_name="sentence-transformers/multi-qa-MiniLM-L6-cos-v1", chunk_size=256, chunk_overlap=51,
+                 query_cache_size=2048, query_cache_ttl=3600, extraction_workers=None, pages_per_task=16,
+                 parallel_min_pages=64, embedding_backend=os.getenv("EMBEDDING_BACKEND", REFERENCE_BACKEND),
+                 embedding_threads=int(os.getenv("EMBEDDING_THREADS", "0")) or None):
         self.__embeddings_model_name = model_name
-        # Se define el modelo de incrustaciones que se estará utilizando
-        self._embeddings = HuggingFaceEmbeddings(model_name=self.__embeddings_model_name)
+        self.__query_cache_size = query_cache_size
+        self.__query_cache_ttl = query_cache_ttl
+        self._embedding_threads = embedding_threads     # Hilos de cómputo del motor de incrustaciones
+        # Se define el modelo de incrustaciones que se estará utilizando, con caché para las consultas.
+        self._embedding_backend = embedding_backend
+        self._embeddings = self._create_embeddings(embedding_backend)
         # Se establece la cantidad de información que contendrá cada vector
+        self._chunk_size = chunk_size
+        self._chunk_overlap = chunk_overlap
         self._text_splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+        # Configuración de la extracción paralela de PDF.
+        self._extraction_workers = extraction_workers or os.cpu_count() or 1   # Procesos trabajadores
+        self._pages_per_task = pages_per_task   # Páginas que procesa cada tarea
+        self._parallel_min_pages = parallel_min_pages   # Por debajo de este número de páginas se extrae en serie
+        self._extraction_pool = None    # Grupo de procesos de extracción, creado en el primer PDF grande.
+        self._extraction_pool_lock = threading.Lock()
+
+    def _create_embeddings(self, backend):
+        """
+        Crea el modelo de incrustaciones con el motor indicado y su caché de consultas. Si el motor solicitado
+        no puede cargarse, el error se propaga en lugar de ejecutar otro motor sin que se note.
+        """
+        try:
+            model = create_embedding_backend(backend, self.__embeddings_model_name, threads=self._embedding_threads)
+        except Exception as error:
+            print(f">>> Error al cargar el motor de incrustaciones {backend}: {error}.")
+            raise
+
+        return CachedEmbeddings(model,
+                                model_name=self.__embeddings_model_name,
+                                max_size=self.__query_cache_size,
+                                ttl=self.__query_cache_ttl)
+
+    def get_embeddings_model_name(self):
+        """
+        Retorna el nombre del modelo de incrustaciones.
+        """
+        return self.__embeddings_model_name
+
+    def get_embedding_backend(self):
+        """
+        Retorna el motor de incrustaciones en uso.
+        """
+        return self._embedding_backend
+
+    def get_embedding_dim(self):
+        """
+        Retorna la dimensión de las incrustaciones del modelo, obtenida con una incrustación de prueba.
+        """
+        return len(self.embed_query("dimensión"))
+
+    def verify_embedding_backend(self, tolerance=0.01):
+        """
+        Compara el motor de incrustaciones en uso contra el modelo de referencia. Si las incrustaciones no
+        coinciden dentro de la tolerancia, se sustituye el motor por el de referencia para no mezclar
+        vectores incompatibles en un índice existente.
+
+        :return: Tupla (aceptado, similitud mínima).
+        """
+        if self._embedding_backend == REFERENCE_BACKEND:
+            return True, 1.0
+
+        reference = create_embedding_backend(REFERENCE_BACKEND, self.__embeddings_model_name,
+                                             threads=self._embedding_threads)
+        accepted, min_similarity = check_embedding_parity(self._embeddings, reference, tolerance=tolerance)
+
+        if not accepted:
+            print(f">>> El motor {self._embedding_backend} no coincide con el modelo de referencia "
+                  f"(similitud mínima {min_similarity:.4f}). Se usará {REFERENCE_BACKEND}.")
+            self.use_reference_backend(reference)
+
+        return accepted, min_similarity
+
+    def use_reference_backend(self, reference=None):
+        """
+        Sustituye el motor de incrustaciones en uso por el modelo de referencia.
+
+        :param reference: Modelo de referencia ya cargado (se carga si no se proporciona).
+        """
+        if reference is None:
+            reference = create_embedding_backend(REFERENCE_BACKEND, self.__embeddings_model_name,
+                                                 threads=self._embedding_threads)
+
+        self._embedding_backend = REFERENCE_BACKEND
+        self._embeddings = CachedEmbeddings(reference,
+                                            model_name=self.__embeddings_model_name,
+                                            max_size=self.__query_cache_size,
+                                            ttl=self.__query_cache_ttl)
+
+    def embed_query(self, query: str):
+        """
+        Obtiene la incrustación de una consulta (reutilizando la caché de consultas).
+
+        :return: Vector de la consulta.
+        """
+        return self._embeddings.embed_query(query)
+
+    def embed_queries(self, queries):
+        """
+        Obtiene las incrustaciones de varias consultas en un solo lote (reutilizando la caché de consultas).
+
+        :return: Lista de vectores en el mismo orden que las consultas.
+        """
+        return self._embeddings.embed_queries(queries)
+
+    def embed_documents(self, texts):
+        """
+        Obtiene las incrustaciones de varios pedazos en un solo lote (sin pasar por la caché de consultas).
+
+        :return: Lista de vectores en el mismo orden que los textos.
+        """
+        return self._embeddings.embed_documents(texts)
+
+    def get_splitter_settings(self):
+        """
+        Retorna el tamaño y el traslape de los pedazos, para dividir documentos fuera de este proceso.
+        """
+        return {"chunk_size": self._chunk_size, "chunk_overlap": self._chunk_overlap}
+
+    def get_query_cache_stats(self):
+        """
+        Retorna las estadísticas de la caché de incrustaciones de consultas.
+        """
+        return self._embeddings.get_cache_stats()
 
     @staticmethod
     def extract_pdf_text(file_content: bytes):
@@ -72,6 +206,227 @@ class EmbeddingsModel:
             print(f">>> Error al procesar el documento: {e}.")
             return None
 
+    @staticmethod
+    def iter_pdf_pages(file_content: bytes):
+        """
+        Recorre un archivo PDF página por página.
+
+        :return: Generador de tuplas (número de página, texto de la página).
+        """
+        with fitz.open(stream=file_content, filetype="pdf") as doc:
+            for page_number, page in enumerate(doc, start=1):
+                yield page_number, page.get_text()
+
+    def _get_extraction_pool(self):
+        """
+        Retorna el grupo de procesos de extracción de PDF, creándolo en el primer uso.
+
+        El grupo se conserva entre documentos para no pagar el arranque de los procesos en cada carga. Los
+        procesos se inician con "spawn": este proceso tiene hilos y el modelo de incrustaciones cargados, y
+        copiarlos con fork puede dejar candados tomados en los procesos hijos.
+        """
+        with self._extraction_pool_lock:
+            if self._extraction_pool is None:
+                self._extraction_pool = ProcessPoolExecutor(max_workers=self._extraction_workers,
+                                                            mp_context=multiprocessing.get_context("spawn"))
+                atexit.register(self.shutdown_extraction_pool)
+
+            return self._extraction_pool
+
+    def shutdown_extraction_pool(self):
+        """
+        Detiene el grupo de procesos de extracción de PDF (se vuelve a crear si se necesita).
+        """
+        with self._extraction_pool_lock:
+            pool, self._extraction_pool = self._extraction_pool, None
+
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def iter_pdf_pages_parallel(self, file_content: bytes):
+        """
+        Recorre un archivo PDF repartiendo rangos de páginas entre un grupo de procesos.
+
+        El documento se escribe en un archivo temporal que cada proceso abre una sola vez, en lugar de enviar
+        su contenido con cada rango. Las páginas se entregan en orden y solo se mantiene en curso un número
+        acotado de rangos. Los documentos pequeños o una configuración de un solo trabajador se procesan en serie.
+
+        :return: Generador de tuplas (número de página, texto de la página).
+        """
+        with fitz.open(stream=file_content, filetype="pdf") as doc:
+            page_count = doc.page_count
+
+        if self._extraction_workers <= 1 or page_count < self._parallel_min_pages:
+            yield from self.iter_pdf_pages(file_content)
+            return
+
+        ranges = ((start, min(start + self._pages_per_task, page_count))
+                  for start in range(0, page_count, self._pages_per_task))
+        executor = self._get_extraction_pool()
+
+        with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as file:
+            file.write(file_content)
+
+        pending = deque()
+
+        try:
+            for start, end in ranges:
+                pending.append(executor.submit(pdf_extraction_worker.extract_page_range, file.name, start, end))
+
+                # Se limita el número de rangos en curso para acotar la memoria.
+                if len(pending) >= self._extraction_workers * 2:
+                    yield from pending.popleft().result()
+
+            while pending:
+                yield from pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+            # Los rangos que ya se estaban extrayendo se esperan antes de borrar el archivo.
+            for future in pending:
+                if not future.cancelled():
+                    future.exception()
+
+            os.remove(file.name)
+
+    @staticmethod
+    def iter_txt_pages(file_content: bytes, block_size=65536):
+        """
+        Recorre un archivo TXT en bloques de líneas de tamaño acotado.
+
+        :return: Generador de tuplas (número de bloque, texto del bloque).
+        """
+        lines = io.TextIOWrapper(io.BytesIO(file_content), encoding="utf-8", errors="ignore")
+        buffer, size, block_number = [], 0, 1
+
+        for line in lines:
+            buffer.append(line)
+            size += len(line)
+
+            if size >= block_size:
+                yield block_number, "".join(buffer)
+                buffer, size, block_number = [], 0, block_number + 1
+
+        if buffer:
+            yield block_number, "".join(buffer)
+
+    @staticmethod
+    def iter_docx_pages(file_content: bytes, paragraphs_per_block=50):
+        """
+        Recorre un archivo DOCX en bloques de párrafos.
+
+        Se procesa en serie: python-docx lee el documento completo (un solo XML) al abrirlo, y recorrer sus
+        párrafos cuesta mucho menos que enviarlos a otros procesos.
+
+        :return: Generador de tuplas (número de bloque, texto del bloque).
+        """
+        doc = docx.Document(io.BytesIO(file_content))
+        paragraphs = (para.text for para in doc.paragraphs if para.text.strip())
+        block_number = 1
+
+        while True:
+            block = list(islice(paragraphs, paragraphs_per_block))
+
+            if not block:
+                break
+
+            yield block_number, "\n".join(block)
+            block_number += 1
+
+    def iter_document_pages(self, file_content: bytes, file_extension: str):
+        """
+        Determina el tipo de archivo y retorna el generador de páginas adecuado.
+
+        :return: Generador de tuplas (número de página, texto) o None si el formato no es compatible.
+        """
+        if file_extension == 'pdf':
+            pages = self.iter_pdf_pages_parallel(file_content)
+        elif file_extension == 'txt':
+            pages = self.iter_txt_pages(file_content)
+        elif file_extension == 'docx':
+            pages = self.iter_docx_pages(file_content)
+        else:
+            print(f">>> Formato no soportado.")
+            return None
+
+        # Se mide el tiempo de extracción por formato.
+        return timed_pages(pages, file_extension)
+
+    @staticmethod
+    def hash_file(file_content: bytes):
+        """
+        Calcula el hash del contenido de un archivo.
+
+        :return: Hash SHA-256 en hexadecimal.
+        """
+        return hashlib.sha256(file_content).hexdigest()
+
+    @staticmethod
+    def hash_chunk(text: str):
+        """
+        Calcula el hash estable del contenido de un pedazo de texto.
+
+        :return: Hash SHA-256 en hexadecimal.
+        """
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def chunk_id(category, source, chunk_hash):
+        """
+        Construye el identificador de un pedazo a partir de la categoría, el documento de origen y su contenido,
+        de modo que el mismo pedazo siempre obtiene el mismo identificador.
+        """
+        return hashlib.sha256(f"{category}\0{source}\0{chunk_hash}".encode("utf-8")).hexdigest()
+
+    def iter_chunks(self, pages, category, source=""):
+        """
+        Divide cada página en pedazos a medida que se va leyendo el documento.
+
+        :return: Generador de Document con la categoría, el documento, la página de origen, la posición del
+        pedazo dentro de la página y el hash del contenido en sus metadatos.
+        """
+        return self.split_pages(self._text_splitter, pages, category, source)
+
+    @classmethod
+    def split_pages(cls, text_splitter, pages, category, source=""):
+        """
+        Divide las páginas con el divisor indicado; permite dividir documentos en procesos que no cargan el
+        modelo de incrustaciones (ingesta masiva).
+
+        :return: Generador de Document, igual que iter_chunks.
+        """
+        for page_number, text in pages:
+            search_from = 0
+
+            for chunk in text_splitter.split_text(text):
+                # La posición permite unir pedazos contiguos al armar el contexto del modelo.
+                start_index = text.find(chunk, search_from)
+                search_from = start_index + 1 if start_index >= 0 else search_from
+
+                yield Document(page_content=chunk, metadata={"category": category,
+                                                             "source": source,
+                                                             "page": page_number,
+                                                             "start_index": start_index,
+                                                             "chunk_hash": cls.hash_chunk(chunk)})
+
+    @staticmethod
+    def iter_batches(documents, batch_size: int):
+        """
+        Agrupa un flujo de documentos en lotes de tamaño fijo.
+
+        :return: Generador de listas con a lo sumo batch_size documentos.
+        """
+        documents = iter(documents)
+
+        while True:
+            batch = list(islice(documents, batch_size))
+
+            if not batch:
+                break
+
+            yield batch
+
     def create_embedding(self, text, category):
         try:
             text_chunks = self._text_splitter.split_text(text)
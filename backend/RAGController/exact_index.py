@@ -0,0 +1,256 @@
+# IMPORTACIÓN DE MÓDULOS
+import json
+import os
+import shutil
+import threading
+import time
+import numpy as np
+
+
+class ExactIndex:
+    """
+    Índice de búsqueda exacta de un entrenamiento, abierto en modo de solo lectura.
+
+    Las incrustaciones forman una matriz contigua (float16, o int8 con una escala por renglón) en un archivo
+    mapeado en memoria, y los textos y metadatos se guardan concatenados con un archivo de posiciones. Abrirlo
+    solo lee el encabezado: las páginas de los archivos se cargan al consultarlas y el sistema operativo las
+    comparte (caché de páginas) entre todos los procesos que abren el mismo índice.
+    """
+
+    # Renglones que se convierten a float32 a la vez al calcular los productos punto.
+    BLOCK_ROWS = 8192
+
+    def __init__(self, path):
+        with open(os.path.join(path, "index.json"), "r", encoding="utf-8") as file:
+            self.header = json.load(file)
+
+        count, dim = self.header["count"], self.header["dim"]
+        self.count = count
+        self.vectors = np.memmap(os.path.join(path, "vectors.bin"), dtype=self.header["dtype"], mode="r",
+                                 shape=(count, dim))
+        self.scales = np.memmap(os.path.join(path, "scales.bin"), dtype=np.float32, mode="r", shape=(count,)) \
+            if self.header["dtype"] == "int8" else None
+        self.__texts = self._open_blob(path, "texts", count)
+        self.__records = self._open_blob(path, "records", count)
+
+    @staticmethod
+    def _open_blob(path, name, count):
+        offsets = np.memmap(os.path.join(path, f"{name}.offsets"), dtype=np.int64, mode="r", shape=(count + 1,))
+        size = int(offsets[-1])
+        data = np.memmap(os.path.join(path, f"{name}.bin"), dtype=np.uint8, mode="r", shape=(size,)) \
+            if size else np.zeros(0, dtype=np.uint8)
+        return offsets, data
+
+    @staticmethod
+    def _read(blob, row):
+        offsets, data = blob
+        return data[int(offsets[row]):int(offsets[row + 1])].tobytes().decode("utf-8")
+
+    def scores(self, query_vectors):
+        """
+        Retorna la similitud coseno de cada pedazo con cada consulta (matriz pedazos x consultas).
+        """
+        queries = np.asarray(query_vectors, dtype=np.float32).T
+        scores = np.empty((self.count, queries.shape[1]), dtype=np.float32)
+
+        for start in range(0, self.count, self.BLOCK_ROWS):
+            block = slice(start, start + self.BLOCK_ROWS)
+            scores[block] = self.vectors[block].astype(np.float32) @ queries
+
+        if self.scales is not None:
+            scores *= self.scales[:, None]
+
+        return scores
+
+    def query(self, query_vectors, k):
+        """
+        Retorna los k pedazos más similares a cada consulta, en el mismo formato que la consulta de Chroma.
+
+        Las distancias son L2 al cuadrado (2 - 2 * similitud, con vectores normalizados), como las de las
+        colecciones de Chroma.
+        """
+        results = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        scores = self.scores(query_vectors)
+        k = min(k, self.count)
+
+        for column in scores.T:
+            top = np.argpartition(-column, k - 1)[:k] if k < self.count else np.arange(self.count)
+            top = top[np.argsort(-column[top], kind="stable")]
+            records = [json.loads(self._read(self.__records, row)) for row in top]
+            results["ids"].append([record["id"] for record in records])
+            results["metadatas"].append([record["metadata"] for record in records])
+            results["documents"].append([self._read(self.__texts, row) for row in top])
+            results["distances"].append([float(2 - 2 * column[row]) for row in top])
+
+        return results
+
+
+class ExactIndexStore:
+    """
+    Administra los índices de búsqueda exacta de los entrenamientos, guardados en una carpeta por colección.
+
+    Cada escritura genera una versión nueva del índice en su propia carpeta y después cambia el archivo CURRENT
+    de forma atómica, por lo que las consultas en curso (de este u otros procesos) siguen leyendo la versión
+    anterior hasta terminar. Por ello la versión anterior siempre se conserva, y las más antiguas se eliminan en
+    una escritura posterior, una vez que pasaron retain_seconds desde que fueron reemplazadas.
+    """
+
+    DTYPES = ("float16", "int8")
+
+    def __init__(self, root, dtype="float16", retain_seconds=300):
+        if dtype not in self.DTYPES:
+            raise ValueError(f"Tipo de índice exacto no válido: {dtype}.")
+
+        self.__root = root  # Carpeta con un índice por colección.
+        self.__dtype = dtype    # Tipo de los vectores almacenados.
+        self.__retain_seconds = retain_seconds  # Segundos que se conserva una versión reemplazada.
+        self.__indexes = {}     # colección -> (versión, ExactIndex)
+        self.__lock = threading.Lock()
+        os.makedirs(self.__root, exist_ok=True)
+
+    def _current(self, name):
+        try:
+            with open(os.path.join(self.__root, name, "CURRENT"), "r", encoding="utf-8") as file:
+                return file.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def get(self, name):
+        """
+        Retorna el índice vigente de una colección, o None si no existe.
+        """
+        version = self._current(name)
+
+        if version is None:
+            return None
+
+        with self.__lock:
+            cached = self.__indexes.get(name)
+
+            if cached is None or cached[0] != version:
+                cached = self.__indexes[name] = (version, ExactIndex(os.path.join(self.__root, name, version)))
+
+            return cached[1]
+
+    def info(self, name):
+        """
+        Retorna el encabezado del índice vigente de una colección, o None si no existe.
+        """
+        version = self._current(name)
+
+        if version is None:
+            return None
+
+        with open(os.path.join(self.__root, name, version, "index.json"), "r", encoding="utf-8") as file:
+            return json.load(file)
+
+    def _quantize(self, vectors):
+        # Retorna los bytes de los vectores y, para int8, los de la escala de cada renglón.
+        if self.__dtype == "float16":
+            return vectors.astype(np.float16).tobytes(), b""
+
+        scales = np.abs(vectors).max(axis=1) / 127
+        scales[scales == 0] = 1.0
+        quantized = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+        return quantized.tobytes(), scales.astype(np.float32).tobytes()
+
+    def write(self, name, batches, model, source_version=None):
+        """
+        Escribe una versión nueva del índice de una colección a partir de lotes de pedazos.
+
+        :param batches: Iterable de tuplas (ids, incrustaciones, textos, metadatos) de cada lote.
+        :return: Número de pedazos del índice.
+        """
+        version = f"v{time.time_ns()}"
+        path = os.path.join(self.__root, name, version)
+        os.makedirs(path)
+        count, dim = 0, None
+        text_offsets, record_offsets = [0], [0]
+
+        with open(os.path.join(path, "vectors.bin"), "wb") as vectors_file, \
+                open(os.path.join(path, "scales.bin"), "wb") as scales_file, \
+                open(os.path.join(path, "texts.bin"), "wb") as texts_file, \
+                open(os.path.join(path, "records.bin"), "wb") as records_file:
+
+            for ids, embeddings, documents, metadatas in batches:
+                if not len(ids):
+                    continue
+
+                vectors = np.asarray(embeddings, dtype=np.float32)
+                dim = vectors.shape[1]
+                vector_bytes, scale_bytes = self._quantize(vectors)
+                vectors_file.write(vector_bytes)
+                scales_file.write(scale_bytes)
+
+                for chunk_id, document, metadata in zip(ids, documents, metadatas):
+                    text = (document or "").encode("utf-8")
+                    record = json.dumps({"id": chunk_id, "metadata": metadata or {}},
+                                        ensure_ascii=False).encode("utf-8")
+                    texts_file.write(text)
+                    records_file.write(record)
+                    text_offsets.append(text_offsets[-1] + len(text))
+                    record_offsets.append(record_offsets[-1] + len(record))
+
+                count += len(ids)
+
+        # Un índice sin pedazos no puede mapearse en memoria; no se publica.
+        if not count:
+            shutil.rmtree(path, ignore_errors=True)
+            return 0
+
+        np.asarray(text_offsets, dtype=np.int64).tofile(os.path.join(path, "texts.offsets"))
+        np.asarray(record_offsets, dtype=np.int64).tofile(os.path.join(path, "records.offsets"))
+
+        with open(os.path.join(path, "index.json"), "w", encoding="utf-8") as file:
+            json.dump({"version": 1, "dtype": self.__dtype, "dim": dim or 0, "count": count, "model": model,
+                       "source_version": source_version, "created_at": time.time()}, file)
+
+        # Se publica la versión nueva y se eliminan las versiones reemplazadas que ya no pueden estar en uso.
+        current_path = os.path.join(self.__root, name, "CURRENT")
+
+        with open(f"{current_path}.tmp", "w", encoding="utf-8") as file:
+            file.write(version)
+
+        os.replace(f"{current_path}.tmp", current_path)
+        self._prune(name, version)
+        return count
+
+    @staticmethod
+    def _version_ns(version):
+        # Instante (en nanosegundos) en que se inició la escritura de una versión, tomado de su nombre.
+        try:
+            return int(version[1:]) if version.startswith("v") else None
+        except ValueError:
+            return None
+
+    def _published_at(self, name, version):
+        # Instante en que se publicó una versión: su encabezado se escribe justo antes de cambiar CURRENT.
+        try:
+            return os.path.getmtime(os.path.join(self.__root, name, version, "index.json"))
+        except OSError:
+            return self._version_ns(version) / 1e9
+
+    def _prune(self, name, current):
+        """
+        Elimina las versiones anteriores a la vigente, salvo la inmediatamente anterior (que las consultas en curso
+        pueden seguir leyendo) y las reemplazadas hace menos de retain_seconds.
+        """
+        current_ns = self._version_ns(current)
+        older = sorted((entry for entry in os.listdir(os.path.join(self.__root, name))
+                        if self._version_ns(entry) is not None and self._version_ns(entry) < current_ns),
+                       key=self._version_ns)
+
+        # Cada versión dejó de usarse cuando se publicó la siguiente.
+        for entry, replacement in zip(older[:-1], older[1:]):
+            if time.time() - self._published_at(name, replacement) >= self.__retain_seconds:
+                # En Windows no se pueden eliminar archivos mapeados; se reintenta en la siguiente escritura.
+                shutil.rmtree(os.path.join(self.__root, name, entry), ignore_errors=True)
+
+    def drop(self, name):
+        """
+        Elimina todas las versiones del índice de una colección.
+        """
+        with self.__lock:
+            self.__indexes.pop(name, None)
+
+        shutil.rmtree(os.path.join(self.__root, name), ignore_errors=True)
@@ -0,0 +1,307 @@
+# IMPORTACIÓN DE MÓDULOS
+import asyncio
+import bisect
+import itertools
+import math
+import threading
+import time
+import ollama
+
+
+class QueueFullError(Exception):
+    """
+    La cola de generación está llena; retry_after indica en cuántos segundos conviene reintentar.
+    """
+
+    def __init__(self, retry_after):
+        super().__init__(f"El servicio está saturado, intenta de nuevo en {retry_after} segundos.")
+        self.retry_after = retry_after
+
+
+def parse_hosts(value):
+    """
+    Convierte una lista de servidores de Ollama separados por comas; si está vacía se usa el servidor por defecto
+    (variable OLLAMA_HOST).
+    """
+    hosts = [host.strip() for host in value.split(",") if host.strip()]
+    return hosts or [None]
+
+
+class OllamaEndpoint:
+    """
+    Servidor de Ollama con sus clientes y las generaciones en curso de cada modelo.
+    """
+
+    def __init__(self, host=None):
+        self.host = host
+        self.client = ollama.Client(host=host)
+        self.async_client = ollama.AsyncClient(host=host)
+        self.active = {}    # modelo -> generaciones en curso
+
+    @property
+    def name(self):
+        return self.host or "default"
+
+    def load(self):
+        return sum(self.active.values())
+
+
+class Lease:
+    """
+    Turno de generación concedido en un servidor de Ollama; debe liberarse al terminar la generación.
+    """
+
+    def __init__(self, scheduler, endpoint, model, queued_seconds):
+        self.endpoint = endpoint
+        self.model = model
+        self.queued_seconds = queued_seconds
+        self.acquired_at = time.perf_counter()
+        self.__scheduler = scheduler
+        self.__released = False
+        self.__lock = threading.Lock()
+
+    def release(self):
+        with self.__lock:
+            if self.__released:
+                return
+
+            self.__released = True
+
+        self.__scheduler._release(self)
+
+
+class Ticket:
+    """
+    Lugar en la cola de generación. Se puede esperar desde un hilo (wait) o desde el ciclo de eventos
+    (await_grant); al concederse, lease contiene el turno.
+    """
+
+    def __init__(self, scheduler, model, priority, sequence):
+        self.model = model
+        self.priority = priority
+        self.sequence = sequence
+        self.enqueued_at = time.perf_counter()
+        self.lease = None
+        self.__scheduler = scheduler
+        self.__granted = threading.Event()
+        self.__waiters = []     # [(ciclo de eventos, futuro)]
+        self.__lock = threading.Lock()
+
+    @property
+    def sort_key(self):
+        return self.priority, self.sequence
+
+    def _grant(self, lease):
+        with self.__lock:
+            self.lease = lease
+            self.__granted.set()
+            waiters, self.__waiters = self.__waiters, []
+
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(self._wake, future)
+
+    @staticmethod
+    def _wake(future):
+        if not future.done():
+            future.set_result(None)
+
+    def position(self):
+        """
+        Retorna la posición en la cola (1 = el siguiente en ser atendido) o 0 si ya se concedió el turno.
+        """
+        return self.__scheduler._position(self)
+
+    def wait(self, timeout=None):
+        """
+        Espera el turno bloqueando el hilo.
+
+        :return: True si se concedió el turno antes del tiempo límite.
+        """
+        return self.__granted.wait(timeout)
+
+    async def await_grant(self, timeout=None):
+        """
+        Espera el turno sin bloquear el ciclo de eventos.
+
+        :return: True si se concedió el turno antes del tiempo límite.
+        """
+        loop = asyncio.get_running_loop()
+
+        with self.__lock:
+            if self.__granted.is_set():
+                return True
+
+            future = loop.create_future()
+            self.__waiters.append((loop, future))
+
+        try:
+            await asyncio.wait_for(future, timeout)
+            return True
+        except asyncio.TimeoutError:
+            return self.__granted.is_set()
+
+    def cancel(self):
+        """
+        Retira el lugar de la cola o, si ya se concedió, libera el turno.
+        """
+        self.__scheduler._cancel(self)
+
+        if self.lease is not None:
+            self.lease.release()
+
+
+class GenerationScheduler:
+    """
+    Control de admisión de las generaciones de Ollama.
+
+    Cada modelo tiene un número fijo de generaciones simultáneas por servidor de Ollama; las peticiones que
+    exceden ese número esperan en una cola acotada, ordenada por prioridad (las interactivas antes que las de
+    lote) y por orden de llegada. Con la cola llena la petición se rechaza de inmediato con una estimación del
+    tiempo para reintentar, en lugar de acumular esperas que terminan en el tiempo límite del proxy. Con varios
+    servidores, cada turno se concede en el que tenga menos generaciones en curso.
+    """
+
+    INTERACTIVE = "interactive"
+    BATCH = "batch"
+    PRIORITIES = {INTERACTIVE: 0, BATCH: 1}
+
+    def __init__(self, hosts=(None,), slots_per_model=2, model_slots=None, max_queue=32,
+                 default_generation_seconds=10.0):
+        self.__endpoints = [OllamaEndpoint(host) for host in hosts]
+        self.__slots_per_model = slots_per_model    # Generaciones simultáneas de un modelo en cada servidor.
+        self.__model_slots = model_slots or {}  # modelo -> generaciones simultáneas por servidor
+        self.__max_queue = max_queue    # Peticiones en espera antes de rechazar.
+        self.__queue = []   # Tickets en espera, ordenados por (prioridad, llegada).
+        self.__sequence = itertools.count()
+        self.__generation_seconds = {}  # modelo -> duración promedio (móvil) de una generación
+        self.__default_generation_seconds = default_generation_seconds
+        self.__stats = {"granted": 0, "queued": 0, "rejected": 0, "timed_out": 0}
+        self.__lock = threading.Lock()
+
+    @classmethod
+    def parse_priority(cls, value):
+        return value if value in cls.PRIORITIES else cls.INTERACTIVE
+
+    def get_endpoints(self):
+        return [endpoint.name for endpoint in self.__endpoints]
+
+    def get_ollama_endpoints(self):
+        """
+        Retorna los servidores de Ollama (OllamaEndpoint), para consultarlos con el cliente de cada uno.
+        """
+        return list(self.__endpoints)
+
+    def _slots(self, model):
+        return self.__model_slots.get(model, self.__slots_per_model)
+
+    def _free_endpoint(self, model):
+        # Servidor con un turno libre para el modelo y menos generaciones en curso, o None.
+        free = [endpoint for endpoint in self.__endpoints if endpoint.active.get(model, 0) < self._slots(model)]
+        return min(free, key=OllamaEndpoint.load) if free else None
+
+    def _lease(self, ticket, endpoint):
+        # Se llama con el candado adquirido.
+        endpoint.active[ticket.model] = endpoint.active.get(ticket.model, 0) + 1
+        self.__stats["granted"] += 1
+        return Lease(self, endpoint, ticket.model, time.perf_counter() - ticket.enqueued_at)
+
+    def retry_after(self, model):
+        """
+        Estima en cuántos segundos se desocupará un lugar en la cola para el modelo.
+        """
+        with self.__lock:
+            return self._retry_after(model)
+
+    def _retry_after(self, model):
+        seconds = self.__generation_seconds.get(model, self.__default_generation_seconds)
+        slots = self._slots(model) * len(self.__endpoints)
+        return max(1, math.ceil(seconds * (len(self.__queue) + 1) / max(1, slots)))
+
+    def admission(self, model):
+        """
+        Indica si una petición para el modelo sería admitida en este momento.
+
+        :return: None si se admite o los segundos recomendados para reintentar.
+        """
+        with self.__lock:
+            if self._free_endpoint(model) is not None or len(self.__queue) < self.__max_queue:
+                return None
+
+            self.__stats["rejected"] += 1
+            return self._retry_after(model)
+
+    def submit(self, model, priority=INTERACTIVE):
+        """
+        Solicita un turno de generación para el modelo; si hay uno libre se concede de inmediato.
+
+        :return: Ticket con el lugar en la cola.
+        :raises QueueFullError: Si no hay turnos libres y la cola está llena.
+        """
+        with self.__lock:
+            ticket = Ticket(self, model, self.PRIORITIES[self.parse_priority(priority)], next(self.__sequence))
+            endpoint = self._free_endpoint(model)
+
+            if endpoint is not None:
+                ticket._grant(self._lease(ticket, endpoint))
+                return ticket
+
+            if len(self.__queue) >= self.__max_queue:
+                self.__stats["rejected"] += 1
+                raise QueueFullError(self._retry_after(model))
+
+            bisect.insort(self.__queue, ticket, key=lambda item: item.sort_key)
+            self.__stats["queued"] += 1
+            return ticket
+
+    def _dispatch(self):
+        # Concede los turnos libres a los tickets en espera, en orden de prioridad; un ticket de un modelo sin
+        # turnos libres no detiene a los de otros modelos. Se llama con el candado adquirido.
+        for ticket in list(self.__queue):
+            endpoint = self._free_endpoint(ticket.model)
+
+            if endpoint is not None:
+                self.__queue.remove(ticket)
+                ticket._grant(self._lease(ticket, endpoint))
+
+    def _release(self, lease):
+        elapsed = time.perf_counter() - lease.acquired_at
+
+        with self.__lock:
+            lease.endpoint.active[lease.model] -= 1
+            previous = self.__generation_seconds.get(lease.model)
+            self.__generation_seconds[lease.model] = elapsed if previous is None else 0.8 * previous + 0.2 * elapsed
+            self._dispatch()
+
+    def _cancel(self, ticket):
+        with self.__lock:
+            if ticket in self.__queue:
+                self.__queue.remove(ticket)
+
+    def _position(self, ticket):
+        with self.__lock:
+            if ticket not in self.__queue:
+                return 0
+
+            return 1 + sum(1 for other in self.__queue
+                           if other.model == ticket.model and other.sort_key < ticket.sort_key)
+
+    def record_timeout(self):
+        with self.__lock:
+            self.__stats["timed_out"] += 1
+
+    def stats(self):
+        """
+        Retorna el estado del planificador: generaciones en curso por servidor y peticiones en espera.
+        """
+        with self.__lock:
+            names = {value: name for name, value in self.PRIORITIES.items()}
+            queued = {name: 0 for name in self.PRIORITIES}
+
+            for ticket in self.__queue:
+                queued[names[ticket.priority]] += 1
+
+            return {**self.__stats,
+                    "max_queue": self.__max_queue,
+                    "queue": queued,
+                    "endpoints": {endpoint.name: {model: count for model, count in endpoint.active.items() if count}
+                                  for endpoint in self.__endpoints}}
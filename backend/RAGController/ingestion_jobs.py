@@ -0,0 +1,476 @@
+# IMPORTACIÓN DE MÓDULOS
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+class IngestionCancelled(Exception):
+    """
+    Excepción lanzada dentro del proceso de ingesta cuando el trabajo fue cancelado.
+    """
+
+
+class IngestionProgress:
+    """
+    Lleva el avance de una ingesta y permite solicitar su cancelación.
+
+    El proceso de ingesta reporta las páginas y pedazos procesados, y consulta entre lotes
+    si debe detenerse.
+    """
+
+    def __init__(self):
+        self.pages = 0
+        self.chunks = 0
+        self.__cancel_event = threading.Event()
+
+    def add_pages(self, count=1):
+        self.pages += count
+
+    def add_chunks(self, count):
+        self.chunks += count
+
+    def cancel(self):
+        self.__cancel_event.set()
+
+    def is_cancelled(self):
+        return self.__cancel_event.is_set()
+
+    def check_cancelled(self):
+        """
+        :raises IngestionCancelled: Si se solicitó la cancelación del trabajo.
+        """
+        if self.is_cancelled():
+            raise IngestionCancelled()
+
+
+class IngestionJob:
+    """
+    Trabajo de ingesta (creación o actualización de un entrenamiento) procesado en segundo plano.
+    """
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+    def __init__(self, kind, category, source):
+        self.id = uuid.uuid4().hex
+        self.kind = kind    # "create", "update" o "delete" (este último solo en la cola compartida)
+        self.category = category
+        self.source = source
+        self.state = self.QUEUED
+        self.progress = IngestionProgress()
+        self.message = None     # Mensaje final retornado por la ingesta.
+        self.error = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.future = None
+
+    @classmethod
+    def from_row(cls, row):
+        """
+        Construye el trabajo a partir de un registro de la cola compartida (SharedIngestionQueue).
+        """
+        job = cls(row["kind"], row["category"], row["source"])
+        job.id = row["id"]
+        job.state = row["state"]
+        job.progress.pages = row["pages"]
+        job.progress.chunks = row["chunks"]
+        job.message = row["message"]
+        job.error = row["error"]
+        job.submitted_at = row["submitted_at"]
+        job.started_at = row["started_at"]
+        job.finished_at = row["finished_at"]
+        return job
+
+    def is_finished(self):
+        return self.state in (self.COMPLETED, self.FAILED, self.CANCELLED)
+
+    def to_dict(self):
+        """
+        Retorna el estado del trabajo en un formato serializable.
+        """
+        elapsed = None
+
+        if self.started_at is not None:
+            elapsed = (self.finished_at or time.time()) - self.started_at
+
+        return {"id": self.id,
+                "kind": self.kind,
+                "category": self.category,
+                "source": self.source,
+                "state": self.state,
+                "pages_processed": self.progress.pages,
+                "chunks_processed": self.progress.chunks,
+                "elapsed_seconds": elapsed,
+                "chunks_per_second": self.progress.chunks / elapsed if elapsed else 0.0,
+                "message": self.message,
+                "error": self.error,
+                "submitted_at": self.submitted_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at}
+
+
+class IngestionJobManager:
+    """
+    Cola de trabajos de ingesta atendida por un grupo acotado de hilos.
+
+    Las peticiones HTTP solo registran el trabajo y retornan su identificador; la extracción,
+    división e incrustación se realizan en segundo plano.
+    """
+
+    def __init__(self, max_workers=2, max_queued=16, max_finished=100):
+        self.__executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ingestion")
+        self.__max_queued = max_queued  # Trabajos en espera permitidos.
+        self.__max_finished = max_finished  # Trabajos terminados que se conservan para consulta.
+        self.__jobs = OrderedDict()     # id -> IngestionJob
+        self.__lock = threading.Lock()
+
+    def submit(self, kind, category, source, task):
+        """
+        Registra un trabajo de ingesta.
+
+        :param task: Función que recibe el IngestionProgress del trabajo y retorna (status, mensaje).
+        :return: Tupla (status, trabajo o mensaje de error).
+        """
+        with self.__lock:
+            queued = sum(1 for job in self.__jobs.values() if job.state == IngestionJob.QUEUED)
+
+            if queued >= self.__max_queued:
+                return False, "La cola de entrenamientos está llena, intenta más tarde."
+
+            job = IngestionJob(kind, category, source)
+            self.__jobs[job.id] = job
+            self._prune()
+
+        job.future = self.__executor.submit(self._run, job, task)
+        return True, job
+
+    def _run(self, job, task):
+        if job.progress.is_cancelled():
+            job.state = IngestionJob.CANCELLED
+            job.finished_at = time.time()
+            return
+
+        job.state = IngestionJob.RUNNING
+        job.started_at = time.time()
+
+        try:
+            status, message = task(job.progress)
+            job.message = message
+
+            if job.progress.is_cancelled():
+                job.state = IngestionJob.CANCELLED
+            else:
+                job.state = IngestionJob.COMPLETED if status else IngestionJob.FAILED
+                job.error = None if status else message
+
+        except Exception as error:
+            print(f">>> Error en el trabajo de ingesta {job.id}: {error}.")
+            job.state = IngestionJob.FAILED
+            job.error = str(error)
+
+        finally:
+            job.finished_at = time.time()
+
+    def _prune(self):
+        """
+        Descarta los trabajos terminados más antiguos. Debe invocarse con el candado adquirido.
+        """
+        finished = [job_id for job_id, job in self.__jobs.items() if job.is_finished()]
+
+        for job_id in finished[:max(len(finished) - self.__max_finished, 0)]:
+            del self.__jobs[job_id]
+
+    def get(self, job_id):
+        """
+        Retorna un trabajo por su identificador, o None si no existe.
+        """
+        with self.__lock:
+            return self.__jobs.get(job_id)
+
+    def list(self):
+        """
+        Retorna todos los trabajos conocidos, del más antiguo al más reciente.
+        """
+        with self.__lock:
+            return list(self.__jobs.values())
+
+    def cancel(self, job_id):
+        """
+        Solicita la cancelación de un trabajo en espera o en ejecución.
+
+        :return: Tupla (status, mensaje).
+        """
+        job = self.get(job_id)
+
+        if job is None:
+            return False, "El trabajo no existe."
+
+        if job.is_finished():
+            return False, f"El trabajo ya terminó con estado {job.state}."
+
+        job.progress.cancel()
+
+        # Si el trabajo aún no inicia, se retira de la cola.
+        if job.future is not None and job.future.cancel():
+            job.state = IngestionJob.CANCELLED
+            job.finished_at = time.time()
+
+        return True, "Se solicitó la cancelación del trabajo."
+
+
+class SharedIngestionProgress(IngestionProgress):
+    """
+    Avance de un trabajo de la cola compartida: se guarda en la base de datos cada cierto tiempo y la
+    cancelación solicitada desde otro proceso se consulta en ella. Si el proceso pierde el turno de escritor,
+    el trabajo se detiene como si se hubiera cancelado, para que no haya dos procesos escribiendo.
+    """
+
+    def __init__(self, queue, job_id, interval=1.0):
+        super().__init__()
+        self.__queue = queue
+        self.__job_id = job_id
+        self.__interval = interval  # Segundos entre cada guardado del avance y consulta de la cancelación.
+        self.__saved_at = 0.0
+        self.__checked_at = 0.0
+        self.lost_writer = False    # El trabajo se detuvo porque el proceso perdió el turno de escritor.
+
+    def add_chunks(self, count):
+        super().add_chunks(count)
+
+        if time.time() - self.__saved_at >= self.__interval:
+            self.__saved_at = time.time()
+            self.__queue._save_progress(self.__job_id, self.pages, self.chunks)
+
+    def is_cancelled(self):
+        if super().is_cancelled():
+            return True
+
+        if time.time() - self.__checked_at >= self.__interval:
+            self.__checked_at = time.time()
+
+            if not self.__queue._is_writer():
+                self.lost_writer = True
+                self.cancel()
+                return True
+
+            if self.__queue._cancel_requested(self.__job_id):
+                self.cancel()
+                return True
+
+        return False
+
+
+class SharedIngestionQueue:
+    """
+    Cola de trabajos de ingesta compartida entre los procesos trabajadores (ver SharedState).
+
+    Cualquier proceso registra trabajos y consulta su estado; solo el proceso con el turno de escritor los
+    ejecuta, con un grupo acotado de hilos, de modo que los índices tienen un único escritor mientras todos los
+    procesos atienden consultas. El contenido del archivo se guarda en la cola hasta que el trabajo termina.
+    """
+
+    COLUMNS = ("id, kind, category, source, state, pages, chunks, message, error, submitted_at, started_at, "
+               "finished_at")
+
+    def __init__(self, shared_state, handler, max_workers=2, max_queued=16, max_finished=100, poll_interval=1.0):
+        self.__state = shared_state
+        self.__handler = handler    # Función (tipo, categoría, documento, extensión, contenido, avance) -> estado.
+        self.__max_workers = max_workers    # Trabajos ejecutados a la vez por el escritor.
+        self.__max_queued = max_queued  # Trabajos en espera permitidos.
+        self.__max_finished = max_finished  # Trabajos terminados que se conservan para consulta.
+        self.__poll_interval = poll_interval    # Segundos entre revisiones de la cola sin avisos.
+        self.__wakeup = threading.Event()
+        self.__state.subscribe("jobs", self.__wakeup.set)
+
+    def start(self):
+        """
+        Inicia los hilos que ejecutan los trabajos mientras este proceso tenga el turno de escritor.
+        """
+        for number in range(self.__max_workers):
+            threading.Thread(target=self._work_loop, name=f"ingestion-{number}", daemon=True).start()
+
+    def submit(self, kind, category, source, file_extension=None, file_content=None):
+        """
+        Registra un trabajo de ingesta en la cola compartida.
+
+        :return: Tupla (status, trabajo o mensaje de error).
+        """
+        connection = self.__state.connect()
+        job = IngestionJob(kind, category, source)
+        connection.execute("BEGIN IMMEDIATE")
+
+        try:
+            queued = connection.execute("SELECT COUNT(*) FROM ingestion_jobs WHERE state = ?",
+                                        (IngestionJob.QUEUED,)).fetchone()[0]
+
+            if queued >= self.__max_queued:
+                connection.execute("ROLLBACK")
+                return False, "La cola de entrenamientos está llena, intenta más tarde."
+
+            connection.execute("INSERT INTO ingestion_jobs (id, kind, category, source, file_extension, "
+                               "file_content, state, submitted_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                               (job.id, kind, category, source, file_extension, file_content, job.state,
+                                job.submitted_at))
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+
+        self.__state.notify("jobs")
+        return True, job
+
+    def get(self, job_id):
+        """
+        Retorna un trabajo por su identificador, o None si no existe.
+        """
+        row = self.__state.connect().execute(f"SELECT {self.COLUMNS} FROM ingestion_jobs WHERE id = ?",
+                                             (job_id,)).fetchone()
+        return IngestionJob.from_row(row) if row else None
+
+    def list(self):
+        """
+        Retorna todos los trabajos conocidos, del más antiguo al más reciente.
+        """
+        rows = self.__state.connect().execute(f"SELECT {self.COLUMNS} FROM ingestion_jobs ORDER BY submitted_at")
+        return [IngestionJob.from_row(row) for row in rows]
+
+    def wait(self, job_id, timeout=60.0):
+        """
+        Espera a que un trabajo termine.
+
+        :return: El trabajo, o None si no terminó antes del tiempo límite.
+        """
+        deadline = time.time() + timeout
+
+        while time.time() < deadline:
+            job = self.get(job_id)
+
+            if job is None or job.is_finished():
+                return job
+
+            time.sleep(0.1)
+
+        return None
+
+    def cancel(self, job_id):
+        """
+        Solicita la cancelación de un trabajo en espera o en ejecución.
+
+        :return: Tupla (status, mensaje).
+        """
+        job = self.get(job_id)
+
+        if job is None:
+            return False, "El trabajo no existe."
+
+        if job.is_finished():
+            return False, f"El trabajo ya terminó con estado {job.state}."
+
+        connection = self.__state.connect()
+        # Si el trabajo aún no inicia, se retira de la cola; si ya inició, el escritor detecta la solicitud.
+        connection.execute("UPDATE ingestion_jobs SET state = ?, finished_at = ?, file_content = NULL "
+                           "WHERE id = ? AND state = ?", (IngestionJob.CANCELLED, time.time(), job_id,
+                                                          IngestionJob.QUEUED))
+        connection.execute("UPDATE ingestion_jobs SET cancel_requested = 1 WHERE id = ?", (job_id,))
+        return True, "Se solicitó la cancelación del trabajo."
+
+    def recover(self):
+        """
+        Marca como fallidos los trabajos que quedaron en ejecución en un escritor anterior (que se detuvo o
+        perdió el turno); se llama al obtener el turno de escritor. Los trabajos de este mismo proceso siguen
+        en ejecución y no se modifican.
+        """
+        self.__state.connect().execute("UPDATE ingestion_jobs SET state = ?, error = ?, finished_at = ?, "
+                                       "file_content = NULL WHERE state = ? AND owner IS NOT ?",
+                                       (IngestionJob.FAILED, "El proceso de escritura se detuvo.", time.time(),
+                                        IngestionJob.RUNNING, self.__state.owner))
+
+    def _claim(self):
+        # Toma el trabajo en espera más antiguo; retorna su registro completo o None.
+        connection = self.__state.connect()
+        connection.execute("BEGIN IMMEDIATE")
+
+        try:
+            row = connection.execute("SELECT * FROM ingestion_jobs WHERE state = ? ORDER BY submitted_at LIMIT 1",
+                                     (IngestionJob.QUEUED,)).fetchone()
+
+            if row is not None:
+                connection.execute("UPDATE ingestion_jobs SET state = ?, started_at = ?, owner = ? WHERE id = ?",
+                                   (IngestionJob.RUNNING, time.time(), self.__state.owner, row["id"]))
+
+            connection.execute("COMMIT")
+            return row
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+
+    def _work_loop(self):
+        while True:
+            try:
+                row = self._claim() if self.__state.is_writer() else None
+
+                if row is None:
+                    self.__wakeup.wait(self.__poll_interval)
+                    self.__wakeup.clear()
+                    continue
+
+                self._run(row)
+            except Exception as error:
+                print(f">>> Error en la cola compartida de ingesta: {error}.")
+                time.sleep(self.__poll_interval)
+
+    def _run(self, row):
+        progress = SharedIngestionProgress(self, row["id"])
+        state, message, error = IngestionJob.FAILED, None, None
+
+        try:
+            status, message = self.__handler(row["kind"], row["category"], row["source"], row["file_extension"],
+                                             row["file_content"], progress)
+
+            if progress.lost_writer:
+                error = "El proceso perdió el turno de escritor."
+            elif progress.is_cancelled():
+                state = IngestionJob.CANCELLED
+            else:
+                state = IngestionJob.COMPLETED if status else IngestionJob.FAILED
+                error = None if status else message
+
+        except Exception as e:
+            print(f">>> Error en el trabajo de ingesta {row['id']}: {e}.")
+            error = str(e)
+
+        finally:
+            # Solo se registra el resultado si el nuevo escritor no marcó ya el trabajo como fallido.
+            self.__state.connect().execute("UPDATE ingestion_jobs SET state = ?, message = ?, error = ?, pages = ?, "
+                                           "chunks = ?, finished_at = ?, file_content = NULL "
+                                           "WHERE id = ? AND state = ? AND owner = ?",
+                                           (state, message, error, progress.pages, progress.chunks, time.time(),
+                                            row["id"], IngestionJob.RUNNING, self.__state.owner))
+            self._prune()
+
+    def _prune(self):
+        """
+        Descarta los trabajos terminados más antiguos.
+        """
+        self.__state.connect().execute("DELETE FROM ingestion_jobs WHERE id IN (SELECT id FROM ingestion_jobs "
+                                       "WHERE state IN (?, ?, ?) ORDER BY submitted_at DESC LIMIT -1 OFFSET ?)",
+                                       (IngestionJob.COMPLETED, IngestionJob.FAILED, IngestionJob.CANCELLED,
+                                        self.__max_finished))
+
+    def _save_progress(self, job_id, pages, chunks):
+        self.__state.connect().execute("UPDATE ingestion_jobs SET pages = ?, chunks = ? WHERE id = ?",
+                                       (pages, chunks, job_id))
+
+    def _is_writer(self):
+        return self.__state.is_writer()
+
+    def _cancel_requested(self, job_id):
+        row = self.__state.connect().execute("SELECT cancel_requested FROM ingestion_jobs WHERE id = ?",
+                                             (job_id,)).fetchone()
+        return bool(row and row["cancel_requested"])
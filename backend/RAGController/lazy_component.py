@@ -0,0 +1,64 @@
+# IMPORTACIÓN DE MÓDULOS
+import threading
+import time
+
+
+class LazyComponent:
+    """
+    Componente que se construye hasta que se necesita (o en segundo plano al arrancar).
+
+    Permite que el servidor abra su puerto sin esperar la carga de dependencias pesadas y
+    reporta el estado de la carga para las verificaciones de disponibilidad.
+    """
+
+    PENDING = "pending"
+    LOADING = "loading"
+    READY = "ready"
+    FAILED = "failed"
+
+    def __init__(self, name, factory):
+        self.name = name
+        self.__factory = factory    # Función que construye el componente.
+        self.__instance = None
+        self.__state = self.PENDING
+        self.__error = None
+        self.__load_seconds = None
+        self.__lock = threading.Lock()
+
+    def get(self):
+        """
+        Retorna el componente, construyéndolo si aún no existe. Si otro hilo lo está construyendo,
+        espera a que termine.
+
+        :raises Exception: El error de la construcción, si falló.
+        """
+        if self.__instance is not None:
+            return self.__instance
+
+        with self.__lock:
+            if self.__instance is None:
+                self.__state = self.LOADING
+                started_at = time.perf_counter()
+
+                try:
+                    self.__instance = self.__factory()
+                    self.__state = self.READY
+                    self.__error = None
+                except Exception as error:
+                    # Se permite reintentar la construcción en la siguiente llamada.
+                    self.__state = self.FAILED
+                    self.__error = str(error)
+                    raise
+                finally:
+                    self.__load_seconds = time.perf_counter() - started_at
+
+        return self.__instance
+
+    def is_ready(self):
+        return self.__state == self.READY
+
+    def status(self):
+        """
+        Retorna el estado de la carga del componente.
+        """
+        return {"state": self.__state, "error": self.__error, "load_seconds": self.__load_seconds}
@@ -0,0 +1,280 @@
+# IMPORTACIÓN DE MÓDULOS
+import bisect
+import json
+import logging
+import math
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# Límites (en segundos) de los histogramas de latencia: de 1 ms a 2 minutos.
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# Límites de los histogramas de velocidad (tokens o pedazos por segundo).
+RATE_BUCKETS = (1, 2, 5, 10, 20, 30, 50, 75, 100, 200, 500, 1000, 2000, 5000)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+
+    if not pairs:
+        return ""
+
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value):
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+
+    return repr(float(value))
+
+
+class _Metric:
+    TYPE = None
+
+    def __init__(self, name, description, labels=()):
+        self.name = name
+        self.description = description
+        self.label_names = tuple(labels)
+        self._values = {}   # valores de las etiquetas -> valor de la métrica
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.TYPE}"]
+
+        with self._lock:
+            items = list(self._values.items())
+
+        for key, value in items:
+            lines.extend(self._render_sample(key, value))
+
+        return lines
+
+    def _render_sample(self, key, value):
+        return [f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"]
+
+
+class Counter(_Metric):
+    """
+    Contador que solo aumenta.
+    """
+    TYPE = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    """
+    Valor que puede subir o bajar (por ejemplo, flujos abiertos o tasa de aciertos de una caché).
+    """
+    TYPE = "gauge"
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    """
+    Histograma con límites fijos; cada observación solo incrementa un contador, por lo que su costo es mínimo.
+    """
+    TYPE = "histogram"
+
+    def __init__(self, name, description, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, description, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        position = bisect.bisect_left(self.buckets, value)
+
+        with self._lock:
+            state = self._values.get(key)
+
+            if state is None:
+                # [conteos por límite (el último es +Inf), suma, total]
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+
+            state[0][position] += 1
+            state[1] += value
+            state[2] += 1
+
+    def _render_sample(self, key, value):
+        counts, total_sum, total_count = value[0][:], value[1], value[2]
+        lines, cumulative = [], 0
+
+        for bound, count in zip((*self.buckets, float("inf")), counts):
+            cumulative += count
+            labels = _format_labels(self.label_names, key, extra=(("le", _format_value(bound)),))
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+
+        labels = _format_labels(self.label_names, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(total_sum)}")
+        lines.append(f"{self.name}_count{labels} {total_count}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Registro de métricas del proceso, exportadas en el formato de texto de Prometheus.
+    """
+
+    def __init__(self):
+        self.__metrics = {}
+        self.__collectors = []  # Funciones que actualizan métricas calculadas justo antes de exportarlas.
+        self.__lock = threading.Lock()
+
+    def _register(self, metric_class, name, *args, **kwargs):
+        with self.__lock:
+            metric = self.__metrics.get(name)
+
+            if metric is None:
+                metric = self.__metrics[name] = metric_class(name, *args, **kwargs)
+
+            return metric
+
+    def counter(self, name, description, labels=()):
+        return self._register(Counter, name, description, labels)
+
+    def gauge(self, name, description, labels=()):
+        return self._register(Gauge, name, description, labels)
+
+    def histogram(self, name, description, labels=(), buckets=LATENCY_BUCKETS):
+        return self._register(Histogram, name, description, labels, buckets=buckets)
+
+    def add_collector(self, collector):
+        with self.__lock:
+            self.__collectors.append(collector)
+
+    def render(self):
+        """
+        Retorna todas las métricas en el formato de texto de Prometheus.
+        """
+        with self.__lock:
+            collectors = list(self.__collectors)
+            metrics = list(self.__metrics.values())
+
+        for collector in collectors:
+            try:
+                collector()
+            except Exception as error:
+                print(f">>> Error al actualizar las métricas: {error}.")
+
+        return "\n".join(line for metric in metrics for line in metric.render()) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.histogram("rag_stage_seconds", "Duración de cada etapa de una petición.", labels=("stage",))
+TIME_TO_FIRST_TOKEN = REGISTRY.histogram("rag_chat_time_to_first_token_seconds",
+                                         "Tiempo hasta el primer fragmento de la respuesta del chat.")
+TOKENS_PER_SECOND = REGISTRY.histogram("rag_chat_tokens_per_second", "Velocidad de generación del modelo.",
+                                       buckets=RATE_BUCKETS)
+CHAT_REQUESTS = REGISTRY.counter("rag_chat_requests_total", "Preguntas atendidas por el chat.",
+                                 labels=("outcome",))
+STREAMS_IN_FLIGHT = REGISTRY.gauge("rag_chat_streams_in_flight", "Respuestas del chat en curso.")
+CHUNKS_INGESTED = REGISTRY.counter("rag_ingested_chunks_total", "Pedazos incrustados y almacenados.")
+PAGES_EXTRACTED = REGISTRY.counter("rag_extracted_pages_total", "Páginas o bloques extraídos de documentos.",
+                                   labels=("format",))
+INGESTION_RATE = REGISTRY.histogram("rag_ingestion_chunks_per_second", "Pedazos por segundo de cada ingesta.",
+                                    buckets=RATE_BUCKETS)
+CONTEXT_TOKENS = REGISTRY.histogram("rag_context_tokens", "Tokens estimados del contexto del RAG enviado al modelo.",
+                                    buckets=(64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384))
+PROMPT_TOKENS = REGISTRY.counter("rag_prompt_tokens_total",
+                                 "Tokens del prompt evaluados por Ollama o ahorrados por reutilizar su caché.",
+                                 labels=("kind",))
+PROMPT_TOKENS_SAVED = REGISTRY.histogram("rag_prompt_eval_tokens_saved",
+                                         "Tokens del prompt no evaluados en un turno por reutilizar el prefijo.",
+                                         buckets=(0, 64, 128, 256, 512, 1024, 2048, 4096, 8192))
+LLM_QUEUE_LENGTH = REGISTRY.gauge("rag_llm_queue_length", "Peticiones en espera de un turno de generación.",
+                                  labels=("priority",))
+LLM_ACTIVE_GENERATIONS = REGISTRY.gauge("rag_llm_active_generations",
+                                        "Generaciones en curso en cada servidor de Ollama.", labels=("endpoint",))
+CACHE_HIT_RATE = REGISTRY.gauge("rag_cache_hit_rate", "Tasa de aciertos de cada caché.", labels=("cache",))
+CACHE_ENTRIES = REGISTRY.gauge("rag_cache_entries", "Entradas almacenadas en cada caché.", labels=("cache",))
+
+# Registro estructurado (una línea JSON por petición) con los tiempos de cada etapa.
+timing_logger = logging.getLogger("rag.timings")
+
+if not timing_logger.handlers:
+    _handler = logging.StreamHandler(sys.stdout)
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    timing_logger.addHandler(_handler)
+    timing_logger.propagate = False
+    timing_logger.setLevel(logging.INFO if os.getenv("TIMING_LOGS", "1") != "0" else logging.WARNING)
+
+
+@contextmanager
+def observe_stage(stage, timings=None):
+    """
+    Mide la duración de una etapa, la registra en el histograma y, si se indica, en el diccionario de tiempos
+    de la petición (en milisegundos).
+    """
+    started_at = time.perf_counter()
+
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started_at
+        STAGE_SECONDS.observe(elapsed, stage=stage)
+
+        if timings is not None:
+            timings[f"{stage}_ms"] = round(elapsed * 1000, 3)
+
+
+def timed_pages(pages, file_format):
+    """
+    Envuelve un generador de páginas para medir solo el tiempo de extracción (sin el de quien las consume)
+    y contar las páginas extraídas.
+    """
+    iterator = iter(pages)
+    elapsed, count = 0.0, 0
+
+    try:
+        while True:
+            started_at = time.perf_counter()
+
+            try:
+                page = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                elapsed += time.perf_counter() - started_at
+
+            count += 1
+            yield page
+    finally:
+        STAGE_SECONDS.observe(elapsed, stage=f"extract_{file_format}")
+        PAGES_EXTRACTED.inc(count, format=file_format)
+
+
+def log_timings(event, **fields):
+    """
+    Escribe una línea JSON con los tiempos de una petición.
+    """
+    if timing_logger.isEnabledFor(logging.INFO):
+        timing_logger.info(json.dumps({"event": event, "ts": round(time.time(), 3), **fields}, ensure_ascii=False,
+                                      default=str))
@@ -1,104 +1,194 @@
-from RAGController.ollama_singleton import OllamaSingleton
-import ollama
+import os
+import threading
+import time
+from RAGController.model_preloader import ModelPreloader
+from RAGController.generation_scheduler import GenerationScheduler, parse_hosts
+from RAGController.context_assembler import parse_budgets
+from RAGController.session_store import SessionStore
 
 
 class ModelManager:
     """
     Clase encargada de gestionar y aplicar la configuración personalizada
     del usuario al modelo.
-    """
-
-    def __init__(self):
-        # Se carga la lista de los modelos de Ollama disponibles.
-        self.__available_models = self.load_models()
-
-        # Variable para almacenar el modelo activo.
-        self.__selected_model = None
-
-        # Se obtiene la instancia de Ollama.
-        self.ollama_instance = OllamaSingleton()
 
-        # Se establece por defecto la cantidad de coincidencias del RAG a obtener.
-        self._k = 1
-
-        # Se establece por defecto la calidad de respuesta del modelo
-        self._level = 0
+    La lista de modelos y los servidores de Ollama son compartidos, mientras que el modelo activo,
+    el entrenamiento, k y el nivel se guardan por sesión del cliente (ver SessionStore).
+    """
 
-        # Variable para gestionar la colección sobre la cual se realizarán las búsquedas.
-        self._category = None
+    def __init__(self, retry_interval=5, models_ttl=int(os.getenv("OLLAMA_MODELS_TTL", "60")),
+                 keep_alive=os.getenv("OLLAMA_KEEP_ALIVE", "30m"),
+                 pinned_models=os.getenv("OLLAMA_PINNED_MODELS", ""), shared_state=None):
+        # Lista de los modelos de Ollama disponibles; se carga en segundo plano para no retrasar el arranque.
+        self.__available_models = []
+        self.__ollama_available = None     # None mientras no se haya consultado Ollama.
+        self.__ollama_error = None
+        self.__last_refresh = None
+        self.__retry_interval = retry_interval  # Segundos entre reintentos mientras Ollama no responda.
+        self.__models_ttl = models_ttl  # Segundos entre cada actualización de la lista de modelos.
+        self.__refresh_lock = threading.Lock()
+
+        # Control de admisión de las generaciones: turnos simultáneos por modelo en cada servidor de Ollama
+        # ("modelo=turnos,..." en OLLAMA_MODEL_SLOTS), cola acotada y servidores separados por comas en OLLAMA_HOSTS.
+        self.scheduler = GenerationScheduler(hosts=parse_hosts(os.getenv("OLLAMA_HOSTS", "")),
+                                             slots_per_model=int(os.getenv("OLLAMA_SLOTS_PER_MODEL", "2")),
+                                             model_slots=parse_budgets(os.getenv("OLLAMA_MODEL_SLOTS", "")),
+                                             max_queue=int(os.getenv("OLLAMA_MAX_QUEUE", "32")))
+
+        # Carga anticipada de modelos; los modelos fijados se indican separados por comas.
+        self._preloader = ModelPreloader(self.scheduler.get_ollama_endpoints(), keep_alive=keep_alive,
+                                         pinned_models=[model.strip() for model in pinned_models.split(",")
+                                                        if model.strip()])
+
+        # Configuraciones por sesión (modelo activo, colección, coincidencias del RAG y calidad de respuesta),
+        # compartidas entre procesos si se proporciona un SharedState.
+        self._sessions = SessionStore(shared_state=shared_state)
+
+        threading.Thread(target=self._refresh_loop, name="ollama-models", daemon=True).start()
+
+    def _refresh_loop(self):
+        # Actualiza la lista de modelos cada models_ttl segundos (o cada retry_interval mientras Ollama no
+        # responda), de modo que los modelos descargados después del arranque aparecen sin reiniciar.
+        while True:
+            if self.refresh_models():
+                try:
+                    self._preloader.sync(self.__available_models)
+                except Exception as error:
+                    print(f">>> Error al consultar los modelos cargados en Ollama: {error}.")
+
+            time.sleep(self.__models_ttl if self.__ollama_available else self.__retry_interval)
+
+    def refresh_models(self):
+        """
+        Método destinado a obtener la lista de modelos disponibles en los servidores de Ollama (OLLAMA_HOSTS).
+        Un servidor que no responde no impide listar los modelos de los demás.
+
+        :return: True si algún servidor de Ollama respondió.
+        """
+        with self.__refresh_lock:
+            models = []
+            errors = []
+
+            for endpoint in self.scheduler.get_ollama_endpoints():
+                try:
+                    listed = [llm['model'] for llm in endpoint.client.list()['models']]
+                except Exception as error:
+                    print(f"Error al cargar la lista de modelos de {endpoint.name}: {error}.")
+                    errors.append(f"{endpoint.name}: {error}")
+                    continue
+
+                # Los modelos presentes en varios servidores se listan una sola vez.
+                models += [model for model in listed if model not in models]
+
+            self.__ollama_available = len(errors) < len(self.scheduler.get_ollama_endpoints())
+            self.__ollama_error = "; ".join(errors) or None
+            self.__last_refresh = time.time()
+
+            if self.__ollama_available:
+                self.__available_models = models
+
+            return self.__ollama_available
 
-    @staticmethod
-    def load_models():
+    def get_list_models(self):
         """
-        Método destinado a obtener la lista de modelos de Ollama que se encuentran en
-        local.
+        Método destinado a retornar la lista de modelos disponibles en los servidores de Ollama.
         """
-        try:
-            return [llm['model'] for llm in ollama.list()['models']]
-        except Exception as error:
-            print(f"Error al cargar la lista de modelos locales: {error}.")
-            return []
+        return self.__available_models
 
-    def get_list_models(self):
+    def get_ollama_status(self):
         """
-        Método destinado a retornar la lista de modelos de Ollama que se encuentran en
-        local
+        Método que retorna el estado de la conexión con Ollama.
         """
-        return self.__available_models
+        state = {None: "pending", True: "ready", False: "failed"}[self.__ollama_available]
+        return {"state": state, "error": self.__ollama_error, "models": len(self.__available_models),
+                "last_refresh": self.__last_refresh, "pinned_models": list(self._preloader.get_pinned_models())}
 
     def change_selected_model(self, index:int):
         try:
             if 0 <= index < len(self.__available_models):
-                # Se asigna el nuevo modelo activo
-                self.__selected_model = self.__available_models[index]
-                return True, f"Se ha activado el modelo {self.__available_models[index]}."
+                # Se asigna el nuevo modelo activo y se carga en Ollama en segundo plano, para que la primera
+                # pregunta no espere la carga.
+                model = self.__available_models[index]
+                self._sessions.update(selected_model=model)
+                self._preloader.preload(model)
+                return True, f"Se ha activado el modelo {model}."
 
             return False, f"El modelo seleccionado no se encuentra dentro de la lista de modelos disponibles."
         except Exception as error:
             print(f">>> Error al cambiar el modelo activo: {error}.")
             return False, "Ocurrió un error inesperado al intentar cambiar el modelo."
 
+    def get_model_load_status(self, model):
+        """
+        Método para retornar el estado de carga de un modelo en Ollama.
+        """
+        return self._preloader.status(model)
+
+    def get_keep_alive(self, model):
+        """
+        Método para retornar el tiempo que Ollama debe mantener cargado el modelo después de usarlo.
+        """
+        return self._preloader.get_keep_alive(model)
+
     def set_k(self, k:int):
         """
         Método para asignar un nuevo valor a la variable encargada de gestionar la
         cantidad de coincidencias del RAG.
         """
-        self._k = k
+        self._sessions.update(k=k)
 
     def set_level(self, level:int):
         """
         Método para asignar un nuevo valor a la variable encargada de gestionar la calidad
         de las respuestas del modelo.
         """
-        self._level = level
+        self._sessions.update(level=level)
 
     def set_category(self, category:str):
         """
         Método para asignar un nuevo valor a la variable encargada de gestionar
         la colección sobre la cual se realizarán las búsquedas en la base de datos.
         """
-        self._category = category
+        self._sessions.update(category=category)
+
+    def set_retrieval_mode(self, mode:str):
+        """
+        Método para asignar el modo de recuperación del RAG (vectorial, léxico o híbrido).
+        """
+        self._sessions.update(retrieval_mode=mode)
+
+    def get_retrieval_mode(self):
+        """
+        Método para retornar el modo de recuperación del RAG.
+        """
+        return self._sessions.get().retrieval_mode
 
     def get_selected_model(self):
         """
         Método para retornar al modelo activo.
         """
-        return self.__selected_model
+        return self._sessions.get().selected_model
 
     def get_selected_category(self):
         """
         Método para retornar la categoría que se encuentra activa.
         """
-        return self._category
+        return self._sessions.get().category
 
     def get_k(self):
         """
         Método para retornar el número de coincidencias del RAG a obtener.
         """
-        return self._k
+        return self._sessions.get().k
 
     def get_level(self):
         """
         Método para retornar el nivel de respueta del modelo.
         """
-        return self._level
\ No newline at end of file
+        return self._sessions.get().level
+
+    def get_conversation(self):
+        """
+        Método para retornar el historial de la conversación de la sesión.
+        """
+        return self._sessions.get().conversation
\ No newline at end of file
@@ -0,0 +1,127 @@
+# IMPORTACIÓN DE MÓDULOS
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class ModelPreloader:
+    """
+    Carga en memoria los modelos de Ollama antes de que lleguen las preguntas y lleva el estado de cada uno.
+
+    Ollama carga un modelo con una petición sin contenido y lo mantiene en memoria durante el tiempo indicado
+    en keep_alive. Los modelos fijados se cargan con keep_alive=-1 (sin descarga) y se vuelven a cargar si
+    Ollama los descarta, por ejemplo por falta de memoria. Con varios servidores de Ollama, cada modelo se carga
+    en todos, ya que el planificador puede conceder el turno de generación en cualquiera de ellos.
+    """
+
+    NOT_LOADED = "not_loaded"
+    LOADING = "loading"
+    LOADED = "loaded"
+    FAILED = "failed"
+
+    # Orden en que se reporta el estado de un modelo cargado en varios servidores: el peor de ellos.
+    _PRECEDENCE = (FAILED, LOADING, NOT_LOADED, LOADED)
+
+    def __init__(self, endpoints, keep_alive="30m", pinned_models=(), max_workers=2):
+        self.__endpoints = list(endpoints)  # Servidores de Ollama (OllamaEndpoint), cada uno con su cliente.
+        self.__keep_alive = keep_alive  # Tiempo que Ollama mantiene cargado un modelo sin uso.
+        self.__pinned_models = tuple(pinned_models)     # Modelos que deben permanecer cargados.
+        self.__states = {}  # (servidor, modelo) -> {"state", "error", "load_seconds", "loaded_at"}
+        self.__lock = threading.Lock()
+        self.__executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ollama-preload")
+
+    def get_keep_alive(self, model):
+        """
+        Retorna el keep_alive que debe enviarse a Ollama al usar el modelo.
+        """
+        return -1 if model in self.__pinned_models else self.__keep_alive
+
+    def get_pinned_models(self):
+        return self.__pinned_models
+
+    def preload(self, model):
+        """
+        Solicita la carga del modelo en segundo plano en cada servidor donde no esté cargado ni cargándose.
+
+        :return: True si se solicitó la carga en algún servidor.
+        """
+        pending = []
+
+        with self.__lock:
+            for endpoint in self.__endpoints:
+                entry = self.__states.get((endpoint.name, model))
+
+                if entry is not None and entry["state"] in (self.LOADING, self.LOADED):
+                    continue
+
+                self.__states[(endpoint.name, model)] = {"state": self.LOADING, "error": None, "load_seconds": None,
+                                                         "loaded_at": None}
+                pending.append(endpoint)
+
+        for endpoint in pending:
+            self.__executor.submit(self._load, endpoint, model)
+
+        return bool(pending)
+
+    def _load(self, endpoint, model):
+        started_at = time.perf_counter()
+
+        try:
+            endpoint.client.generate(model=model, prompt="", keep_alive=self.get_keep_alive(model))
+            entry = {"state": self.LOADED, "error": None}
+        except Exception as error:
+            print(f">>> Error al cargar el modelo {model} en {endpoint.name}: {error}.")
+            entry = {"state": self.FAILED, "error": str(error)}
+
+        with self.__lock:
+            self.__states[(endpoint.name, model)] = {**entry, "load_seconds": time.perf_counter() - started_at,
+                                                     "loaded_at": time.time() if entry["state"] == self.LOADED
+                                                     else None}
+
+    def sync(self, available_models):
+        """
+        Actualiza el estado de los modelos con los que cada servidor de Ollama tiene realmente en memoria (un
+        modelo puede descargarse al vencer su keep_alive) y vuelve a cargar los modelos fijados que no lo estén.
+        Un servidor que no responde no impide actualizar los demás.
+        """
+        missing = set()
+
+        for endpoint in self.__endpoints:
+            try:
+                resident = {model['model'] for model in endpoint.client.ps()['models']}
+            except Exception as error:
+                print(f">>> Error al consultar los modelos cargados en {endpoint.name}: {error}.")
+                continue
+
+            with self.__lock:
+                for (name, model), entry in self.__states.items():
+                    if name != endpoint.name:
+                        continue
+
+                    if entry["state"] == self.LOADED and model not in resident:
+                        entry["state"] = self.NOT_LOADED
+
+                    elif entry["state"] == self.NOT_LOADED and model in resident:
+                        entry["state"] = self.LOADED
+
+            missing.update(model for model in self.__pinned_models if model not in resident)
+
+        for model in self.__pinned_models:
+            if model in available_models and model in missing:
+                self.preload(model)
+
+    def status(self, model):
+        """
+        Retorna el estado de carga de un modelo: el del servidor en peor estado, junto con el de cada servidor.
+        """
+        empty = {"state": self.NOT_LOADED, "error": None, "load_seconds": None, "loaded_at": None}
+
+        with self.__lock:
+            entries = {endpoint.name: dict(self.__states.get((endpoint.name, model)) or empty)
+                       for endpoint in self.__endpoints}
+
+        entry = dict(min(entries.values(), key=lambda item: self._PRECEDENCE.index(item["state"])))
+        entry["endpoints"] = {name: item["state"] for name, item in entries.items()}
+        entry["pinned"] = model in self.__pinned_models
+        entry["keep_alive"] = self.get_keep_alive(model)
+        return entry
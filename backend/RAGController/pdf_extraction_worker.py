@@ -0,0 +1,37 @@
+# IMPORTACIÓN DE MÓDULOS
+import fitz  # PyMuPDF para PDF
+
+# Este módulo solo depende de PyMuPDF para que los procesos trabajadores arranquen rápido
+# sin importar langchain ni el modelo de incrustaciones.
+
+_document = None    # Documento abierto por cada proceso trabajador.
+_document_path = None   # Ruta del documento abierto.
+
+
+def _open(path: str):
+    """
+    Abre el PDF indicado, reutilizándolo mientras el proceso siga recibiendo rangos del mismo documento.
+    """
+    global _document, _document_path
+
+    if path != _document_path:
+        if _document is not None:
+            _document.close()
+
+        # Se lee el contenido en lugar de abrir el archivo para no retenerlo abierto (y poder borrarlo).
+        with open(path, "rb") as file:
+            _document = fitz.open(stream=file.read(), filetype="pdf")
+
+        _document_path = path
+
+    return _document
+
+
+def extract_page_range(path: str, start: int, end: int):
+    """
+    Extrae el texto de las páginas [start, end) de un documento.
+
+    :return: Lista de tuplas (número de página, texto), numeradas desde 1.
+    """
+    document = _open(path)
+    return [(page_number + 1, document[page_number].get_text()) for page_number in range(start, end)]
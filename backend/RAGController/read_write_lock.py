@@ -0,0 +1,74 @@
+# IMPORTACIÓN DE MÓDULOS
+import threading
+from contextlib import contextmanager
+
+
+class ReadWriteLock:
+    """
+    Candado de lectura y escritura: varios lectores a la vez o un único escritor.
+
+    Cuando un escritor espera, los lectores nuevos esperan tras él para que las lecturas continuas no lo dejen
+    esperando indefinidamente; un hilo que ya tiene la lectura puede volver a adquirirla sin bloquearse.
+    """
+
+    def __init__(self):
+        self.__condition = threading.Condition(threading.Lock())
+        self.__readers = 0  # Lecturas en curso (contando las reentrantes).
+        self.__writer = False
+        self.__waiting_writers = 0
+        self.__local = threading.local()    # Lecturas en curso del hilo actual.
+
+    def _held(self):
+        return getattr(self.__local, "count", 0)
+
+    def acquire_read(self):
+        with self.__condition:
+            if not self._held():
+                while self.__writer or self.__waiting_writers:
+                    self.__condition.wait()
+
+            self.__readers += 1
+            self.__local.count = self._held() + 1
+
+    def release_read(self):
+        with self.__condition:
+            self.__readers -= 1
+            self.__local.count = self._held() - 1
+
+            if not self.__readers:
+                self.__condition.notify_all()
+
+    def acquire_write(self):
+        with self.__condition:
+            self.__waiting_writers += 1
+
+            try:
+                while self.__writer or self.__readers:
+                    self.__condition.wait()
+            finally:
+                self.__waiting_writers -= 1
+
+            self.__writer = True
+
+    def release_write(self):
+        with self.__condition:
+            self.__writer = False
+            self.__condition.notify_all()
+
+    @contextmanager
+    def read(self):
+        self.acquire_read()
+
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def write(self):
+        self.acquire_write()
+
+        try:
+            yield
+        finally:
+            self.release_write()
@@ -0,0 +1,287 @@
+# IMPORTACIÓN DE MÓDULOS
+import asyncio
+import re
+import threading
+import time
+import unicodedata
+
+
+def normalize_query(query: str):
+    """
+    Normaliza una pregunta para reconocer las que son iguales: minúsculas, sin acentos, sin signos de
+    puntuación y con un solo espacio entre palabras.
+    """
+    text = unicodedata.normalize("NFKD", query.lower())
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return " ".join(re.findall(r"\w+", text))
+
+
+class SharedGeneration:
+    """
+    Generación del modelo compartida por varias peticiones.
+
+    Los fragmentos se conservan mientras la generación está en curso, por lo que quien se une tarde recibe
+    también los que se produjeron antes. Se puede consumir desde hilos (stream) o desde el ciclo de eventos
+    (astream), sin importar dónde se esté generando.
+    """
+
+    def __init__(self, key):
+        self.key = key
+        self.started_at = time.perf_counter()
+        self.__chunks = []  # Fragmentos de Ollama recibidos hasta el momento.
+        self.__finished = False
+        self.__error = None
+        self.__cancel = None    # Función que detiene la generación en Ollama.
+        self.__cancelled = threading.Event()
+        self.__condition = threading.Condition()
+        self.__waiters = []     # [(ciclo de eventos, futuro)] de los suscriptores asíncronos en espera.
+
+    @property
+    def cancelled(self):
+        return self.__cancelled.is_set()
+
+    def set_cancel(self, cancel):
+        self.__cancel = cancel
+
+    def cancel(self):
+        self.__cancelled.set()
+
+        if self.__cancel is not None:
+            self.__cancel()
+
+    def _notify(self):
+        # Se llama con la condición adquirida.
+        self.__condition.notify_all()
+
+        for loop, future in self.__waiters:
+            loop.call_soon_threadsafe(self._wake, future)
+
+        self.__waiters.clear()
+
+    @staticmethod
+    def _wake(future):
+        if not future.done():
+            future.set_result(None)
+
+    def publish(self, chunk):
+        with self.__condition:
+            self.__chunks.append(chunk)
+            self._notify()
+
+    def finish(self, error=None):
+        with self.__condition:
+            self.__finished = True
+            self.__error = error
+            self._notify()
+
+    def _pending(self, position):
+        # Retorna los fragmentos desde la posición indicada y si la generación ya terminó.
+        return self.__chunks[position:], self.__finished, self.__error
+
+    def stream(self):
+        """
+        Generador con todos los fragmentos de la respuesta, desde el primero; bloquea el hilo mientras espera.
+        """
+        position = 0
+
+        while True:
+            with self.__condition:
+                while position >= len(self.__chunks) and not self.__finished:
+                    self.__condition.wait()
+
+                chunks, finished, error = self._pending(position)
+
+            position += len(chunks)
+            yield from chunks
+
+            if finished:
+                if error is not None:
+                    raise error
+
+                return
+
+    async def astream(self):
+        """
+        Generador asíncrono con todos los fragmentos de la respuesta, desde el primero.
+        """
+        loop = asyncio.get_running_loop()
+        position = 0
+
+        while True:
+            future = None
+
+            with self.__condition:
+                chunks, finished, error = self._pending(position)
+
+                if not chunks and not finished:
+                    future = loop.create_future()
+                    self.__waiters.append((loop, future))
+
+            if future is not None:
+                await future
+                continue
+
+            position += len(chunks)
+
+            for chunk in chunks:
+                yield chunk
+
+            if finished:
+                if error is not None:
+                    raise error
+
+                return
+
+
+class RequestCoalescer:
+    """
+    Agrupa las peticiones idénticas en curso para que compartan una sola generación del modelo.
+
+    La primera petición inicia la generación y las que llegan con la misma llave mientras sigue en curso se
+    suscriben a ella. La generación se detiene solo cuando todos los suscriptores se desconectan, y se retira
+    del registro al terminar (las preguntas posteriores se atienden con la caché de respuestas).
+    """
+
+    def __init__(self):
+        self.__inflight = {}    # llave -> SharedGeneration
+        self.__subscribers = {}     # llave -> número de suscriptores
+        self.__lock = threading.Lock()
+        self.__stats = {"started": 0, "joined": 0, "cancelled": 0}
+
+    @staticmethod
+    def make_key(model, category, k, level, mode, history, query):
+        return model, category, k, level, mode, history, normalize_query(query)
+
+    def join(self, key):
+        """
+        Suscribe la petición a la generación en curso con la llave indicada.
+
+        :return: La generación compartida o None si no hay una en curso.
+        """
+        with self.__lock:
+            flight = self.__inflight.get(key)
+
+            if flight is not None:
+                self.__subscribers[key] += 1
+                self.__stats["joined"] += 1
+
+            return flight
+
+    def is_inflight(self, key):
+        with self.__lock:
+            return key in self.__inflight
+
+    def _start(self, key):
+        # Registra una generación nueva con un suscriptor; retorna (generación, True si se creó).
+        with self.__lock:
+            flight = self.__inflight.get(key)
+
+            if flight is not None:
+                self.__subscribers[key] += 1
+                self.__stats["joined"] += 1
+                return flight, False
+
+            flight = self.__inflight[key] = SharedGeneration(key)
+            self.__subscribers[key] = 1
+            self.__stats["started"] += 1
+            return flight, True
+
+    def join_or_start(self, key, factory):
+        """
+        Suscribe la petición a la generación en curso o inicia una en un hilo.
+
+        :param factory: Función que retorna el iterador de fragmentos de Ollama.
+        :return: Tupla (generación compartida, True si esta petición la inició).
+        """
+        flight, started = self._start(key)
+
+        if started:
+            threading.Thread(target=self._run, args=(flight, factory), name="shared-generation",
+                             daemon=True).start()
+
+        return flight, started
+
+    def ajoin_or_start(self, key, factory):
+        """
+        Suscribe la petición a la generación en curso o inicia una como tarea del ciclo de eventos actual.
+
+        :param factory: Función que retorna el iterador asíncrono de fragmentos de Ollama.
+        :return: Tupla (generación compartida, True si esta petición la inició).
+        """
+        flight, started = self._start(key)
+
+        if started:
+            loop = asyncio.get_running_loop()
+            task = loop.create_task(self._arun(flight, factory))
+            flight.set_cancel(lambda: loop.call_soon_threadsafe(task.cancel))
+
+        return flight, started
+
+    def _run(self, flight, factory):
+        error = None
+
+        try:
+            response = factory()
+
+            try:
+                for chunk in response:
+                    if flight.cancelled:
+                        break
+
+                    flight.publish(chunk)
+            finally:
+                # Cerrar el flujo cierra la conexión con Ollama, que deja de generar.
+                close = getattr(response, "close", None)
+
+                if close is not None:
+                    close()
+        except Exception as e:
+            error = e
+
+        self._complete(flight, error)
+
+    async def _arun(self, flight, factory):
+        error = None
+
+        try:
+            async for chunk in factory():
+                flight.publish(chunk)
+        except asyncio.CancelledError:
+            # Todos los suscriptores se desconectaron.
+            error = RuntimeError("Se canceló la generación.")
+        except Exception as e:
+            error = e
+
+        self._complete(flight, error)
+
+    def _complete(self, flight, error):
+        with self.__lock:
+            if self.__inflight.get(flight.key) is flight:
+                del self.__inflight[flight.key]
+                del self.__subscribers[flight.key]
+
+        flight.finish(error)
+
+    def leave(self, flight):
+        """
+        Retira una suscripción; si era la última y la generación sigue en curso, se detiene.
+        """
+        with self.__lock:
+            if self.__inflight.get(flight.key) is not flight:
+                return
+
+            self.__subscribers[flight.key] -= 1
+
+            if self.__subscribers[flight.key]:
+                return
+
+            del self.__inflight[flight.key]
+            del self.__subscribers[flight.key]
+            self.__stats["cancelled"] += 1
+
+        flight.cancel()
+
+    def stats(self):
+        with self.__lock:
+            return {**self.__stats, "in_flight": len(self.__inflight),
+                    "subscribers": sum(self.__subscribers.values())}
@@ -0,0 +1,135 @@
+# IMPORTACIÓN DE MÓDULOS
+import os
+import secrets
+from contextvars import ContextVar
+from RAGController.conversation import Conversation
+from RAGController.ttl_lru_cache import TTLLRUCache
+
+# Identificador de la sesión del cliente que realiza la petición en curso (None fuera de una petición).
+current_session_id = ContextVar("current_session_id", default=None)
+
+SESSION_HEADER = "X-Session-Id"
+SESSION_COOKIE = "session_id"
+SESSION_COOKIE_MAX_AGE = int(os.getenv("SESSION_COOKIE_MAX_AGE", str(30 * 24 * 3600)))
+
+
+def resolve_session_id(headers, cookies):
+    """
+    Obtiene el identificador de sesión de la cabecera X-Session-Id o de la cookie session_id. Si el cliente no
+    envía ninguno se emite uno nuevo, de modo que dos clientes nunca comparten configuración ni historial.
+
+    :return: Tupla (identificador, emitido en esta petición).
+    """
+    session_id = (headers.get(SESSION_HEADER) or cookies.get(SESSION_COOKIE) or "").strip()[:128]
+
+    if session_id:
+        return session_id, False
+
+    return secrets.token_urlsafe(24), True
+
+
+def issue_session(response, session_id):
+    """
+    Entrega al cliente la sesión emitida por el servidor, en la cookie session_id y en la cabecera X-Session-Id
+    (para los clientes que no conservan cookies). Sirve para respuestas de Flask y de Starlette.
+    """
+    response.headers[SESSION_HEADER] = session_id
+    response.set_cookie(SESSION_COOKIE, session_id, max_age=SESSION_COOKIE_MAX_AGE, httponly=True, samesite="lax")
+
+
+class SessionSettings:
+    """
+    Configuración del chat de un cliente: modelo, entrenamiento, coincidencias del RAG, nivel de respuesta,
+    modo de recuperación e historial de la conversación.
+    """
+
+    # Campos que se comparten entre procesos (el historial de la conversación es local a cada proceso).
+    SHARED_FIELDS = ("selected_model", "category", "k", "level", "retrieval_mode")
+
+    def __init__(self, k=1, level=0, retrieval_mode="vector",
+                 conversation_budget=int(os.getenv("CONVERSATION_TOKEN_BUDGET", "1024"))):
+        self.selected_model = None
+        self.category = None
+        self.k = k
+        self.level = level
+        self.retrieval_mode = retrieval_mode
+        self.conversation = Conversation(token_budget=conversation_budget)
+        self.synced_at = 0.0    # Fecha del último cambio compartido aplicado a esta copia.
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in self.SHARED_FIELDS}
+
+    def apply(self, data: dict, synced_at):
+        for field in self.SHARED_FIELDS:
+            if field in data:
+                setattr(self, field, data[field])
+
+        self.synced_at = synced_at
+
+
+class SessionStore:
+    """
+    Almacén acotado de configuraciones por sesión.
+
+    Las sesiones inactivas durante más de idle_ttl segundos se descartan y, al superar
+    max_sessions, se desaloja la sesión usada hace más tiempo. Una sesión descartada
+    vuelve a los valores por defecto en su siguiente petición.
+
+    Con un SharedState, la configuración se guarda también en la base de datos compartida y cada lectura
+    aplica los cambios hechos por otros procesos, de modo que todos los trabajadores atienden la sesión con la
+    misma configuración.
+    """
+
+    # Guardados entre cada limpieza de las sesiones inactivas en la base de datos compartida.
+    PRUNE_EVERY = 500
+
+    def __init__(self, max_sessions=1000, idle_ttl=3600, shared_state=None):
+        self.__sessions = TTLLRUCache(max_size=max_sessions, ttl=idle_ttl, sliding=True)
+        self.__idle_ttl = idle_ttl
+        self.__shared_state = shared_state
+        self.__saves = 0
+
+    def get(self, session_id=None):
+        """
+        Retorna la configuración de la sesión indicada o, por defecto, la de la petición en curso. Fuera de una
+        petición se retorna una configuración temporal que no se guarda.
+        """
+        session_id = session_id or current_session_id.get()
+
+        if session_id is None:
+            return SessionSettings()
+
+        settings = self.__sessions.get_or_create(session_id, SessionSettings)
+
+        if self.__shared_state is not None:
+            data, updated_at = self.__shared_state.load_settings(session_id)
+
+            if data is not None and updated_at > settings.synced_at:
+                settings.apply(data, updated_at)
+
+        return settings
+
+    def update(self, session_id=None, **fields):
+        """
+        Modifica la configuración de una sesión (por defecto, la de la petición en curso) y, si hay estado
+        compartido, la guarda para los demás procesos.
+        """
+        session_id = session_id or current_session_id.get()
+
+        if session_id is None:
+            return
+
+        settings = self.get(session_id)
+
+        for field, value in fields.items():
+            setattr(settings, field, value)
+
+        if self.__shared_state is not None:
+            settings.synced_at = self.__shared_state.save_settings(session_id, settings.to_dict())
+            self.__saves += 1
+
+            if self.__saves % self.PRUNE_EVERY == 0:
+                self.__shared_state.prune_settings(self.__idle_ttl)
+
+    def stats(self):
+        return self.__sessions.stats()
@@ -0,0 +1,253 @@
+# IMPORTACIÓN DE MÓDULOS
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+
+class SharedState:
+    """
+    Estado compartido entre los procesos trabajadores del servicio, guardado en una base de datos SQLite local en
+    modo WAL (varios lectores simultáneos y un escritor a la vez).
+
+    Contiene la configuración de cada sesión, la cola de trabajos de ingesta y el turno de escritor. Los cambios
+    se anuncian por temas con un número de versión: cada proceso vigila la base de datos (PRAGMA data_version,
+    que solo cambia cuando otra conexión confirma una transacción) y llama a los suscriptores de los temas cuya
+    versión aumentó.
+
+    Solo el proceso que tiene el turno de escritor modifica los índices; los demás atienden consultas y delegan
+    las escrituras por medio de la cola de trabajos. El turno se renueva periódicamente y, si el proceso que lo
+    tiene deja de renovarlo, otro lo toma al vencer.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS session_settings (
+            session_id TEXT PRIMARY KEY,
+            data TEXT NOT NULL,
+            updated_at REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS topics (
+            name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS writer_lease (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            owner TEXT NOT NULL,
+            expires_at REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS ingestion_jobs (
+            id TEXT PRIMARY KEY,
+            kind TEXT NOT NULL,
+            category TEXT NOT NULL,
+            source TEXT NOT NULL,
+            file_extension TEXT,
+            file_content BLOB,
+            state TEXT NOT NULL,
+            pages INTEGER NOT NULL DEFAULT 0,
+            chunks INTEGER NOT NULL DEFAULT 0,
+            message TEXT,
+            error TEXT,
+            cancel_requested INTEGER NOT NULL DEFAULT 0,
+            owner TEXT,
+            submitted_at REAL NOT NULL,
+            started_at REAL,
+            finished_at REAL
+        );
+        CREATE INDEX IF NOT EXISTS ingestion_jobs_state ON ingestion_jobs (state, submitted_at);
+    """
+
+    def __init__(self, path, poll_interval=0.5, writer_ttl=15.0):
+        self.__path = path  # Ruta de la base de datos compartida.
+        self.__poll_interval = poll_interval    # Segundos entre revisiones de cambios.
+        self.__writer_ttl = writer_ttl  # Segundos de validez del turno de escritor sin renovarse.
+        self.__owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"  # Identificador de este proceso.
+        self.__local = threading.local()    # Una conexión por hilo.
+        self.__subscribers = {}     # tema -> [función]
+        self.__versions = {}    # tema -> última versión vista por este proceso
+        self.__is_writer = False
+        self.__lock = threading.Lock()
+        self.__watcher = None
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        with self.connect() as connection:
+            connection.executescript(self.SCHEMA)
+
+    def connect(self):
+        """
+        Retorna la conexión del hilo actual, creándola si es necesario.
+        """
+        connection = getattr(self.__local, "connection", None)
+
+        if connection is None:
+            connection = sqlite3.connect(self.__path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.row_factory = sqlite3.Row
+            self.__local.connection = connection
+
+        return connection
+
+    @property
+    def owner(self):
+        return self.__owner
+
+    # Configuración de las sesiones
+    def load_settings(self, session_id):
+        """
+        Retorna la configuración guardada de una sesión y la fecha de su último cambio, o (None, None).
+        """
+        row = self.connect().execute("SELECT data, updated_at FROM session_settings WHERE session_id = ?",
+                                     (session_id,)).fetchone()
+        return (json.loads(row["data"]), row["updated_at"]) if row else (None, None)
+
+    def save_settings(self, session_id, data: dict):
+        """
+        Guarda la configuración de una sesión.
+
+        :return: Fecha del cambio.
+        """
+        updated_at = time.time()
+        self.connect().execute("INSERT INTO session_settings (session_id, data, updated_at) VALUES (?, ?, ?) "
+                               "ON CONFLICT (session_id) DO UPDATE SET data = excluded.data, "
+                               "updated_at = excluded.updated_at",
+                               (session_id, json.dumps(data, ensure_ascii=False), updated_at))
+        return updated_at
+
+    def prune_settings(self, idle_ttl):
+        """
+        Elimina la configuración de las sesiones inactivas durante más de idle_ttl segundos.
+        """
+        self.connect().execute("DELETE FROM session_settings WHERE updated_at < ?", (time.time() - idle_ttl,))
+
+    # Notificación de cambios
+    def notify(self, topic):
+        """
+        Anuncia un cambio en un tema a todos los procesos.
+        """
+        self.connect().execute("INSERT INTO topics (name, version) VALUES (?, 1) "
+                               "ON CONFLICT (name) DO UPDATE SET version = version + 1", (topic,))
+
+    def _topic_versions(self):
+        return {row["name"]: row["version"] for row in self.connect().execute("SELECT name, version FROM topics")}
+
+    def subscribe(self, topic, callback):
+        """
+        Registra una función que se llama (en el hilo de vigilancia) cuando otro proceso anuncia un cambio en el
+        tema. Los cambios anunciados por este mismo proceso también se entregan.
+        """
+        with self.__lock:
+            self.__subscribers.setdefault(topic, []).append(callback)
+            self.__versions.setdefault(topic, self._topic_versions().get(topic, 0))
+
+            if self.__watcher is None:
+                self.__watcher = threading.Thread(target=self._watch, name="shared-state", daemon=True)
+                self.__watcher.start()
+
+    def _watch(self):
+        data_version = None
+
+        while True:
+            try:
+                # data_version cambia con las transacciones confirmadas por cualquier otra conexión, incluidas
+                # las de otros hilos de este proceso; solo entonces se leen las versiones de los temas.
+                current = self.connect().execute("PRAGMA data_version").fetchone()[0]
+
+                if current != data_version:
+                    data_version = current
+                    self._dispatch()
+            except Exception as error:
+                print(f">>> Error al revisar el estado compartido: {error}.")
+
+            time.sleep(self.__poll_interval)
+
+    def _dispatch(self):
+        versions = self._topic_versions()
+
+        with self.__lock:
+            changed = [topic for topic in self.__subscribers if versions.get(topic, 0) > self.__versions[topic]]
+
+            for topic in changed:
+                self.__versions[topic] = versions[topic]
+
+            callbacks = [(topic, callback) for topic in changed for callback in self.__subscribers[topic]]
+
+        for topic, callback in callbacks:
+            try:
+                callback()
+            except Exception as error:
+                print(f">>> Error al atender el cambio de {topic}: {error}.")
+
+    # Turno de escritor
+    def is_writer(self):
+        """
+        Indica si este proceso tiene el turno de escritor.
+        """
+        return self.__is_writer and self._lease_owner() == self.__owner
+
+    def _lease_owner(self):
+        row = self.connect().execute("SELECT owner, expires_at FROM writer_lease WHERE id = 1").fetchone()
+        return row["owner"] if row and row["expires_at"] > time.time() else None
+
+    def try_acquire_writer(self):
+        """
+        Toma o renueva el turno de escritor si está libre, vencido o ya es de este proceso.
+
+        :return: Tupla (este proceso tiene el turno, lo acaba de obtener).
+        """
+        connection = self.connect()
+        now = time.time()
+
+        connection.execute("BEGIN IMMEDIATE")
+
+        try:
+            row = connection.execute("SELECT owner, expires_at FROM writer_lease WHERE id = 1").fetchone()
+            acquired = row is None or row["owner"] == self.__owner or row["expires_at"] <= now
+
+            if acquired:
+                connection.execute("INSERT INTO writer_lease (id, owner, expires_at) VALUES (1, ?, ?) "
+                                   "ON CONFLICT (id) DO UPDATE SET owner = excluded.owner, "
+                                   "expires_at = excluded.expires_at", (self.__owner, now + self.__writer_ttl))
+
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+
+        newly_acquired = acquired and not self.__is_writer
+        self.__is_writer = acquired
+        return acquired, newly_acquired
+
+    def start_writer_election(self, on_acquired=None):
+        """
+        Intenta tomar el turno de escritor de inmediato y después lo renueva (o lo intenta tomar) en segundo
+        plano cada tercio de su vigencia.
+
+        :param on_acquired: Función que se llama cada vez que este proceso obtiene el turno.
+        """
+        def attempt():
+            try:
+                _, newly_acquired = self.try_acquire_writer()
+
+                if newly_acquired and on_acquired is not None:
+                    on_acquired()
+            except Exception as error:
+                self.__is_writer = False
+                print(f">>> Error al renovar el turno de escritor: {error}.")
+
+        def loop():
+            while True:
+                time.sleep(self.__writer_ttl / 3)
+                attempt()
+
+        attempt()
+        threading.Thread(target=loop, name="writer-lease", daemon=True).start()
+
+    def stats(self):
+        """
+        Retorna el estado del proceso respecto al estado compartido.
+        """
+        return {"path": self.__path, "owner": self.__owner, "is_writer": self.is_writer(),
+                "writer": self._lease_owner(), "topics": self._topic_versions()}
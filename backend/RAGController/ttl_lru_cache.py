@@ -0,0 +1,115 @@
+# IMPORTACIÓN DE MÓDULOS
+import threading
+import time
+from collections import OrderedDict
+
+_MISSING = object()     # Marcador para distinguir una entrada inexistente de un valor None.
+
+
+class TTLLRUCache:
+    """
+    Caché en memoria con política LRU y caducidad por tiempo (TTL).
+
+    Es segura para su uso desde varios hilos, ya que todas las operaciones se realizan
+    bajo un mismo candado. Lleva el conteo de aciertos, fallos y desalojos.
+    """
+
+    def __init__(self, max_size=1024, ttl=3600, sliding=False):
+        self.__max_size = max_size  # Número máximo de entradas almacenadas.
+        self.__ttl = ttl    # Segundos de vida de cada entrada (None = sin caducidad).
+        self.__sliding = sliding    # Si es verdadero, cada acceso reinicia la vida de la entrada (inactividad).
+        self.__data = OrderedDict()     # clave -> (instante de expiración, valor)
+        self.__lock = threading.RLock()
+        self.__hits = 0
+        self.__misses = 0
+        self.__evictions = 0
+
+    def _expiration(self):
+        return None if self.__ttl is None else time.monotonic() + self.__ttl
+
+    def get(self, key, default=None):
+        """
+        Retorna el valor asociado a la clave, o el valor por defecto si no existe o ya caducó.
+        """
+        with self.__lock:
+            entry = self.__data.get(key)
+
+            if entry is None:
+                self.__misses += 1
+                return default
+
+            expires_at, value = entry
+
+            if expires_at is not None and expires_at <= time.monotonic():
+                # La entrada caducó, se descarta.
+                del self.__data[key]
+                self.__evictions += 1
+                self.__misses += 1
+                return default
+
+            # Se marca como la entrada usada más recientemente.
+            self.__data.move_to_end(key)
+
+            if self.__sliding:
+                self.__data[key] = (self._expiration(), value)
+
+            self.__hits += 1
+            return value
+
+    def put(self, key, value):
+        """
+        Almacena un valor, desalojando la entrada menos usada si se supera el tamaño máximo.
+        """
+        with self.__lock:
+            self.__data[key] = (self._expiration(), value)
+            self.__data.move_to_end(key)
+
+            while len(self.__data) > self.__max_size:
+                self.__data.popitem(last=False)
+                self.__evictions += 1
+
+    def get_or_create(self, key, factory):
+        """
+        Retorna el valor asociado a la clave o, si no existe o caducó, almacena y retorna el creado por factory.
+        """
+        with self.__lock:
+            value = self.get(key, _MISSING)
+
+            if value is _MISSING:
+                value = factory()
+                self.put(key, value)
+
+            return value
+
+    def pop(self, key, default=None):
+        """
+        Elimina una entrada y retorna su valor.
+        """
+        with self.__lock:
+            entry = self.__data.pop(key, None)
+            return default if entry is None else entry[1]
+
+    def clear(self):
+        """
+        Elimina todas las entradas almacenadas.
+        """
+        with self.__lock:
+            self.__data.clear()
+
+    def __len__(self):
+        with self.__lock:
+            return len(self.__data)
+
+    def stats(self):
+        """
+        Retorna las estadísticas de uso de la caché.
+        """
+        with self.__lock:
+            total = self.__hits + self.__misses
+            return {"size": len(self.__data),
+                    "max_size": self.__max_size,
+                    "ttl": self.__ttl,
+                    "hits": self.__hits,
+                    "misses": self.__misses,
+                    "evictions": self.__evictions,
+                    "hit_rate": self.__hits / total if total else 0.0}
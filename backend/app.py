@@ -7,7 +7,8 @@ from flask_cors import CORS  # Importamos CORS
 from resources.rag_endpoints import blp as RAG
 app = Flask(__name__)
 
-CORS(app)
+# Se expone la cabecera de la sesión emitida para que el frontend pueda conservarla.
+CORS(app, expose_headers=["X-Session-Id"])
 
 app.config["PROPAGATE_EXCEPTIONS"] = True
 app.config["API_TITLE"] = "TEST REST API"
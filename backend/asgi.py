@@ -0,0 +1,111 @@
+# Punto de entrada ASGI del backend.
+#
+# Atiende el chat con Ollama de forma asíncrona (sin un hilo por cada flujo abierto) y delega el
+# resto de los endpoints a la aplicación de Flask.
+#
+# Uso: uvicorn asgi:app --host 0.0.0.0 --port 5000
+# Con varios procesos trabajadores se debe habilitar el estado compartido, por ejemplo:
+#      SHARED_STATE_PATH=knowledge-base/shared_state.sqlite3 uvicorn asgi:app --workers 4 --port 5000
+import json
+from marshmallow import ValidationError
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.middleware.wsgi import WSGIMiddleware
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Mount, Route
+from app import app as flask_app
+from resources.rag_endpoints import manager
+from RAGController.session_store import SESSION_HEADER, current_session_id, issue_session, resolve_session_id
+from schemas import rag_schema
+
+
+async def _load_query(request):
+    """
+    Asigna la sesión del cliente y valida el cuerpo de la petición con el mismo esquema que el endpoint de Flask.
+
+    :return: Tupla (datos de la petición, sesión emitida en esta petición o None).
+    """
+    session_id, issued = resolve_session_id(request.headers, request.cookies)
+    current_session_id.set(session_id)
+    return rag_schema.PlainQueryModel().load(await request.json()), session_id if issued else None
+
+
+def _with_session(response, issued_session_id):
+    """
+    Entrega al cliente la sesión emitida en esta petición, si la hay.
+    """
+    if issued_session_id:
+        issue_session(response, issued_session_id)
+
+    return response
+
+
+def _reject_if_saturated(request, query):
+    """
+    Retorna una respuesta 429 con Retry-After si la cola de generación del modelo está llena, o None.
+    """
+    status, error = manager.check_admission(query, request.headers.get("X-Priority"))
+
+    if status:
+        return None
+
+    return JSONResponse({"status": False, "response": str(error)}, status_code=429,
+                        headers={"Retry-After": str(error.retry_after)})
+
+
+async def ollama_chat(request):
+    """
+    Chat con el modelo activo; retorna la respuesta como texto plano en stream.
+    """
+    try:
+        data, issued_session_id = await _load_query(request)
+    except (ValidationError, ValueError) as error:
+        return JSONResponse({"status": False, "response": str(error)}, status_code=422)
+
+    rejection = _reject_if_saturated(request, data["query"])
+
+    if rejection is not None:
+        return _with_session(rejection, issued_session_id)
+
+    priority = request.headers.get("X-Priority")
+
+    async def tokens():
+        async for event, payload in manager.astream_ollama_model(data["query"], priority):
+            if event == "token":
+                yield payload["content"]
+
+    return _with_session(StreamingResponse(tokens(), media_type="text/plain"), issued_session_id)
+
+
+async def ollama_chat_sse(request):
+    """
+    Chat con el modelo activo; retorna eventos SSE con los fragmentos de la respuesta y los tiempos.
+    """
+    try:
+        data, issued_session_id = await _load_query(request)
+    except (ValidationError, ValueError) as error:
+        return JSONResponse({"status": False, "response": str(error)}, status_code=422)
+
+    rejection = _reject_if_saturated(request, data["query"])
+
+    if rejection is not None:
+        return _with_session(rejection, issued_session_id)
+
+    priority = request.headers.get("X-Priority")
+
+    async def events():
+        async for event, payload in manager.astream_ollama_model(data["query"], priority):
+            yield f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+    response = StreamingResponse(events(),
+                                 media_type="text/event-stream",
+                                 headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+    return _with_session(response, issued_session_id)
+
+
+app = Starlette(routes=[Route("/ollama/chat", ollama_chat, methods=["POST"]),
+                        Route("/ollama/chat/sse", ollama_chat_sse, methods=["POST"]),
+                        Mount("/", app=WSGIMiddleware(flask_app))],
+                middleware=[Middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"],
+                                       allow_headers=["*"], expose_headers=[SESSION_HEADER])])
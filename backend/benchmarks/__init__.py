@@ -0,0 +1,16 @@
+"""
+Pruebas de rendimiento y de carga del backend.
+
+Se ejecutan desde la carpeta backend, sin conexión a internet ni a un servidor real de Ollama:
+
+    python -m benchmarks ingestion --output ingestion.json
+    python -m benchmarks query --sizes 1000 5000 20000 --ks 1 3 5 10
+    python -m benchmarks chat --requests 30
+    python -m benchmarks load --endpoint chat --concurrency 16 --requests 200
+    python -m benchmarks fake-ollama --port 11434 --tokens-per-second 40
+    python -m benchmarks compare antes.json despues.json
+
+El chat se prueba contra un Ollama simulado (benchmarks.fake_ollama) con velocidad de generación y
+latencia configurables, por lo que los resultados pueden compararse entre corridas y equipos. Cada
+prueba imprime un JSON con el entorno, los parámetros y los resultados (percentiles p50/p95/p99).
+"""
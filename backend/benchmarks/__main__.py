@@ -0,0 +1,105 @@
+# IMPORTACIÓN DE MÓDULOS
+import argparse
+from benchmarks.fake_ollama import FakeOllamaConfig, FakeOllamaServer
+from benchmarks.reporting import compare_reports, write_report
+
+
+def _add_ollama_arguments(parser):
+    group = parser.add_argument_group("Ollama simulado")
+    group.add_argument("--tokens-per-second", type=float, default=50.0)
+    group.add_argument("--first-token-ms", type=float, default=150.0)
+    group.add_argument("--prompt-tokens-per-second", type=float, default=0.0,
+                       help="Velocidad de evaluación del prompt (0 = instantánea).")
+    group.add_argument("--max-tokens", type=int, default=128)
+    group.add_argument("--load-ms", type=float, default=0.0, help="Carga del modelo en su primer uso.")
+
+
+def _ollama_config(args):
+    return FakeOllamaConfig(tokens_per_second=args.tokens_per_second, first_token_ms=args.first_token_ms,
+                            prompt_tokens_per_second=args.prompt_tokens_per_second, max_tokens=args.max_tokens,
+                            load_ms=args.load_ms, seed=args.seed)
+
+
+def _parser():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Pruebas de rendimiento del backend.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ingestion = commands.add_parser("ingestion", help="Ingesta por formato (pdf, txt, docx).")
+    ingestion.add_argument("--formats", nargs="+", default=["pdf", "txt", "docx"], choices=["pdf", "txt", "docx"])
+    ingestion.add_argument("--repeat", type=int, default=3)
+    ingestion.add_argument("--batch-size", type=int, default=64)
+
+    query = commands.add_parser("query", help="Latencia de db_query según tamaño del entrenamiento y k.")
+    query.add_argument("--sizes", nargs="+", type=int, default=[1000, 5000, 20000])
+    query.add_argument("--ks", nargs="+", type=int, default=[1, 3, 5, 10])
+    query.add_argument("--modes", nargs="+", default=["vector"], choices=["vector", "lexical", "hybrid"])
+    query.add_argument("--queries", type=int, default=50, help="Consultas por cada combinación.")
+    query.add_argument("--cached", action="store_true", help="Medir con la incrustación de la consulta en caché.")
+    query.add_argument("--engine", choices=["chroma", "exact"], default="chroma",
+                       help="Motor de búsqueda vectorial (HNSW de Chroma o búsqueda exacta mapeada en memoria).")
+
+    for name, description, concurrency, requests in (("chat", "Tiempo al primer token y tokens/s del chat.", 1, 30),
+                                                      ("load", "Generador de carga concurrente.", 16, 200)):
+        command = commands.add_parser(name, help=description)
+        command.add_argument("--requests", type=int, default=requests)
+        command.add_argument("--concurrency", type=int, default=concurrency)
+        command.add_argument("--endpoint", choices=["chat", "rag"], default="chat")
+        command.add_argument("--k", type=int, default=3)
+        command.add_argument("--mode", choices=["vector", "lexical", "hybrid"], default="vector")
+        command.add_argument("--url", help="Servicio ya en ejecución (por defecto se levanta uno local).")
+        _add_ollama_arguments(command)
+
+    fake_ollama = commands.add_parser("fake-ollama", help="Levanta solo el Ollama simulado.")
+    fake_ollama.add_argument("--host", default="127.0.0.1")
+    fake_ollama.add_argument("--port", type=int, default=11434)
+    fake_ollama.add_argument("--models", nargs="+", default=["fake-llm:latest"])
+    _add_ollama_arguments(fake_ollama)
+
+    compare = commands.add_parser("compare", help="Compara dos resultados guardados.")
+    compare.add_argument("baseline")
+    compare.add_argument("candidate")
+
+    for command in (ingestion, query, *(commands.choices[name] for name in ("chat", "load", "fake-ollama"))):
+        command.add_argument("--seed", type=int, default=0)
+
+    for command in (ingestion, query, commands.choices["chat"], commands.choices["load"]):
+        command.add_argument("--output", help="Archivo JSON donde se guarda el resultado.")
+
+    return parser
+
+
+def main():
+    args = _parser().parse_args()
+    parameters = {key: value for key, value in vars(args).items() if key not in ("command", "output")}
+
+    if args.command == "ingestion":
+        from benchmarks import bench_ingestion
+        results = bench_ingestion.run(formats=args.formats, repeat=args.repeat, batch_size=args.batch_size)
+        write_report("ingestion", parameters, results, args.output)
+
+    elif args.command == "query":
+        from benchmarks import bench_query
+        results = bench_query.run(sizes=args.sizes, ks=args.ks, modes=args.modes, queries_per_point=args.queries,
+                                  cached=args.cached, engine=args.engine, seed=args.seed)
+        write_report("query", parameters, results, args.output)
+
+    elif args.command in ("chat", "load"):
+        from benchmarks import bench_chat
+        results = bench_chat.run(requests=args.requests, concurrency=args.concurrency, endpoint=args.endpoint,
+                                 ollama_config=_ollama_config(args), k=args.k, mode=args.mode, seed=args.seed,
+                                 url=args.url)
+        write_report(f"{args.command}-{args.endpoint}", parameters, results, args.output)
+
+    elif args.command == "fake-ollama":
+        config = _ollama_config(args)
+        config.models = args.models
+        server = FakeOllamaServer(config, host=args.host, port=args.port)
+        print(f">>> Ollama simulado en {server.url} con {config.to_dict()}.")
+        server.serve_forever()
+
+    elif args.command == "compare":
+        compare_reports(args.baseline, args.candidate)
+
+
+if __name__ == "__main__":
+    main()
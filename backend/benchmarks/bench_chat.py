@@ -0,0 +1,207 @@
+# IMPORTACIÓN DE MÓDULOS
+import asyncio
+import json
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+import httpx
+from benchmarks.bench_ingestion import load_fixtures
+from benchmarks.bench_query import build_queries
+from benchmarks.fake_ollama import FakeOllamaConfig, FakeOllamaServer
+from benchmarks.reporting import summarize
+
+CATEGORY = "bench-chat"
+SESSION_ID = "bench"
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class BenchmarkService:
+    """
+    Levanta el servicio completo (servidor ASGI) apuntando a un Ollama simulado, en un directorio temporal.
+
+    Ollama se configura con la variable OLLAMA_HOST antes de importar la aplicación, y la base de datos se
+    crea dentro del directorio de trabajo temporal, por lo que la prueba no toca los datos reales.
+    """
+
+    def __init__(self, ollama_config=None, workdir=None):
+        self.fake_ollama = FakeOllamaServer(ollama_config)
+        self.workdir = workdir or tempfile.mkdtemp(prefix="bench-chat-")
+        self.url = None
+        self.__server = None
+
+    def start(self, timeout=600):
+        import uvicorn
+
+        self.fake_ollama.start()
+        os.environ["OLLAMA_HOST"] = self.fake_ollama.url
+
+        # La aplicación se importa desde la carpeta backend aunque se cambie el directorio de trabajo.
+        if BACKEND_DIR not in sys.path:
+            sys.path.insert(0, BACKEND_DIR)
+
+        os.chdir(self.workdir)
+
+        from asgi import app
+
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            port = probe.getsockname()[1]
+
+        self.__server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+        threading.Thread(target=self.__server.run, name="bench-server", daemon=True).start()
+        self.url = f"http://127.0.0.1:{port}"
+
+        # Se espera a que el modelo de incrustaciones, los índices y Ollama estén listos.
+        deadline = time.monotonic() + timeout
+
+        while time.monotonic() < deadline:
+            try:
+                if httpx.get(f"{self.url}/readyz").status_code == 200:
+                    return self
+            except httpx.TransportError:
+                pass
+
+            time.sleep(0.2)
+
+        raise TimeoutError("El servicio no estuvo listo a tiempo.")
+
+    def prepare(self, model_index=0, k=3, mode="vector"):
+        """
+        Crea el entrenamiento de prueba y configura la sesión de la prueba (modelo, entrenamiento, k y modo).
+        """
+        from resources.rag_endpoints import manager
+
+        if CATEGORY not in manager.get_available_collections():
+            status, response = manager.create_collection(load_fixtures()["pdf"], "pdf", CATEGORY,
+                                                         source="Bitcoin.pdf")
+
+            if not status:
+                raise RuntimeError(response)
+
+        headers = {"X-Session-Id": SESSION_ID}
+
+        for path, body in (("/model", {"index": model_index}), ("/collection", {"category": CATEGORY}),
+                           ("/rag-k", {"k": k}), ("/retrieval-mode", {"mode": mode})):
+            response = httpx.post(f"{self.url}{path}", json=body, headers=headers).json()
+
+            if not response["status"]:
+                raise RuntimeError(response["response"])
+
+    def stop(self):
+        if self.__server is not None:
+            self.__server.should_exit = True
+
+        self.fake_ollama.stop()
+
+
+async def _chat_request(client, url, query):
+    # Consume el flujo SSE del chat y mide el tiempo al primer fragmento y la velocidad de generación.
+    started_at = time.perf_counter()
+    first_token_at, tokens, done = None, 0, {}
+    event = None
+
+    async with client.stream("POST", f"{url}/ollama/chat/sse", json={"query": query},
+                             headers={"X-Session-Id": SESSION_ID}) as response:
+        response.raise_for_status()
+
+        async for line in response.aiter_lines():
+            if line.startswith("event: "):
+                event = line[7:]
+            elif line.startswith("data: "):
+                if event == "token":
+                    tokens += 1
+                    first_token_at = first_token_at or time.perf_counter()
+                elif event == "done":
+                    done = json.loads(line[6:])
+                elif event == "error":
+                    raise RuntimeError(json.loads(line[6:])["message"])
+
+    finished_at = time.perf_counter()
+    generation_seconds = finished_at - first_token_at if first_token_at else 0
+
+    return {"latency_ms": (finished_at - started_at) * 1000,
+            "ttft_ms": (first_token_at - started_at) * 1000 if first_token_at else None,
+            "tokens_per_second": (tokens - 1) / generation_seconds if tokens > 1 and generation_seconds else None,
+            "cached": done.get("cached", False)}
+
+
+async def _rag_request(client, url, query):
+    started_at = time.perf_counter()
+    response = await client.request("GET", f"{url}/rag", json={"query": query, "category": CATEGORY},
+                                    headers={"X-Session-Id": SESSION_ID})
+    response.raise_for_status()
+
+    if not response.json()["status"]:
+        raise RuntimeError(response.json()["response"])
+
+    return {"latency_ms": (time.perf_counter() - started_at) * 1000}
+
+
+async def generate_load(url, queries, concurrency, endpoint="chat", timeout=300):
+    """
+    Envía las consultas con el número indicado de clientes concurrentes y resume las latencias.
+
+    :return: Diccionario con el rendimiento global y los percentiles p50/p95/p99 de cada métrica.
+    """
+    request = _chat_request if endpoint == "chat" else _rag_request
+    pending = list(reversed(queries))
+    samples, errors = [], []
+
+    async def worker(client):
+        while pending:
+            query = pending.pop()
+
+            try:
+                samples.append(await request(client, url, query))
+            except Exception as error:
+                errors.append(str(error))
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(timeout=timeout, limits=limits) as client:
+        started_at = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started_at
+
+    results = {"requests": len(queries),
+               "errors": len(errors),
+               "concurrency": concurrency,
+               "seconds": elapsed,
+               "requests_per_second": len(samples) / elapsed,
+               "latency_ms": summarize([sample["latency_ms"] for sample in samples])}
+
+    if endpoint == "chat":
+        generated = [sample for sample in samples if not sample["cached"]]
+        results["cached_responses"] = len(samples) - len(generated)
+        results["ttft_ms"] = summarize([sample["ttft_ms"] for sample in generated if sample["ttft_ms"] is not None])
+        results["tokens_per_second"] = summarize([sample["tokens_per_second"] for sample in generated
+                                                  if sample["tokens_per_second"] is not None])
+
+    if errors:
+        results["first_error"] = errors[0]
+
+    return results
+
+
+def run(requests=50, concurrency=1, endpoint="chat", ollama_config=None, k=3, mode="vector", seed=0, url=None):
+    """
+    Ejecuta una prueba de extremo a extremo contra el chat (/ollama/chat/sse) o la recuperación (/rag).
+
+    Si no se indica la URL de un servicio en ejecución, se levanta uno local con el Ollama simulado.
+    """
+    service = None
+
+    if url is None:
+        service = BenchmarkService(ollama_config or FakeOllamaConfig(seed=seed)).start()
+        service.prepare(k=k, mode=mode)
+        url = service.url
+
+    try:
+        queries = build_queries(load_fixtures()["txt"].decode("utf-8"), requests, seed=seed)
+        return asyncio.run(generate_load(url, queries, concurrency, endpoint=endpoint))
+    finally:
+        if service is not None:
+            service.stop()
@@ -0,0 +1,80 @@
+# IMPORTACIÓN DE MÓDULOS
+import os
+import tempfile
+import time
+import fitz
+from RAGController.ingestion_jobs import IngestionProgress
+from benchmarks.reporting import summarize
+
+# Documentos de ejemplo incluidos en la raíz del repositorio.
+FIXTURES_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+PDF_FIXTURE = os.path.join(FIXTURES_DIR, "Bitcoin.pdf")
+DOCX_FIXTURE = os.path.join(FIXTURES_DIR, "BANXICO.docx")
+
+
+def load_fixtures():
+    """
+    Retorna los documentos de prueba por formato. El TXT se genera a partir del texto del PDF para que las
+    tres pruebas partan de un contenido comparable sin agregar otro archivo al repositorio.
+
+    :return: Diccionario formato -> contenido del archivo.
+    """
+    with open(PDF_FIXTURE, "rb") as file:
+        pdf_content = file.read()
+
+    with open(DOCX_FIXTURE, "rb") as file:
+        docx_content = file.read()
+
+    with fitz.open(stream=pdf_content, filetype="pdf") as document:
+        txt_content = "\n".join(page.get_text() for page in document).encode("utf-8")
+
+    return {"pdf": pdf_content, "txt": txt_content, "docx": docx_content}
+
+
+def run(formats=("pdf", "txt", "docx"), repeat=3, batch_size=64, db_dir=None):
+    """
+    Mide la ingesta de cada formato: tiempo total, páginas, pedazos y pedazos por segundo.
+
+    Cada repetición crea un entrenamiento nuevo en una base de datos temporal, por lo que incluye la
+    extracción, la división en pedazos, las incrustaciones y la escritura en Chroma.
+    """
+    from RAGController.chroma_db_manager import ChromaDBManager
+
+    fixtures = load_fixtures()
+    db_dir = db_dir or tempfile.mkdtemp(prefix="bench-ingestion-")
+    manager = ChromaDBManager(db_name="bench", db_dir=db_dir, batch_size=batch_size)
+
+    # Se carga el modelo de incrustaciones antes de medir.
+    manager.embed_query("calentamiento")
+
+    results = {}
+
+    for file_format in formats:
+        content = fixtures[file_format]
+        seconds, chunks, pages = [], 0, 0
+
+        for attempt in range(repeat):
+            category = f"bench-{file_format}-{attempt}"
+            progress = IngestionProgress()
+
+            started_at = time.perf_counter()
+            status, response = manager.create_collection(content, file_format, category,
+                                                         source=f"fixture.{file_format}", progress=progress)
+            elapsed = time.perf_counter() - started_at
+
+            if not status:
+                raise RuntimeError(response)
+
+            seconds.append(elapsed)
+            chunks, pages = progress.chunks, progress.pages
+            manager.delete_collection(category)
+
+        summary = summarize(seconds)
+        results[file_format] = {"bytes": len(content),
+                                "pages": pages,
+                                "chunks": chunks,
+                                "seconds": summary,
+                                "chunks_per_second": chunks / summary["p50"],
+                                "megabytes_per_second": len(content) / 1e6 / summary["p50"]}
+
+    return results
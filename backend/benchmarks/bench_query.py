@@ -0,0 +1,108 @@
+# IMPORTACIÓN DE MÓDULOS
+import random
+import re
+import tempfile
+import time
+import numpy as np
+from benchmarks.bench_ingestion import load_fixtures
+from benchmarks.reporting import summarize
+
+CATEGORY = "bench-query"
+
+
+def build_queries(text, count, seed=0):
+    """
+    Genera consultas deterministas a partir de oraciones del documento de prueba.
+    """
+    sentences = [sentence.strip() for sentence in re.split(r"[.\n]", text) if len(sentence.split()) >= 5]
+    generator = random.Random(seed)
+    return [" ".join(generator.choice(sentences).split()[:12]) for _ in range(count)]
+
+
+def grow_collection(manager, target_size, seed=0, batch_size=1000):
+    """
+    Agrega copias de los pedazos existentes hasta que el entrenamiento alcanza el tamaño indicado.
+
+    Las copias reutilizan el texto y una versión ligeramente perturbada del vector original, por lo que
+    el costo de la búsqueda crece con el tamaño sin volver a calcular incrustaciones.
+    """
+    collection = manager._get_collection(CATEGORY)._collection
+    lexical_index = manager._get_lexical_index(CATEGORY)
+    current_size = collection.count()
+
+    if current_size >= target_size:
+        return current_size
+
+    originals = collection.get(include=["embeddings", "documents", "metadatas"])
+    vectors = np.asarray(originals["embeddings"], dtype=np.float32)
+    generator = np.random.default_rng(seed + current_size)
+
+    while current_size < target_size:
+        count = min(batch_size, target_size - current_size)
+        positions = np.arange(current_size, current_size + count) % len(vectors)
+        noisy = vectors[positions] + generator.normal(0, 0.01, (count, vectors.shape[1])).astype(np.float32)
+        noisy /= np.linalg.norm(noisy, axis=1, keepdims=True)
+        ids = [f"bench-copy-{current_size + offset}" for offset in range(count)]
+        documents = [originals["documents"][position] for position in positions]
+
+        collection.add(ids=ids, embeddings=noisy.tolist(), documents=documents,
+                       metadatas=[originals["metadatas"][position] for position in positions])
+
+        for chunk_id, document in zip(ids, documents):
+            lexical_index.add(chunk_id, document)
+
+        current_size += count
+
+    return current_size
+
+
+def run(sizes=(1000, 5000, 20000), ks=(1, 3, 5, 10), modes=("vector",), queries_per_point=50, cached=False,
+        engine="chroma", db_dir=None, seed=0):
+    """
+    Mide la latencia de db_query según el tamaño del entrenamiento, el número de resultados k y el modo, con el
+    motor de búsqueda vectorial indicado.
+
+    Por defecto se vacía la caché de consultas antes de cada medición para incluir el cálculo de la
+    incrustación; con cached=True se mide la búsqueda con la incrustación ya en caché.
+    """
+    from RAGController.chroma_db_manager import ChromaDBManager
+
+    fixtures = load_fixtures()
+    manager = ChromaDBManager(db_name="bench", db_dir=db_dir or tempfile.mkdtemp(prefix="bench-query-"),
+                              vector_engine=engine)
+    status, response = manager.create_collection(fixtures["pdf"], "pdf", CATEGORY, source="Bitcoin.pdf")
+
+    if not status:
+        raise RuntimeError(response)
+
+    queries = build_queries(fixtures["txt"].decode("utf-8"), queries_per_point, seed=seed)
+    results = []
+
+    for size in sorted(sizes):
+        actual_size = grow_collection(manager, size, seed=seed)
+
+        # Las copias se agregan directamente a Chroma, por lo que el índice exacto se reconstruye.
+        if engine == "exact":
+            manager._refresh_exact_index(CATEGORY)
+
+        for mode in modes:
+            # Primera consulta fuera de la medición: carga el índice vectorial y el índice léxico en memoria.
+            manager.db_query(queries[0], CATEGORY, max(ks), mode=mode)
+
+            for k in ks:
+                latencies = []
+
+                for query in queries:
+                    if cached:
+                        manager.embed_query(query)
+                    else:
+                        manager._embeddings.clear_cache()
+
+                    started_at = time.perf_counter()
+                    manager.db_query(query, CATEGORY, k, mode=mode)
+                    latencies.append((time.perf_counter() - started_at) * 1000)
+
+                results.append({"size": actual_size, "k": k, "mode": mode, "engine": engine,
+                                "latency_ms": summarize(latencies)})
+
+    return results
@@ -0,0 +1,237 @@
+# IMPORTACIÓN DE MÓDULOS
+import hashlib
+import json
+import math
+import os
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Vocabulario con el que se generan las respuestas simuladas.
+VOCABULARY = ("el", "banco", "de", "méxico", "regula", "los", "sistemas", "pagos", "bitcoin", "utiliza", "una",
+              "cadena", "bloques", "para", "registrar", "transacciones", "la", "tasa", "interés", "se", "publica",
+              "cada", "día", "según", "las", "disposiciones", "vigentes", "y", "red", "nodos", "valida", "valor")
+
+
+class FakeOllamaConfig:
+    """
+    Parámetros de la simulación del servidor de Ollama.
+    """
+
+    def __init__(self, tokens_per_second=50.0, first_token_ms=150.0, prompt_tokens_per_second=0.0,
+                 max_tokens=128, load_ms=0.0, models=("fake-llm:latest",), seed=0):
+        self.tokens_per_second = tokens_per_second  # Velocidad de generación.
+        self.first_token_ms = first_token_ms    # Latencia fija antes del primer fragmento.
+        self.prompt_tokens_per_second = prompt_tokens_per_second    # Evaluación del prompt (0 = instantánea).
+        self.max_tokens = max_tokens    # Fragmentos por respuesta.
+        self.load_ms = load_ms  # Tiempo de carga de un modelo la primera vez que se utiliza.
+        self.models = list(models)
+        self.seed = seed
+
+    def to_dict(self):
+        return dict(self.__dict__)
+
+
+class FakeOllamaServer:
+    """
+    Sustituto local y determinista de la API HTTP de Ollama para pruebas de rendimiento.
+
+    Atiende /api/tags, /api/ps, /api/version, /api/chat y /api/generate (con y sin stream). Las respuestas
+    dependen solo de la semilla y del contenido de la petición, y sus tiempos de los parámetros de la
+    configuración, por lo que los resultados son reproducibles entre corridas y equipos.
+
+    Como Ollama, conserva el último prompt de cada modelo y solo evalúa (y reporta en prompt_eval_count) la
+    parte que no comparte con él; los tokens se estiman a 3.5 caracteres por token.
+    """
+
+    def __init__(self, config=None, host="127.0.0.1", port=0):
+        self.config = config or FakeOllamaConfig()
+        self.__loaded_models = set()
+        self.__last_prompts = {}    # modelo -> último prompt evaluado (caché del prefijo)
+        self.__lock = threading.Lock()
+        self.__httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.__httpd.daemon_threads = True
+        self.__thread = None
+
+    @property
+    def url(self):
+        host, port = self.__httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """
+        Inicia el servidor en un hilo en segundo plano.
+        """
+        self.__thread = threading.Thread(target=self.__httpd.serve_forever, name="fake-ollama", daemon=True)
+        self.__thread.start()
+        return self
+
+    def serve_forever(self):
+        self.__httpd.serve_forever()
+
+    def stop(self):
+        self.__httpd.shutdown()
+        self.__httpd.server_close()
+
+    def generate_tokens(self, model, prompt):
+        """
+        Retorna los fragmentos de la respuesta para un prompt; la misma entrada produce siempre la misma salida.
+        """
+        digest = hashlib.sha256(f"{self.config.seed}:{model}:{prompt}".encode("utf-8")).hexdigest()
+        generator = random.Random(int(digest[:16], 16))
+        return [f"{generator.choice(VOCABULARY)} " for _ in range(self.config.max_tokens)]
+
+    def _load_delay(self, model):
+        # Simula la carga del modelo en memoria la primera vez que se utiliza.
+        with self.__lock:
+            if model in self.__loaded_models:
+                return 0.0
+
+            self.__loaded_models.add(model)
+            return self.config.load_ms / 1000
+
+    def _evaluated_tokens(self, model, prompt):
+        # Tokens que no están en el prefijo común con el prompt anterior del modelo.
+        with self.__lock:
+            cached = len(os.path.commonprefix([self.__last_prompts.get(model, ""), prompt]))
+            self.__last_prompts[model] = prompt
+
+        return math.ceil((len(prompt) - cached) / 3.5)
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, data, status=200):
+                body = json.dumps(data).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                if self.path == "/api/tags":
+                    self._send_json({"models": [server._model_info(model) for model in server.config.models]})
+                elif self.path == "/api/ps":
+                    self._send_json({"models": [server._model_info(model) for model in server.loaded_models()]})
+                elif self.path == "/api/version":
+                    self._send_json({"version": "0.0.0-fake"})
+                else:
+                    self._send_json({"error": "not found"}, status=404)
+
+            def do_HEAD(self):
+                self.send_response(200)
+                self.end_headers()
+
+            def do_POST(self):
+                if self.path not in ("/api/chat", "/api/generate"):
+                    self._send_json({"error": "not found"}, status=404)
+                    return
+
+                request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                model = request.get("model", "")
+
+                if model not in server.config.models:
+                    self._send_json({"error": f"model '{model}' not found"}, status=404)
+                    return
+
+                server._respond(self, request, chat=self.path == "/api/chat")
+
+        return Handler
+
+    def loaded_models(self):
+        with self.__lock:
+            return sorted(self.__loaded_models)
+
+    @staticmethod
+    def _model_info(model):
+        return {"name": model, "model": model, "modified_at": "2025-01-01T00:00:00Z", "size": 0,
+                "digest": hashlib.sha256(model.encode("utf-8")).hexdigest(),
+                "details": {"format": "gguf", "family": "fake", "parameter_size": "0B",
+                            "quantization_level": "Q4_0"}}
+
+    def _respond(self, handler, request, chat):
+        model = request["model"]
+
+        if chat:
+            prompt = "\n".join(message.get("content", "") for message in request.get("messages", []))
+        else:
+            prompt = request.get("prompt", "")
+
+        # Una petición sin contenido solo carga (o descarga) el modelo, como en Ollama.
+        if not prompt:
+            time.sleep(self._load_delay(model))
+            handler._send_json({"model": model, "created_at": self._now(), "done": True, "done_reason": "load",
+                                **({"message": {"role": "assistant", "content": ""}} if chat else {"response": ""})})
+            return
+
+        started_at = time.perf_counter()
+        load_seconds = self._load_delay(model)
+        prompt_tokens = self._evaluated_tokens(model, prompt)
+        prompt_seconds = prompt_tokens / self.config.prompt_tokens_per_second \
+            if self.config.prompt_tokens_per_second else 0.0
+        first_token_at = started_at + load_seconds + prompt_seconds + self.config.first_token_ms / 1000
+        tokens = self.generate_tokens(model, prompt)
+
+        def piece(content, done=False):
+            data = {"model": model, "created_at": self._now(), "done": done}
+
+            if chat:
+                data["message"] = {"role": "assistant", "content": content}
+            else:
+                data["response"] = content
+
+            return data
+
+        def summary(eval_started_at):
+            now = time.perf_counter()
+            return {"done_reason": "stop",
+                    "total_duration": int((now - started_at) * 1e9),
+                    "load_duration": int(load_seconds * 1e9),
+                    "prompt_eval_count": prompt_tokens,
+                    "prompt_eval_duration": int((eval_started_at - started_at - load_seconds) * 1e9),
+                    "eval_count": len(tokens),
+                    "eval_duration": int((now - eval_started_at) * 1e9)}
+
+        if not request.get("stream", True):
+            self._sleep_until(first_token_at + (len(tokens) - 1) / self.config.tokens_per_second)
+            handler._send_json({**piece("".join(tokens), done=True), **summary(first_token_at)})
+            return
+
+        # Respuesta en stream: una línea JSON por fragmento, con la conexión cerrada al terminar.
+        handler.send_response(200)
+        handler.send_header("Content-Type", "application/x-ndjson")
+        handler.send_header("Connection", "close")
+        handler.end_headers()
+        handler.close_connection = True
+
+        try:
+            for position, token in enumerate(tokens):
+                # Los tiempos se calculan desde el inicio para que no se acumule el retraso de cada espera.
+                self._sleep_until(first_token_at + position / self.config.tokens_per_second)
+                handler.wfile.write(json.dumps(piece(token)).encode("utf-8") + b"\n")
+                handler.wfile.flush()
+
+            handler.wfile.write(json.dumps({**piece("", done=True), **summary(first_token_at)}).encode("utf-8")
+                                + b"\n")
+            handler.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass    # El cliente canceló la respuesta.
+
+    @staticmethod
+    def _sleep_until(instant):
+        remaining = instant - time.perf_counter()
+
+        if remaining > 0:
+            time.sleep(remaining)
+
+    @staticmethod
+    def _now():
+        return datetime.now(timezone.utc).isoformat()
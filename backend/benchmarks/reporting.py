@@ -0,0 +1,106 @@
+# IMPORTACIÓN DE MÓDULOS
+import json
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+import numpy as np
+
+PERCENTILES = (50, 95, 99)
+
+
+def summarize(samples):
+    """
+    Resume una lista de mediciones con su media, mínimo, máximo y percentiles p50/p95/p99.
+    """
+    if not samples:
+        return {"count": 0}
+
+    values = np.asarray(samples, dtype=np.float64)
+    summary = {"count": len(values),
+               "mean": float(values.mean()),
+               "min": float(values.min()),
+               "max": float(values.max())}
+
+    for percentile, value in zip(PERCENTILES, np.percentile(values, PERCENTILES)):
+        summary[f"p{percentile}"] = float(value)
+
+    return summary
+
+
+def environment():
+    """
+    Describe el equipo y la versión del código en que se ejecutó la prueba, para comparar corridas.
+    """
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+
+    return {"timestamp": datetime.now(timezone.utc).isoformat(),
+            "commit": commit,
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "processor": platform.processor() or platform.machine(),
+            "cpu_count": os.cpu_count(),
+            "embedding_backend": os.getenv("EMBEDDING_BACKEND", "huggingface")}
+
+
+def write_report(name, parameters, results, output=None):
+    """
+    Imprime el resultado de una prueba y, si se indica, lo guarda como JSON.
+    """
+    report = {"benchmark": name, "environment": environment(), "parameters": parameters, "results": results}
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    print(text)
+
+    if output:
+        with open(output, "w", encoding="utf-8") as file:
+            file.write(text)
+
+    return report
+
+
+def _flatten(data, prefix=""):
+    # Convierte el resultado anidado en pares ruta -> valor numérico.
+    if isinstance(data, dict):
+        for key, value in data.items():
+            yield from _flatten(value, f"{prefix}.{key}" if prefix else str(key))
+    elif isinstance(data, list):
+        for position, value in enumerate(data):
+            yield from _flatten(value, f"{prefix}[{position}]")
+    elif isinstance(data, (int, float)) and not isinstance(data, bool):
+        yield prefix, data
+
+
+def compare_reports(baseline_path, candidate_path):
+    """
+    Compara dos resultados guardados de la misma prueba e imprime la variación de cada métrica.
+    """
+    with open(baseline_path, "r", encoding="utf-8") as file:
+        baseline = json.load(file)
+
+    with open(candidate_path, "r", encoding="utf-8") as file:
+        candidate = json.load(file)
+
+    if baseline["benchmark"] != candidate["benchmark"]:
+        raise ValueError(f"No se pueden comparar las pruebas {baseline['benchmark']} y {candidate['benchmark']}.")
+
+    baseline_values = dict(_flatten(baseline["results"]))
+    rows = []
+
+    for path, value in _flatten(candidate["results"]):
+        if path in baseline_values:
+            previous = baseline_values[path]
+            change = (value - previous) / previous * 100 if previous else float("nan")
+            rows.append((path, previous, value, change))
+
+    width = max((len(row[0]) for row in rows), default=10)
+    print(f"{'métrica':<{width}}  {'base':>14}  {'nuevo':>14}  {'cambio':>9}")
+
+    for path, previous, value, change in rows:
+        print(f"{path:<{width}}  {previous:>14.3f}  {value:>14.3f}  {change:>+8.1f}%")
+
+    return rows
@@ -0,0 +1,57 @@
+# Ingesta masiva fuera de línea de un árbol de carpetas (una categoría por carpeta de primer nivel).
+# Uso: python bulk_ingest.py <carpeta> [--workers N] [--batch-size N] [--report reporte.json]
+# Debe ejecutarse con el servicio detenido; si se interrumpe, volver a ejecutarlo reanuda la ingesta.
+import argparse
+import json
+import os
+from RAGController.bulk_ingester import BulkIngester
+from RAGController.chroma_db_manager import ChromaDBManager
+
+
+def _parser():
+    parser = argparse.ArgumentParser(prog="python bulk_ingest.py",
+                                     description="Ingesta masiva de documentos (pdf, txt, docx).")
+    parser.add_argument("root", help="Carpeta con una subcarpeta por categoría.")
+    parser.add_argument("--category", help="Categoría de todos los archivos (por defecto, la subcarpeta).")
+    parser.add_argument("--default-category", default="general",
+                        help="Categoría de los archivos ubicados directamente en la raíz.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Procesos de extracción.")
+    parser.add_argument("--batch-size", type=int, default=512, help="Pedazos incrustados por lote.")
+    parser.add_argument("--checkpoint", help="Bitácora del avance (por defecto, junto a la base de datos).")
+    parser.add_argument("--checkpoint-interval", type=float, default=30.0, help="Segundos entre guardados.")
+    parser.add_argument("--db-dir", default=r".\knowledge-base")
+    parser.add_argument("--db-name", default="db")
+    parser.add_argument("--report", help="Archivo JSON donde se guarda el reporte.")
+    return parser
+
+
+def main():
+    args = _parser().parse_args()
+    manager = ChromaDBManager(db_name=args.db_name, db_dir=args.db_dir)
+    checkpoint = args.checkpoint or os.path.join(args.db_dir, f"{args.db_name}_bulk_ingest.jsonl")
+    ingester = BulkIngester(manager, args.root, category=args.category, default_category=args.default_category,
+                            workers=args.workers, embed_batch_size=args.batch_size, checkpoint_path=checkpoint,
+                            checkpoint_interval=args.checkpoint_interval)
+    report = ingester.run()
+
+    print(f">>> Archivos: {report['files_done']} ingeridos, {report['files_unchanged']} sin cambios, "
+          f"{report['files_failed']} fallidos y {report['files_skipped']} omitidos (ya terminados).")
+    print(f">>> Pedazos: {report['chunks_embedded']} incrustados, {report['chunks_reused']} reutilizados y "
+          f"{report['chunks_removed']} eliminados, de {report['pages']} páginas.")
+    print(f">>> Duración: {report['seconds']} s ({report['files_per_second']} archivos/s, "
+          f"{report['chunks_per_second']} pedazos/s; incrustación {report['embed_seconds']} s, "
+          f"almacenamiento {report['store_seconds']} s).")
+
+    for failure in report["failures"]:
+        print(f">>> Error en {failure['path']}: {failure['error']}")
+
+    if report["interrupted"]:
+        print(">>> Ingesta interrumpida; vuelve a ejecutar el comando para reanudarla.")
+
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,7 @@
+# Reconstruye el manifiesto de entrenamientos a partir de las colecciones de la base de datos.
+# Uso: python rebuild_manifest.py
+from RAGController.chroma_db_manager import ChromaDBManager
+
+if __name__ == "__main__":
+    total = ChromaDBManager().rebuild_manifest()
+    print(f">>> Manifiesto reconstruido con {total} entrenamientos.")
@@ -1,16 +1,73 @@
 from flask.views import MethodView
 from flask_smorest import Blueprint
 
-from flask import request
+from flask import g, request
 from schemas import rag_schema
 from flask import Response
 from RAGController.chat_session import ChatSession
+from RAGController.session_store import current_session_id, issue_session, resolve_session_id
 
 blp = Blueprint("RAG Controller",
                 __name__,
                 description="Controlador del Sistema de Generación Aumentada por Recuperación")
 
 manager = ChatSession()
+# El modelo de incrustaciones y los índices se cargan en segundo plano; el servidor atiende mientras tanto.
+manager.start_warmup()
+
+
+@blp.before_request
+def load_session():
+    """
+    Asigna la sesión del cliente a la petición en curso; la configuración del chat se guarda por sesión. A los
+    clientes que no envían una sesión se les emite una nueva.
+    """
+    session_id, issued = resolve_session_id(request.headers, request.cookies)
+    current_session_id.set(session_id)
+    g.issued_session_id = session_id if issued else None
+
+
+@blp.after_request
+def send_session(response):
+    """
+    Entrega al cliente la sesión emitida en esta petición.
+    """
+    if g.get("issued_session_id"):
+        issue_session(response, g.issued_session_id)
+
+    return response
+
+
+@blp.route("/healthz")
+class HealthCheck(MethodView):
+
+    def get(self):
+        """
+        Método que indica que el proceso está vivo, aunque los componentes sigan cargando.
+        """
+        return {"status": True, "response": "ok"}
+
+
+@blp.route("/readyz")
+class ReadinessCheck(MethodView):
+
+    def get(self):
+        """
+        Método que indica si el servicio está listo para atender consultas, con el estado de cada componente.
+        """
+        ready, components = manager.get_readiness()
+
+        return {"status": ready, "response": components}, 200 if ready else 503
+
+
+@blp.route("/metrics")
+class MetricsManager(MethodView):
+
+    def get(self):
+        """
+        Método que retorna las métricas del servicio en el formato de texto de Prometheus.
+        """
+        return Response(manager.get_metrics(), content_type="text/plain; version=0.0.4; charset=utf-8")
 
 
 @blp.route("/model")
@@ -24,7 +81,11 @@ class ModelManager(MethodView):
         # Se obtiene el modelo activo asignado.
         status, response = manager.get_active_model()
 
-        return {"status":status, "response":response}
+        if not status:
+            return {"status":status, "response":response}
+
+        # Estado de la carga del modelo en Ollama (se carga en segundo plano al activarlo).
+        return {"status":status, "response":response, "load":manager.get_model_load_status(response)}
 
     @blp.arguments(rag_schema.PlainChangeModel)
     def post(self, data):
@@ -96,6 +157,23 @@ class DocumentesRecovered(MethodView):
         return {"status": status, "response": response}
 
 
+@blp.route("/retrieval-mode")
+class RetrievalModeManager(MethodView):
+
+    def get(self):
+        status, response = manager.get_retrieval_mode()
+
+        return {"status": status, "response": response}
+
+    @blp.arguments(rag_schema.PlainChangeRetrievalMode)
+    def post(self, data):
+        mode = data["mode"]
+
+        status, response = manager.change_retrieval_mode(mode)
+
+        return {"status": status, "response": response}
+
+
 @blp.route("/models")
 class ModelsManager(MethodView):
 
@@ -128,9 +206,16 @@ class CollectionsManager(MethodView):
         file_extension = file.filename.rsplit(".", 1)[-1].lower()
         file_content = file.read()
 
-        status, response = manager.create_collection(file_content=file_content,
-                                                     file_extension=file_extension,
-                                                     category=category)
+        # La ingesta se procesa en segundo plano; se retorna el trabajo para consultar su avance.
+        status, response = manager.submit_create_collection(file_content=file_content,
+                                                            file_extension=file_extension,
+                                                            category=category,
+                                                            source=file.filename)
+
+        if status:
+            return {"status": status,
+                    "response": f"Se está procesando el entrenamiento {category}.",
+                    "job": response}
 
         return {"status":status, "response":response}
 
@@ -160,9 +245,47 @@ class CollectionsManager(MethodView):
         file_extension = file.filename.rsplit(".", 1)[-1].lower()
         file_content = file.read()
 
-        status, response = manager.update_collection(file_content=file_content,
-                                                     file_extension=file_extension,
-                                                     category=category)
+        # La ingesta se procesa en segundo plano; se retorna el trabajo para consultar su avance.
+        status, response = manager.submit_update_collection(file_content=file_content,
+                                                            file_extension=file_extension,
+                                                            category=category,
+                                                            source=file.filename)
+
+        if status:
+            return {"status": status,
+                    "response": f"Se está procesando el entrenamiento {category}.",
+                    "job": response}
+
+        return {"status": status, "response": response}
+
+
+@blp.route("/jobs")
+class IngestionJobsManager(MethodView):
+
+    def get(self):
+        """
+        Método para obtener el estado de los trabajos de ingesta.
+        """
+        response = manager.get_ingestion_jobs()
+        return {"status": True, "response": response}
+
+
+@blp.route("/jobs/<string:job_id>")
+class IngestionJobManager(MethodView):
+
+    def get(self, job_id):
+        """
+        Método para obtener el estado y avance de un trabajo de ingesta.
+        """
+        status, response = manager.get_ingestion_job(job_id)
+
+        return {"status": status, "response": response}
+
+    def delete(self, job_id):
+        """
+        Método para cancelar un trabajo de ingesta.
+        """
+        status, response = manager.cancel_ingestion_job(job_id)
 
         return {"status": status, "response": response}
 
@@ -179,7 +302,79 @@ class RAGManager(MethodView):
         query = data["query"]
         category = data["category"]
 
-        status, response= manager.query_collection(query=query, category=category)
+        status, response= manager.query_collection(query=query, category=category, mode=data.get("mode"))
+
+        return {"status": status, "response": response}
+
+
+@blp.route("/rag/batch")
+class RAGBatchManager(MethodView):
+
+    @blp.arguments(rag_schema.PlainBatchQueryCollection)
+    def post(self, data):
+        """
+        Método para realizar varias consultas a las colecciones de la base de datos en una sola petición.
+        Cada consulta puede indicar su entrenamiento; si no lo hace, se usa el entrenamiento general de la petición.
+        """
+
+        default_category = data.get("category")
+        queries = []
+
+        for item in data["queries"]:
+            category = item.get("category") or default_category
+
+            if not category:
+                return {"status": False, "response": "Cada consulta debe indicar un entrenamiento."}
+
+            queries.append((item["query"], category))
+
+        results = manager.query_collection_batch(queries=queries, k=data.get("k"))
+
+        return {"status": True,
+                "response": [{"query": query, "category": category, "status": status, "response": response}
+                             for (query, category), (status, response) in zip(queries, results)]}
+
+
+@blp.route("/generation-queue")
+class GenerationQueueManager(MethodView):
+
+    def get(self):
+        """
+        Método que retorna el estado de la cola de generación: turnos en uso por servidor y peticiones en espera.
+        """
+        status, response = manager.get_scheduler_status()
+
+        return {"status": status, "response": response}
+
+
+@blp.route("/shared-state")
+class SharedStateManager(MethodView):
+
+    def get(self):
+        """
+        Método que retorna el estado compartido entre procesos trabajadores: proceso escritor y versiones.
+        """
+        status, response = manager.get_shared_state_status()
+
+        return {"status": status, "response": response}
+
+
+@blp.route("/conversation")
+class ConversationManager(MethodView):
+
+    def get(self):
+        """
+        Método que retorna el historial de la conversación de la sesión.
+        """
+        status, response = manager.get_conversation()
+
+        return {"status": status, "response": response}
+
+    def delete(self):
+        """
+        Método que elimina el historial de la conversación de la sesión.
+        """
+        status, response = manager.clear_conversation()
 
         return {"status": status, "response": response}
 
@@ -195,5 +390,11 @@ class OllamaManager(MethodView):
     def post(self,data):
 
         query = data["query"]
+        priority = request.headers.get("X-Priority")
+        status, error = manager.check_admission(query, priority)
+
+        # Con la cola de generación llena se rechaza de inmediato en lugar de esperar indefinidamente.
+        if not status:
+            return {"status": False, "response": str(error)}, 429, {"Retry-After": str(error.retry_after)}
 
-        return Response(manager.query_ollama_model(query), content_type="text/plain")
\ No newline at end of file
+        return Response(manager.query_ollama_model(query, priority), content_type="text/plain")
\ No newline at end of file
@@ -12,10 +12,22 @@ class PlainChangeK(Schema):
 class PlainChangeLevel(Schema):
     level = fields.Int(required=True)
 
+class PlainChangeRetrievalMode(Schema):
+    mode = fields.Str(required=True, validate=validate.OneOf(["vector", "lexical", "hybrid"]))
+
 class PlainQueryCollection(PlainChangeCategory):
     query = fields.Str(required=True)
+    mode = fields.Str(validate=validate.OneOf(["vector", "lexical", "hybrid"]))
 
 class PlainQueryModel(Schema):
     query = fields.Str(required=True)
 
+class PlainBatchQueryItem(Schema):
+    query = fields.Str(required=True)
+    category = fields.Str()
 
+class PlainBatchQueryCollection(Schema):
+    queries = fields.List(fields.Nested(PlainBatchQueryItem), required=True,
+                          validate=validate.Length(min=1, max=1000))
+    category = fields.Str()
+    k = fields.Int(validate=validate.Range(min=1))
@@ -0,0 +1,30 @@
+# Exporta o importa entrenamientos como instantáneas compactas, para poblar otro nodo sin volver a incrustar.
+# Uso: python snapshot.py export entrenamientos.snapshot [--category BANXICO ...]
+#      python snapshot.py import entrenamientos.snapshot [--category BANXICO ...] [--overwrite]
+# La importación debe ejecutarse con el servicio detenido.
+import argparse
+from RAGController.chroma_db_manager import ChromaDBManager
+
+
+def _parser():
+    parser = argparse.ArgumentParser(prog="python snapshot.py", description="Instantáneas de entrenamientos.")
+    parser.add_argument("action", choices=["export", "import"])
+    parser.add_argument("path", help="Archivo de la instantánea.")
+    parser.add_argument("--category", nargs="+", help="Entrenamientos a procesar (por defecto, todos).")
+    parser.add_argument("--overwrite", action="store_true", help="Reemplazar los entrenamientos ya registrados.")
+    parser.add_argument("--db-dir", default=r".\knowledge-base")
+    parser.add_argument("--db-name", default="db")
+    return parser
+
+
+if __name__ == "__main__":
+    args = _parser().parse_args()
+    manager = ChromaDBManager(db_name=args.db_name, db_dir=args.db_dir)
+
+    if args.action == "export":
+        status, message = manager.export_snapshot(args.path, categories=args.category)
+    else:
+        status, message = manager.import_snapshot(args.path, categories=args.category, overwrite=args.overwrite)
+
+    print(f">>> {message}")
+    raise SystemExit(0 if status else 1)
@@ -0,0 +1,85 @@
+# Pruebas del índice léxico (BM25). Uso (desde backend): python -m pytest tests
+import os
+import tempfile
+import unittest
+from RAGController.bm25_index import BM25Index, BM25IndexStore
+
+DOCUMENTS = {
+    "inflacion": "La inflación es el aumento general y sostenido de los precios.",
+    "subyacente": "La inflación subyacente excluye los precios de energía y alimentos.",
+    "bitcoin": "Bitcoin es un sistema de dinero electrónico entre pares.",
+    "tasas": "El banco central sube las tasas de interés para contener la inflación.",
+}
+
+
+class BM25IndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.index = BM25Index()
+
+        for doc_id, text in DOCUMENTS.items():
+            self.index.add(doc_id, text)
+
+    def test_search_ranks_matching_documents(self):
+        results = self.index.search("inflación subyacente", 3)
+
+        self.assertEqual(results[0][0], "subyacente")
+        self.assertEqual({doc_id for doc_id, _ in results}, {"subyacente", "inflacion", "tasas"})
+        self.assertEqual([doc_id for doc_id, _ in self.index.search("bitcoin", 5)], ["bitcoin"])
+        self.assertEqual(self.index.search("inexistente", 5), [])
+
+    def test_removed_documents_are_not_returned(self):
+        before = dict(self.index.search("precios", 5))
+        self.index.remove("subyacente", DOCUMENTS["subyacente"])
+
+        self.assertEqual(len(self.index), 3)
+        self.assertNotIn("subyacente", dict(self.index.search("inflación subyacente", 5)))
+        # Las puntuaciones de los demás cambian con la longitud promedio y el número de pedazos.
+        self.assertNotEqual(dict(self.index.search("precios", 5))["inflacion"], before["inflacion"])
+
+        # Un pedazo eliminado puede volver a agregarse.
+        self.index.add("subyacente", DOCUMENTS["subyacente"])
+        self.assertEqual(dict(self.index.search("precios", 5)), before)
+
+    def test_rows_are_compacted_after_many_removals(self):
+        index = BM25Index()
+
+        for version in range(3):
+            for number in range(1000):
+                index.add(f"pedazo-{number}", f"texto {number} versión {version}")
+
+            if version < 2:
+                for number in range(1000):
+                    index.remove(f"pedazo-{number}", f"texto {number} versión {version}")
+
+        self.assertEqual(len(index), 1000)
+        self.assertLessEqual(len(index._ids), 3024)
+        self.assertEqual(index.search("texto 7", 1)[0][0], "pedazo-7")
+
+
+class BM25IndexStoreTest(unittest.TestCase):
+
+    def test_indexes_are_saved_as_json(self):
+        with tempfile.TemporaryDirectory() as directory:
+            index = BM25Index()
+
+            for doc_id, text in DOCUMENTS.items():
+                index.add(doc_id, text)
+
+            store = BM25IndexStore(directory)
+            store.publish("coleccion", index)
+            store.save("coleccion")
+            self.assertTrue(os.path.isfile(os.path.join(directory, "coleccion.bm25.json")))
+
+            loaded = BM25IndexStore(directory).load("coleccion")
+            self.assertEqual(loaded.search("inflación", 4), index.search("inflación", 4))
+
+            # Los archivos de versiones anteriores (pickle) no se cargan.
+            with open(os.path.join(directory, "anterior.bm25"), "wb") as file:
+                file.write(b"\x80\x04N.")
+
+            self.assertIsNone(BM25IndexStore(directory).load("anterior"))
+
+
+if __name__ == "__main__":
+    unittest.main()
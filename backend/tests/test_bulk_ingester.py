@@ -0,0 +1,105 @@
+# Pruebas de la reanudación de la ingesta masiva. Uso (desde backend): python -m pytest tests
+import os
+import tempfile
+import unittest
+from RAGController.bulk_ingester import BulkIngester
+
+
+class FakeManager:
+    """
+    Sustituto de ChromaDBManager que guarda los pedazos y los documentos registrados en memoria.
+    """
+
+    def __init__(self):
+        self.chunks = {}    # categoría -> {identificador: texto}
+        self.sources = {}   # (categoría, documento) -> hash
+        self.embedded = 0
+
+    def get_splitter_settings(self):
+        return {"chunk_size": 64, "chunk_overlap": 8}
+
+    def get_source_hash(self, category, source):
+        return self.sources.get((category, source))
+
+    def missing_chunk_ids(self, category, chunk_ids):
+        return {chunk_id for chunk_id in chunk_ids if chunk_id not in self.chunks.get(category, {})}
+
+    def embed_documents(self, texts):
+        self.embedded += len(texts)
+        return [[float(len(text))] for text in texts]
+
+    def store_chunks(self, category, chunks, embeddings):
+        self.chunks.setdefault(category, {}).update((chunk_id, text) for chunk_id, text, _ in chunks)
+
+    def index_chunks(self, category, chunks):
+        pass
+
+    def complete_sources(self, category, sources):
+        for source, (file_hash, _) in sources.items():
+            self.sources[(category, source)] = file_hash
+
+        return 0
+
+    def refresh_exact_indexes(self, categories):
+        pass
+
+
+class BulkIngesterResumeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.directory.name, "documentos")
+        self.checkpoint = os.path.join(self.directory.name, "avance.jsonl")
+        os.makedirs(os.path.join(self.root, "economia"))
+
+        for path, words in (("economia/inflacion.txt", 60), ("economia/tasas.txt", 40), ("notas.txt", 30)):
+            with open(os.path.join(self.root, path), "w", encoding="utf-8") as file:
+                file.write(" ".join(f"{os.path.basename(path)}-{word}" for word in range(words)))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def ingest(self, manager, checkpoint=None):
+        return BulkIngester(manager, self.root, workers=2, embed_batch_size=8,
+                            checkpoint_path=checkpoint or self.checkpoint).run()
+
+    def test_finished_files_are_skipped_on_resume(self):
+        manager = FakeManager()
+        report = self.ingest(manager)
+
+        self.assertEqual(report["files_done"], 3)
+        self.assertEqual(report["categories"], ["economia", "general"])
+        self.assertEqual(manager.embedded, sum(len(chunks) for chunks in manager.chunks.values()))
+
+        report = self.ingest(manager)
+        self.assertEqual(report["files_skipped"], 3)
+        self.assertEqual(report["chunks_embedded"], 0)
+
+    def test_stored_chunks_are_not_embedded_again(self):
+        manager = FakeManager()
+        self.ingest(manager)
+        stored = manager.embedded
+
+        # Ingesta interrumpida antes de registrar los documentos: los pedazos ya están almacenados.
+        manager.sources.clear()
+        report = self.ingest(manager, checkpoint=os.path.join(self.directory.name, "otro.jsonl"))
+
+        self.assertEqual(report["files_done"], 3)
+        self.assertEqual(report["chunks_embedded"], 0)
+        self.assertEqual(report["chunks_reused"], stored)
+
+    def test_changed_files_are_ingested_again(self):
+        manager = FakeManager()
+        self.ingest(manager)
+
+        with open(os.path.join(self.root, "notas.txt"), "a", encoding="utf-8") as file:
+            file.write(" contenido nuevo al final del documento")
+
+        report = self.ingest(manager)
+        self.assertEqual(report["files_skipped"], 2)
+        self.assertEqual(report["files_done"], 1)
+        self.assertGreater(report["chunks_embedded"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
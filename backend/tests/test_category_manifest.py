@@ -0,0 +1,50 @@
+# Pruebas del manifiesto de entrenamientos. Uso (desde backend): python -m pytest tests
+import os
+import tempfile
+import unittest
+from RAGController.category_manifest import CategoryManifest
+
+
+class CategoryManifestTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "manifest.json")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_sources_and_chunks_survive_a_reload(self):
+        manifest = CategoryManifest(self.path)
+        self.assertFalse(manifest.exists())
+
+        manifest.register("economia")
+        manifest.record_source("economia", "inflacion.pdf", "hash-1", chunks_added=10)
+        manifest.record_source("economia", "inflacion.pdf", "hash-2", chunks_added=4, chunks_removed=6)
+
+        reloaded = CategoryManifest(self.path)
+        self.assertEqual(reloaded.categories(), ["economia"])
+        self.assertEqual(reloaded.get("economia")["chunks"], 8)
+        self.assertEqual(reloaded.source_hash("economia", "inflacion.pdf"), "hash-2")
+        self.assertIsNone(reloaded.source_hash("economia", "otro.pdf"))
+
+    def test_get_returns_a_copy(self):
+        manifest = CategoryManifest(self.path)
+        manifest.record_sources("economia", {"a.txt": "hash-a", "b.txt": "hash-b"}, chunks=5)
+
+        entry = manifest.get("economia")
+        entry["sources"].clear()
+        self.assertEqual(len(manifest.get("economia")["sources"]), 2)
+
+    def test_remove_and_replace(self):
+        manifest = CategoryManifest(self.path)
+        manifest.register("economia")
+        manifest.remove("economia")
+        self.assertIsNone(manifest.get("economia"))
+
+        manifest.replace({"historia": {"chunks": 3, "sources": {}}})
+        self.assertEqual(CategoryManifest(self.path).categories(), ["historia"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+# Pruebas de las instantáneas de entrenamientos. Uso (desde backend): python -m pytest tests
+import os
+import tempfile
+import unittest
+import numpy as np
+from RAGController.collection_snapshot import CollectionSnapshot, SnapshotError
+
+
+def batch(count, dim):
+    return [f"chunk-{row}" for row in range(count)], np.ones((count, dim)), ["texto"] * count, [{}] * count
+
+
+class CollectionSnapshotTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "snapshot.zip")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_manifest_records_backend_and_dimension(self):
+        snapshot = CollectionSnapshot(self.path)
+        counts = snapshot.write("modelo", "onnx", 4, [("A", {"sources": {}}, [batch(3, 4)]), ("B", None, [])])
+        manifest = snapshot.read_manifest()
+
+        self.assertEqual(counts, {"A": 3, "B": 0})
+        self.assertEqual((manifest["backend"], manifest["dim"]), ("onnx", 4))
+        self.assertEqual(manifest["categories"]["A"]["dim"], 4)
+        snapshot.verify(manifest)
+
+        ids, vectors, _, _ = next(snapshot.iter_batches(manifest, "A"))
+        self.assertEqual(ids, ["chunk-0", "chunk-1", "chunk-2"])
+        self.assertEqual(vectors.shape, (3, 4))
+
+    def test_vectors_must_match_the_declared_dimension(self):
+        with self.assertRaises(SnapshotError):
+            CollectionSnapshot(self.path).write("modelo", "onnx", 4, [("A", None, [batch(3, 8)])])
+
+
+if __name__ == "__main__":
+    unittest.main()
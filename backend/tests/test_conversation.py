@@ -0,0 +1,67 @@
+# Pruebas del historial de conversación. Uso (desde backend): python -m pytest tests
+import unittest
+import numpy as np
+from RAGController.answer_cache import SemanticAnswerCache
+from RAGController.conversation import Conversation
+
+
+class ConversationCompactionTest(unittest.TestCase):
+
+    def test_long_answers_keep_previous_turn(self):
+        conversation = Conversation(token_budget=1024)
+
+        for turn in range(10):
+            conversation.add_turn(f"Pregunta {turn}", "x" * 1792)
+
+            summary, messages = conversation.snapshot()
+            self.assertEqual(conversation.last_question(), f"Pregunta {turn}")
+            self.assertEqual(messages[-2], {'role': 'user', 'content': f"Pregunta {turn}"})
+            self.assertLessEqual(conversation.to_dict()["tokens"], 1024)
+
+        self.assertIn("Pregunta 8", summary)
+
+    def test_short_turns_are_not_compacted(self):
+        conversation = Conversation(token_budget=1024)
+
+        self.assertEqual(conversation.add_turn("¿Qué es la inflación?", "Es el aumento general de precios."), 0)
+        self.assertEqual(conversation.add_turn("¿Y la subyacente?", "Excluye los precios más volátiles."), 0)
+        self.assertEqual(len(conversation.snapshot()[1]), 4)
+
+
+class ConversationDigestTest(unittest.TestCase):
+
+    def test_same_history_same_digest(self):
+        first, second = Conversation(), Conversation()
+        self.assertEqual(first.digest(), "")
+
+        first.add_turn("¿Qué es la inflación?", "Es el aumento general de precios.")
+        self.assertNotEqual(first.digest(), second.digest())
+
+        second.add_turn("¿Qué es la inflación?", "Es el aumento general de precios.")
+        self.assertEqual(first.digest(), second.digest())
+
+        first.clear()
+        self.assertEqual(first.digest(), "")
+
+    def test_answers_are_cached_per_history(self):
+        cache = SemanticAnswerCache(max_scopes=2)
+        vector = np.ones(4, dtype=np.float32)
+        conversation = Conversation()
+        scope = ("modelo", "categoria", 5, "nivel", "hybrid")
+
+        cache.store((*scope, conversation.digest()), vector, "Respuesta inicial")
+        conversation.add_turn("¿Qué es la inflación?", "Respuesta inicial")
+
+        self.assertIsNone(cache.lookup((*scope, conversation.digest()), vector))
+        cache.store((*scope, conversation.digest()), vector, "Respuesta de seguimiento")
+        self.assertEqual(cache.lookup((*scope, conversation.digest()), vector), "Respuesta de seguimiento")
+        self.assertEqual(cache.lookup((*scope, ""), vector), "Respuesta inicial")
+
+        # Al superar el límite de ámbitos se descarta el usado hace más tiempo.
+        cache.store((*scope, "otro"), vector, "Otra respuesta")
+        self.assertIsNone(cache.lookup((*scope, conversation.digest()), vector))
+        self.assertEqual(cache.stats()["scopes"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+# Pruebas de las versiones del índice de búsqueda exacta. Uso (desde backend): python -m pytest tests
+import os
+import tempfile
+import time
+import unittest
+import numpy as np
+from RAGController.exact_index import ExactIndexStore
+
+
+def batches(count, dim=4, seed=0):
+    vectors = np.random.default_rng(seed).normal(size=(count, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    ids = [f"chunk-{row}" for row in range(count)]
+    return [(ids, vectors, [f"texto {row}" for row in range(count)], [{"row": row} for row in range(count)])]
+
+
+class ExactIndexStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory(ignore_cleanup_errors=True)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def versions(self):
+        return sorted(entry for entry in os.listdir(os.path.join(self.directory.name, "coleccion"))
+                      if entry.startswith("v"))
+
+    def test_previous_version_is_kept_while_it_may_be_in_use(self):
+        store = ExactIndexStore(self.directory.name, retain_seconds=60)
+        store.write("coleccion", batches(5), "modelo", source_version=1)
+        previous = store.get("coleccion")
+
+        for source_version in (2, 3):
+            store.write("coleccion", batches(6, seed=source_version), "modelo", source_version=source_version)
+
+        # Las versiones reemplazadas hace menos de retain_seconds se conservan y se pueden seguir leyendo.
+        self.assertEqual(len(self.versions()), 3)
+        self.assertEqual(previous.query(batches(1)[0][1], 1)["ids"][0], ["chunk-0"])
+        self.assertEqual(store.info("coleccion")["source_version"], 3)
+
+    def test_old_versions_are_removed_after_the_grace_period(self):
+        store = ExactIndexStore(self.directory.name, retain_seconds=0.2)
+
+        for source_version in (1, 2, 3):
+            store.write("coleccion", batches(5), "modelo", source_version=source_version)
+
+        time.sleep(0.3)
+        store.write("coleccion", batches(5), "modelo", source_version=4)
+
+        # Solo quedan la versión vigente y la inmediatamente anterior.
+        self.assertEqual(len(self.versions()), 2)
+        self.assertEqual(store.get("coleccion").header["source_version"], 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
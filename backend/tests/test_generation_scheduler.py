@@ -0,0 +1,105 @@
+# Pruebas del control de admisión y de la carga anticipada de modelos. Uso (desde backend): python -m pytest tests
+import time
+import unittest
+from RAGController.generation_scheduler import GenerationScheduler, QueueFullError
+from RAGController.model_preloader import ModelPreloader
+
+
+class GenerationSchedulerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.scheduler = GenerationScheduler(hosts=("http://ollama-a:11434", "http://ollama-b:11434"),
+                                             slots_per_model=1, max_queue=1, default_generation_seconds=10.0)
+
+    def test_turns_are_spread_across_endpoints(self):
+        first = self.scheduler.submit("modelo")
+        second = self.scheduler.submit("modelo")
+
+        self.assertIsNotNone(first.lease)
+        self.assertIsNotNone(second.lease)
+        self.assertNotEqual(first.lease.endpoint.name, second.lease.endpoint.name)
+
+    def test_full_queue_is_rejected_with_retry_after(self):
+        leases = [self.scheduler.submit("modelo").lease for _ in range(2)]
+        queued = self.scheduler.submit("modelo")
+
+        self.assertIsNone(queued.lease)
+        self.assertEqual(queued.position(), 1)
+        self.assertEqual(self.scheduler.admission("modelo"), 10)
+
+        with self.assertRaises(QueueFullError) as context:
+            self.scheduler.submit("modelo")
+
+        self.assertEqual(context.exception.retry_after, 10)
+
+        # Al liberar un turno se concede al ticket en espera y vuelve a haber lugar en la cola.
+        leases[0].release()
+        self.assertIsNotNone(queued.lease)
+        self.assertIsNone(self.scheduler.admission("modelo"))
+
+    def test_interactive_requests_go_first(self):
+        scheduler = GenerationScheduler(hosts=(None,), slots_per_model=1, max_queue=4)
+        lease = scheduler.submit("modelo").lease
+        batch = scheduler.submit("modelo", GenerationScheduler.BATCH)
+        interactive = scheduler.submit("modelo", GenerationScheduler.INTERACTIVE)
+
+        lease.release()
+        self.assertIsNotNone(interactive.lease)
+        self.assertIsNone(batch.lease)
+
+
+class FakeClient:
+
+    def __init__(self, available=True):
+        self.available = available
+        self.resident = []
+
+    def generate(self, model, prompt, keep_alive):
+        if not self.available:
+            raise ConnectionError("sin conexión")
+
+        self.resident.append(model)
+
+    def ps(self):
+        if not self.available:
+            raise ConnectionError("sin conexión")
+
+        return {'models': [{'model': model} for model in self.resident]}
+
+
+class FakeEndpoint:
+
+    def __init__(self, name, client):
+        self.name = name
+        self.client = client
+
+
+class ModelPreloaderTest(unittest.TestCase):
+
+    def wait_for(self, preloader, model, state):
+        deadline = time.monotonic() + 2
+
+        while preloader.status(model)["state"] != state and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        return preloader.status(model)
+
+    def test_models_are_loaded_on_every_endpoint(self):
+        first, second = FakeEndpoint("a", FakeClient()), FakeEndpoint("b", FakeClient(available=False))
+        preloader = ModelPreloader([first, second], pinned_models=["modelo"])
+
+        preloader.preload("modelo")
+        status = self.wait_for(preloader, "modelo", ModelPreloader.FAILED)
+        self.assertEqual(status["endpoints"], {"a": ModelPreloader.LOADED, "b": ModelPreloader.FAILED})
+
+        # Un modelo fijado se vuelve a cargar en los servidores que lo descartaron.
+        second.client.available = True
+        first.client.resident.clear()
+        preloader.sync(["modelo"])
+        status = self.wait_for(preloader, "modelo", ModelPreloader.LOADED)
+        self.assertEqual(status["endpoints"], {"a": ModelPreloader.LOADED, "b": ModelPreloader.LOADED})
+        self.assertEqual(first.client.resident, ["modelo"])
+
+
+if __name__ == "__main__":
+    unittest.main()
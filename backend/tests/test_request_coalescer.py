@@ -0,0 +1,96 @@
+# Pruebas de la generación compartida entre peticiones idénticas. Uso (desde backend): python -m pytest tests
+import asyncio
+import threading
+import unittest
+from RAGController.request_coalescer import RequestCoalescer
+
+
+def chunk(content):
+    return {'message': {'content': content}}
+
+
+class RequestCoalescerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.coalescer = RequestCoalescer()
+        self.key = RequestCoalescer.make_key("modelo", "categoria", 3, 1, "vector", "", "¿Qué es la Inflación?")
+        self.release = threading.Event()
+        self.closed = threading.Event()
+        self.calls = 0
+
+    def factory(self):
+        self.calls += 1
+
+        def generate():
+            try:
+                yield chunk("La inflación ")
+                self.release.wait(2)
+                yield chunk("es el aumento de precios.")
+            finally:
+                self.closed.set()
+
+        return generate()
+
+    def test_keys_depend_on_normalized_query_and_history(self):
+        self.assertEqual(self.key, RequestCoalescer.make_key("modelo", "categoria", 3, 1, "vector", "",
+                                                             "que es la inflacion"))
+        self.assertNotEqual(self.key, RequestCoalescer.make_key("modelo", "categoria", 3, 1, "vector", "abc",
+                                                                "¿Qué es la Inflación?"))
+
+    def test_identical_requests_share_one_generation(self):
+        first, started = self.coalescer.join_or_start(self.key, self.factory)
+        second = self.coalescer.join(self.key)
+
+        self.assertTrue(started)
+        self.assertIs(first, second)
+        self.release.set()
+
+        # Quien se une tarde recibe también los fragmentos producidos antes.
+        for flight in (first, second):
+            self.assertEqual("".join(item['message']['content'] for item in flight.stream()),
+                             "La inflación es el aumento de precios.")
+
+        self.assertEqual(self.calls, 1)
+        self.assertFalse(self.coalescer.is_inflight(self.key))
+        self.assertEqual(self.coalescer.stats()["started"], 1)
+        self.assertEqual(self.coalescer.stats()["joined"], 1)
+
+    def test_generation_stops_when_every_subscriber_leaves(self):
+        first, _ = self.coalescer.join_or_start(self.key, self.factory)
+        second = self.coalescer.join(self.key)
+
+        self.coalescer.leave(first)
+        self.assertFalse(first.cancelled)
+
+        self.coalescer.leave(second)
+        self.assertTrue(first.cancelled)
+        self.assertFalse(self.coalescer.is_inflight(self.key))
+
+        # El flujo de Ollama se cierra en cuanto se atiende el siguiente fragmento.
+        self.release.set()
+        self.assertTrue(self.closed.wait(2))
+        self.assertEqual(self.coalescer.stats()["cancelled"], 1)
+
+    def test_async_subscribers_share_one_generation(self):
+        async def generate():
+            self.calls += 1
+            yield chunk("Hola ")
+            await asyncio.sleep(0.01)
+            yield chunk("mundo")
+
+        async def consume(flight):
+            return "".join([item['message']['content'] async for item in flight.astream()])
+
+        async def scenario():
+            first, started = self.coalescer.ajoin_or_start(self.key, generate)
+            second, joined_started = self.coalescer.ajoin_or_start(self.key, generate)
+            self.assertTrue(started)
+            self.assertFalse(joined_started)
+            return await asyncio.gather(consume(first), consume(second))
+
+        self.assertEqual(asyncio.run(scenario()), ["Hola mundo", "Hola mundo"])
+        self.assertEqual(self.calls, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
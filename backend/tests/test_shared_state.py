@@ -0,0 +1,92 @@
+# Pruebas del turno de escritor compartido entre procesos. Uso (desde backend): python -m pytest tests
+import os
+import tempfile
+import threading
+import time
+import unittest
+from RAGController.ingestion_jobs import IngestionJob, SharedIngestionQueue
+from RAGController.read_write_lock import ReadWriteLock
+from RAGController.shared_state import SharedState
+
+
+class WriterLeaseHandoverTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory(ignore_cleanup_errors=True)
+        path = os.path.join(self.directory.name, "shared.db")
+        # Dos procesos trabajadores sobre la misma base de datos compartida.
+        self.first = SharedState(path, writer_ttl=0.3)
+        self.second = SharedState(path, writer_ttl=0.3)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_only_one_writer_until_the_lease_expires(self):
+        self.assertEqual(self.first.try_acquire_writer(), (True, True))
+        self.assertEqual(self.second.try_acquire_writer(), (False, False))
+
+        time.sleep(0.4)
+        self.assertEqual(self.second.try_acquire_writer(), (True, True))
+        self.assertFalse(self.first.is_writer())
+
+    def test_job_of_the_previous_writer_is_not_overwritten(self):
+        started = threading.Event()
+
+        def handler(kind, category, source, file_extension, file_content, progress):
+            started.set()
+
+            while not progress.is_cancelled():
+                time.sleep(0.05)
+
+            return True, "Entrenamiento completado."
+
+        first_queue = SharedIngestionQueue(self.first, handler)
+        second_queue = SharedIngestionQueue(self.second, handler)
+        self.first.try_acquire_writer()
+        _, job = first_queue.submit("create", "categoria", "documento.txt", "txt", b"contenido")
+
+        worker = threading.Thread(target=lambda: first_queue._run(first_queue._claim()))
+        worker.start()
+        self.assertTrue(started.wait(2))
+
+        # El primer proceso deja de renovar su turno; el segundo lo toma y marca el trabajo como fallido.
+        time.sleep(0.4)
+        self.assertEqual(self.second.try_acquire_writer(), (True, True))
+        second_queue.recover()
+
+        # El primer proceso detecta que perdió el turno, se detiene y no registra el trabajo como completado.
+        worker.join(5)
+        self.assertFalse(worker.is_alive())
+        recovered = second_queue.get(job.id)
+        self.assertEqual(recovered.state, IngestionJob.FAILED)
+        self.assertEqual(recovered.error, "El proceso de escritura se detuvo.")
+
+
+class ReadWriteLockTest(unittest.TestCase):
+
+    def test_writer_waits_for_readers_and_blocks_new_ones(self):
+        lock = ReadWriteLock()
+        events = []
+        lock.acquire_read()
+
+        writer = threading.Thread(target=lambda: (lock.acquire_write(), events.append("write"), lock.release_write()))
+        writer.start()
+        time.sleep(0.1)
+        self.assertEqual(events, [])
+
+        # Un lector nuevo espera tras el escritor, pero el hilo que ya lee puede volver a adquirir la lectura.
+        reader = threading.Thread(target=lambda: (lock.acquire_read(), events.append("read"), lock.release_read()))
+        reader.start()
+
+        with lock.read():
+            time.sleep(0.1)
+            self.assertEqual(events, [])
+
+        lock.release_read()
+        writer.join(2)
+        reader.join(2)
+        self.assertEqual(events, ["write", "read"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -307,13 +307,24 @@ document.addEventListener("DOMContentLoaded", function () {
             body: formData
         })
         .then(response => response.json())
-        .then(data => {
+        .then(async data => {
             console.log("Respuesta del servidor:", data);
-            alert(data.response);
+
+            // La ingesta se procesa en segundo plano: se espera a que el trabajo termine para informar el resultado.
+            if (data.status && data.job) {
+                sendButton.textContent = "Procesando...";
+                const job = await waitForJob(data.job.id);
+                alert(job.state === "completed" ? job.message : `No se pudo crear el entrenamiento: ${job.error || job.message}`);
+            } else {
+                alert(data.response);
+            }
+
+            sendButton.textContent = "Guardar";
             sendButton.disabled = false;
         })
         .catch(error => {
             console.error("Error al enviar los datos:", error);
+            sendButton.textContent = "Guardar";
             sendButton.disabled = false;
         });
     });
@@ -321,6 +332,26 @@ document.addEventListener("DOMContentLoaded", function () {
 
 });
 
+// Consulta el estado de un trabajo de ingesta hasta que termina (completado, fallido o cancelado).
+async function waitForJob(jobId, interval = 1000) {
+    while (true) {
+        const data = await fetch(`http://127.0.0.1:5000/jobs/${jobId}`).then(res => res.json());
+
+        if (!data.status) {
+            return { state: "failed", error: data.response };
+        }
+
+        const job = data.response;
+        console.log(`Entrenamiento ${job.category}: ${job.state}, ${job.pages_processed} páginas, ${job.chunks_processed} pedazos`);
+
+        if (["completed", "failed", "cancelled"].includes(job.state)) {
+            return job;
+        }
+
+        await new Promise(resolve => setTimeout(resolve, interval));
+    }
+}
+
 // Para notificar resultados de operación 
 
 async function loadTrainings() {
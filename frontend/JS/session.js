@@ -0,0 +1,48 @@
+// =========================================================================================================
+//                              Sesión del cliente con el servidor
+// =========================================================================================================
+
+// El servidor emite una sesión a los clientes que no envían ninguna; se conserva durante la pestaña y se
+// envía en la cabecera X-Session-Id de todas las peticiones a la API, también en los streams del chat.
+const API_URL = 'http://127.0.0.1:5000';
+const SESSION_HEADER = 'X-Session-Id';
+const SESSION_KEY = 'sessionId';
+const nativeFetch = window.fetch.bind(window);
+
+// Petición en curso que obtendrá la sesión; las demás esperan a que termine para no emitir varias
+let pendingSession = null;
+
+window.fetch = async function (resource, options = {}) {
+    const url = typeof resource === 'string' ? resource : resource.url;
+
+    if (!url || !url.startsWith(API_URL)) {
+        return nativeFetch(resource, options);
+    }
+
+    if (!sessionStorage.getItem(SESSION_KEY) && pendingSession) {
+        await pendingSession.catch(() => null);
+    }
+
+    const sessionId = sessionStorage.getItem(SESSION_KEY);
+    const headers = new Headers(options.headers || {});
+
+    if (sessionId) {
+        headers.set(SESSION_HEADER, sessionId);
+    }
+
+    const request = nativeFetch(resource, { ...options, headers }).then(response => {
+        const issued = response.headers.get(SESSION_HEADER);
+
+        if (issued && !sessionStorage.getItem(SESSION_KEY)) {
+            sessionStorage.setItem(SESSION_KEY, issued);
+        }
+
+        return response;
+    });
+
+    if (!sessionId) {
+        pendingSession = request;
+    }
+
+    return request;
+};